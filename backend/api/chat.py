@@ -1,9 +1,8 @@
-import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
-from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pymysql.cursors import DictCursor
 
 from backend.api.model.chat import (
@@ -11,37 +10,30 @@ from backend.api.model.chat import (
     ChatRsp,
     ConversationCreateReq,
     ConversationRsp,
-    MessageRsp,
+    ConversationUpdateReq,
 )
+from backend.chat.history_cache import history_cache
+from backend.chat.store import ensure_chat_tables, list_messages_page
+from backend.chat.tools import tool_registry
 from backend.database.dao.chat_dao import ChatDAO
-from backend.database.session import create_tables, db_connection, get_db_cursor
+from backend.database.session import get_db_cursor
 from backend.infra.llm.client import llm
 
 router = APIRouter()
 logger = logging.getLogger("chat_api")
 
 
-# 简单工具注册表示例
-def list_tools() -> Dict[str, Any]:
-    return {
-        "echo": {
-            "schema": {
-                "type": "object",
-                "properties": {"text": {"type": "string"}},
-                "required": ["text"],
-            },
-            "fn": lambda args: {"echo": args.get("text", "")},
-            "description": "回显输入文本",
-        }
-    }
-
-
 @router.post("/conversations", response_model=ConversationRsp)
-def create_conversation(cursor: DictCursor = Depends(get_db_cursor)):
+def create_conversation(
+    req: Optional[ConversationCreateReq] = None,
+    cursor: DictCursor = Depends(get_db_cursor),
+):
+    req = req or ConversationCreateReq()
     try:
         chat_dao = ChatDAO(cursor)
-        chat_dao.ensure_tables()
-        conversation = chat_dao.create_conversation()
+        ensure_chat_tables(chat_dao)
+        conversation = chat_dao.create_conversation(req.title, req.response_cache)
+        history_cache.prime(conversation.id)
         return ConversationRsp(**conversation.dict())
     except Exception as e:
         logger.exception(f"create_conversation error: {e}")
@@ -51,7 +43,23 @@ def create_conversation(cursor: DictCursor = Depends(get_db_cursor)):
 @router.get("/conversations/{conversation_id}", response_model=ConversationRsp)
 def get_conversation(conversation_id: int, cursor: DictCursor = Depends(get_db_cursor)):
     chat_dao = ChatDAO(cursor)
-    chat_dao.ensure_tables()
+    ensure_chat_tables(chat_dao)
+    conversation = chat_dao.get_conversation(conversation_id)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="会话不存在")
+    return ConversationRsp(**conversation.dict())
+
+
+@router.put("/conversations/{conversation_id}", response_model=ConversationRsp)
+def update_conversation(
+    conversation_id: int,
+    req: ConversationUpdateReq,
+    cursor: DictCursor = Depends(get_db_cursor),
+):
+    """修改会话标题或关闭/开启该会话的 LLM 回复缓存"""
+    chat_dao = ChatDAO(cursor)
+    ensure_chat_tables(chat_dao)
+    chat_dao.update_conversation(conversation_id, req.model_dump(exclude_none=True))
     conversation = chat_dao.get_conversation(conversation_id)
     if not conversation:
         raise HTTPException(status_code=404, detail="会话不存在")
@@ -59,122 +67,57 @@ def get_conversation(conversation_id: int, cursor: DictCursor = Depends(get_db_c
 
 
 @router.get("/conversations/{conversation_id}/messages")
-def list_messages(conversation_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+def list_messages(
+    conversation_id: int,
+    since_id: Optional[int] = Query(
+        None, ge=0, description="增量拉取：返回 id 大于该值的最早 limit 条"
+    ),
+    before_id: Optional[int] = Query(
+        None, ge=1, description="向前翻页：返回 id 小于该值的最近 limit 条"
+    ),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: DictCursor = Depends(get_db_cursor),
+):
+    """键集分页获取会话消息（按 id 升序），不传 since_id/before_id 时返回最近 limit 条"""
     chat_dao = ChatDAO(cursor)
-    chat_dao.ensure_tables()
-    return chat_dao.list_messages(conversation_id)
-
-
-def _load_history(conversation_id: int, chat_dao: ChatDAO):
-    rows = chat_dao.get_message_history(conversation_id)
-    lc_messages = []
-    for r in rows:
-        role = r["role"]
-        content = r["content"]
-        if role == "system":
-            lc_messages.append(SystemMessage(content=content))
-        elif role == "assistant":
-            lc_messages.append(AIMessage(content=content))
-        elif role == "tool":
-            # 将工具结果作为系统信息供模型参考
-            lc_messages.append(
-                SystemMessage(content=f"TOOL_RESULT[{r.get('name')}] => {content}")
-            )
-        else:
-            lc_messages.append(HumanMessage(content=content))
-    return lc_messages
+    ensure_chat_tables(chat_dao)
+    return list_messages_page(chat_dao, conversation_id, since_id, before_id, limit)
 
 
 @router.post("/tools")
 def get_tools():
     # 提供前端展示的工具列表
-    registry = list_tools()
-    tools = [
-        {
-            "name": name,
-            "schema": meta.get("schema"),
-            "description": meta.get("description"),
-        }
-        for name, meta in registry.items()
-    ]
-    return {"tools": tools}
+    return {"tools": tool_registry.specs()}
 
 
 @router.post("/ask", response_model=ChatRsp)
-def chat(req: ChatReq, cursor: DictCursor = Depends(get_db_cursor)):
-    chat_dao = ChatDAO(cursor)
-    chat_dao.ensure_tables()
-
-    conversation_id = req.conversation_id
-    if not conversation_id:
-        conversation = chat_dao.create_conversation()
-        conversation_id = conversation.id
-
-    # 保存用户消息
-    chat_dao.save_message(conversation_id, "user", req.content)
-
-    # 加载历史
-    history = _load_history(conversation_id, chat_dao)
-    # 注入工具调用说明
-    tool_instruction = (
-        '你可以在需要外部工具时，仅返回一个 JSON 对象，格式为 {"tool":"工具名","arguments":{...}}，'
-        "不要添加其他文本；若不需要工具，则直接自然语言回答。可用工具请根据后端提供的 /tools 列表自行选择。"
-    )
-    history.insert(0, SystemMessage(content=tool_instruction))
-
-    # 基础回答
-    response = llm.invoke(history)
-    assistant_text = response.content if hasattr(response, "content") else str(response)
-    tool_call_info = None
-    tool_result = None
+async def chat(req: ChatReq, background_tasks: BackgroundTasks):
+    # 对话流程依赖 langchain，首次对话时才导入
+    from backend.chat.context import summarize_if_needed
+    from backend.chat.pipeline import chat_turn
 
-    # 简单函数调用检测：如果模型以JSON形式提出调用
     try:
-        maybe_json = assistant_text.strip()
-        if maybe_json.startswith("{") and maybe_json.endswith("}"):
-            call = json.loads(maybe_json)
-            if isinstance(call, dict) and "tool" in call and "arguments" in call:
-                registry = list_tools()
-                tool_name = call["tool"]
-                if tool_name in registry:
-                    tool_call_info = {"name": tool_name, "arguments": call["arguments"]}
-                    tool_fn = registry[tool_name]["fn"]
-                    tool_result = tool_fn(call["arguments"])  # 执行
-                    # 把工具调用和结果作为消息写入历史
-                    chat_dao.save_message(
-                        conversation_id,
-                        "assistant",
-                        assistant_text,
-                        name=tool_name,
-                        tool_call=tool_call_info,
-                    )
-                    chat_dao.save_message(
-                        conversation_id,
-                        "tool",
-                        json.dumps(tool_result),
-                        name=tool_name,
-                    )
-                    # 二次让模型基于工具结果回复
-                    history2 = _load_history(conversation_id, chat_dao)
-                    response2 = llm.invoke(history2)
-                    assistant_text = (
-                        response2.content
-                        if hasattr(response2, "content")
-                        else str(response2)
-                    )
+        result = await chat_turn(llm, req.conversation_id, req.content)
+        # 响应发出后再更新滚动摘要，不计入本轮延迟
+        background_tasks.add_task(
+            summarize_if_needed, llm, result["conversation_id"]
+        )
+        return ChatRsp(**result)
     except Exception as e:
-        logger.warning(f"tool call 解析/执行失败: {e}")
-
-    # 保存最终助手消息
-    chat_dao.save_message(conversation_id, "assistant", assistant_text)
-
-    # 返回完整消息列表
-    messages = chat_dao.list_messages(conversation_id)
-
-    return ChatRsp(
-        conversation_id=conversation_id,
-        assistant_message=assistant_text,
-        tool_call=tool_call_info,
-        tool_result=tool_result,
-        messages=messages,
+        logger.exception(f"chat error: {e}")
+        raise HTTPException(status_code=500, detail=f"对话失败: {e}")
+
+
+@router.post("/ask/stream")
+async def chat_stream(req: ChatReq):
+    """流式对话（text/event-stream），事件依次为 start、token、tool_call、tool_result、done/error"""
+    from backend.chat.streaming import stream_chat
+
+    # 响应结束后再更新滚动摘要，不占用 SSE 连接
+    background = BackgroundTasks()
+    return StreamingResponse(
+        stream_chat(llm, req.conversation_id, req.content, background),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
     )
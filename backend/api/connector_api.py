@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pymysql.cursors import DictCursor
 from typing import List, Optional
-from backend.database.session import get_db_cursor
+from backend.chat.schema_index import schema_index
+from backend.database.session import db_connection, get_db_cursor
 from backend.database.service.connector_service import ConnectorService
 from backend.api.model import (
     ConnectorCreateReq,
@@ -14,22 +15,30 @@ from backend.api.model import (
     ParseConnectorRsp,
 )
 from backend.infra.llm.client import llm
-from langchain.schema import SystemMessage, HumanMessage
 import logging
 
 router = APIRouter()
 logger = logging.getLogger("connector_api")
 
 
+def _invalidate_connector(connector_id: int):
+    """变更提交后再失效执行计划与元数据索引；提交前失效的话，
+    并发运行会按旧配置重新缓存执行计划直到 TTL 过期"""
+    # 按需导入：调度器模块导入时即创建 APScheduler 与执行组件，连接器接口不必承担
+    from backend.scheduler.manager import scheduler_manager
+
+    scheduler_manager.invalidate_connector(connector_id)
+    schema_index.invalidate_connector(connector_id)
+
+
 @router.post("/", response_model=ConnectorRsp)
-def create_connector(
-    connector: ConnectorCreateReq, cursor: DictCursor = Depends(get_db_cursor)
-):
+def create_connector(connector: ConnectorCreateReq):
     """创建连接器"""
     logger.info(f"Creating connector: {connector.name} ({connector.db_type})")
-    service = ConnectorService(cursor)
     try:
-        result = service.create_connector(connector.dict())
+        with db_connection.get_cursor() as cursor:
+            result = ConnectorService(cursor).create_connector(connector.dict())
+        schema_index.invalidate_connector(result.id)
         logger.info(f"Connector '{connector.name}' created successfully")
         return result
     except ValueError as e:
@@ -90,21 +99,18 @@ def list_connectors(
 
 
 @router.put("/{connector_id}", response_model=ConnectorRsp)
-def update_connector(
-    connector_id: int,
-    connector: ConnectorUpdateReq,
-    cursor: DictCursor = Depends(get_db_cursor),
-):
+def update_connector(connector_id: int, connector: ConnectorUpdateReq):
     """更新连接器"""
     logger.info(f"Updating connector with ID: {connector_id}")
-    service = ConnectorService(cursor)
     try:
-        updated = service.update_connector(
-            connector_id, connector.dict(exclude_unset=True)
-        )
+        with db_connection.get_cursor() as cursor:
+            updated = ConnectorService(cursor).update_connector(
+                connector_id, connector.dict(exclude_unset=True)
+            )
         if not updated:
             logger.warning(f"Connector with ID {connector_id} not found for update")
             raise HTTPException(status_code=404, detail="连接器不存在")
+        _invalidate_connector(connector_id)
         logger.info(f"Connector '{updated.name}' updated successfully")
         return updated
     except ValueError as e:
@@ -118,14 +124,16 @@ def update_connector(
 
 
 @router.delete("/{connector_id}", response_model=MessageRsp)
-def delete_connector(connector_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+def delete_connector(connector_id: int):
     """删除连接器"""
     logger.info(f"Deleting connector with ID: {connector_id}")
-    service = ConnectorService(cursor)
     try:
-        if not service.delete_connector(connector_id):
+        with db_connection.get_cursor() as cursor:
+            deleted = ConnectorService(cursor).delete_connector(connector_id)
+        if not deleted:
             logger.warning(f"Connector with ID {connector_id} not found for deletion")
             raise HTTPException(status_code=404, detail="连接器不存在")
+        _invalidate_connector(connector_id)
         logger.info(f"Connector with ID {connector_id} deleted successfully")
         return MessageRsp(message="删除成功")
     except HTTPException:
@@ -136,14 +144,16 @@ def delete_connector(connector_id: int, cursor: DictCursor = Depends(get_db_curs
 
 
 @router.post("/{connector_id}/activate", response_model=MessageRsp)
-def activate_connector(connector_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+def activate_connector(connector_id: int):
     """激活连接器"""
     logger.info(f"Activating connector with ID: {connector_id}")
-    service = ConnectorService(cursor)
     try:
-        if not service.activate_connector(connector_id):
+        with db_connection.get_cursor() as cursor:
+            activated = ConnectorService(cursor).activate_connector(connector_id)
+        if not activated:
             logger.warning(f"Connector with ID {connector_id} not found for activation")
             raise HTTPException(status_code=404, detail="连接器不存在")
+        _invalidate_connector(connector_id)
         logger.info(f"Connector with ID {connector_id} activated successfully")
         return MessageRsp(message="激活成功")
     except HTTPException:
@@ -154,18 +164,18 @@ def activate_connector(connector_id: int, cursor: DictCursor = Depends(get_db_cu
 
 
 @router.post("/{connector_id}/deactivate", response_model=MessageRsp)
-def deactivate_connector(
-    connector_id: int, cursor: DictCursor = Depends(get_db_cursor)
-):
+def deactivate_connector(connector_id: int):
     """停用连接器"""
     logger.info(f"Deactivating connector with ID: {connector_id}")
-    service = ConnectorService(cursor)
     try:
-        if not service.deactivate_connector(connector_id):
+        with db_connection.get_cursor() as cursor:
+            deactivated = ConnectorService(cursor).deactivate_connector(connector_id)
+        if not deactivated:
             logger.warning(
                 f"Connector with ID {connector_id} not found for deactivation"
             )
             raise HTTPException(status_code=404, detail="连接器不存在")
+        _invalidate_connector(connector_id)
         logger.info(f"Connector with ID {connector_id} deactivated successfully")
         return MessageRsp(message="停用成功")
     except HTTPException:
@@ -228,6 +238,9 @@ def search_connectors(keyword: str, cursor: DictCursor = Depends(get_db_cursor))
 @router.post("/parse", response_model=ParseConnectorRsp)
 def parse_connector(req: ParseConnectorReq):
     """使用 LLM 解析任意文本中的连接信息"""
+    # langchain 只在调用解析时导入，不计入接口模块的导入开销
+    from langchain.schema import SystemMessage, HumanMessage
+
     try:
         system_prompt = (
             "你是一个严格的解析器。\n"
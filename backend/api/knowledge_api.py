@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pymysql.cursors import DictCursor
 from typing import List
-from backend.database.session import get_db_cursor
+from backend.chat.schema_index import schema_index
+from backend.database.session import db_connection, get_db_cursor
 from backend.database.service.knowledge_service import KnowledgeService
 from backend.api.model.knowledge import (
     KnowledgeCreateReq,
@@ -17,17 +18,17 @@ logger = logging.getLogger("knowledge_api")
 
 
 @router.post("/", response_model=KnowledgeRsp)
-def create_knowledge(
-    body: KnowledgeCreateReq, cursor: DictCursor = Depends(get_db_cursor)
-):
-    service = KnowledgeService(cursor)
+def create_knowledge(body: KnowledgeCreateReq):
     try:
-        created = service.create_knowledge(body.dict())
-        return created
+        with db_connection.get_cursor() as cursor:
+            created = KnowledgeService(cursor).create_knowledge(body.dict())
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建失败: {str(e)}")
+    # 提交后再失效知识索引，避免并发请求按旧数据重新加载
+    schema_index.invalidate_knowledge()
+    return created
 
 
 @router.get("/by-target", response_model=KnowledgeListRsp)
@@ -58,22 +59,20 @@ def list_by_prefix(
 
 
 @router.put("/{knowledge_id}", response_model=KnowledgeRsp)
-def update_knowledge(
-    knowledge_id: int,
-    body: KnowledgeUpdateReq,
-    cursor: DictCursor = Depends(get_db_cursor),
-):
-    service = KnowledgeService(cursor)
-    updated = service.update_content(knowledge_id, body.content)
+def update_knowledge(knowledge_id: int, body: KnowledgeUpdateReq):
+    with db_connection.get_cursor() as cursor:
+        updated = KnowledgeService(cursor).update_content(knowledge_id, body.content)
     if not updated:
         raise HTTPException(status_code=404, detail="知识不存在")
+    schema_index.invalidate_knowledge()
     return updated
 
 
 @router.delete("/{knowledge_id}")
-def delete_knowledge(knowledge_id: int, cursor: DictCursor = Depends(get_db_cursor)):
-    service = KnowledgeService(cursor)
-    ok = service.delete(knowledge_id)
+def delete_knowledge(knowledge_id: int):
+    with db_connection.get_cursor() as cursor:
+        ok = KnowledgeService(cursor).delete(knowledge_id)
     if not ok:
         raise HTTPException(status_code=404, detail="知识不存在")
+    schema_index.invalidate_knowledge()
     return {"message": "删除成功"}
@@ -12,18 +12,26 @@ class ChatReq(BaseModel):
 class ChatRsp(BaseModel):
     conversation_id: int
     assistant_message: str
-    tool_call: Optional[Dict[str, Any]] = None
-    tool_result: Optional[Any] = None
-    messages: List[Dict[str, Any]]
+    tool_calls: List[Dict[str, Any]] = Field(
+        default_factory=list, description="本轮执行的工具调用（含 result）"
+    )
+    messages: List[Dict[str, Any]] = Field(..., description="本轮新增的消息")
 
 
 class ConversationCreateReq(BaseModel):
     title: Optional[str] = Field(None, description="会话标题")
+    response_cache: bool = Field(True, description="是否使用 LLM 回复缓存")
+
+
+class ConversationUpdateReq(BaseModel):
+    title: Optional[str] = Field(None, description="会话标题")
+    response_cache: Optional[bool] = Field(None, description="是否使用 LLM 回复缓存")
 
 
 class ConversationRsp(BaseModel):
     id: int
     title: Optional[str] = None
+    response_cache: bool = True
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
 
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel, Field
 
@@ -5,9 +6,27 @@ from pydantic import BaseModel, Field
 class JobTemplateCreateReq(BaseModel):
     name: str = Field(..., description="模板名称")
     description: Optional[str] = Field(None, description="描述")
-    template_type: str = Field("db_query", description="模板类型，仅支持 db_query")
+    template_type: str = Field(
+        "db_query",
+        description=(
+            "模板类型: db_query 或 incremental_query（增量查询，需配置 "
+            "watermark_column，SQL 中以 %(watermark)s 引用当前水位；需配置 "
+            "initial_watermark，或在 SQL 中以 %(watermark)s IS NULL 处理首次运行；"
+            "可选 watermark_param）"
+        ),
+    )
     default_config: Dict[str, Any] = Field(
-        ..., description="默认配置，例如: {connector_id:int, sql:str, params:dict?}"
+        ...,
+        description=(
+            "默认配置，例如: {connector_id:int, sql:str, params:dict?, sharding:dict?}；"
+            "sharding 示例: {strategy:'key_range', column:'id', table:'t', shards:8, "
+            "retries:2, max_workers:4}（SQL 以 %(shard_start)s/%(shard_end)s 引用范围）"
+            "或 {strategy:'doris_partition', table:'t', partitions?:[...]}"
+            "（SQL 中以 {partition} 占位）；"
+            "retry 示例: {max_attempts:3, backoff_ms:1000, max_backoff_ms:60000}；"
+            "on_change 任务通过 watch_tables:['db.t'] 与 watch_mode:'update_time'|'checksum' "
+            "指定监听的源表"
+        ),
     )
 
 
@@ -30,17 +49,30 @@ class JobTemplateRsp(BaseModel):
 class ScheduledJobCreateReq(BaseModel):
     name: str = Field(..., description="任务名称")
     template_id: int = Field(..., description="任务模板ID")
-    schedule_type: str = Field("cron", description="cron 或 interval")
+    schedule_type: str = Field(
+        "cron",
+        description=(
+            "cron、interval、dependent（仅由上游任务成功触发）"
+            "或 on_change（监听的源表变更时触发）"
+        ),
+    )
     cron_expression: Optional[str] = Field(
         None, description="当 schedule_type=cron 时必填，标准 crontab 表达式"
     )
     interval_seconds: Optional[int] = Field(
-        None, description="当 schedule_type=interval 时必填"
+        None,
+        description="当 schedule_type=interval 时必填；on_change 时表示两次触发的最小间隔",
     )
     is_active: bool = Field(True, description="是否激活")
     override_config: Optional[Dict[str, Any]] = Field(
         None, description="覆盖模板默认配置"
     )
+    retention_days: Optional[int] = Field(
+        None, ge=0, description="运行记录保留天数，0 表示永久保留，不填使用全局默认"
+    )
+    upstream_job_ids: Optional[List[int]] = Field(
+        None, description="上游依赖任务ID，全部成功后触发本任务"
+    )
 
 
 class ScheduledJobUpdateReq(BaseModel):
@@ -50,6 +82,39 @@ class ScheduledJobUpdateReq(BaseModel):
     interval_seconds: Optional[int] = None
     is_active: Optional[bool] = None
     override_config: Optional[Dict[str, Any]] = None
+    retention_days: Optional[int] = Field(None, ge=0)
+    upstream_job_ids: Optional[List[int]] = None
+
+
+# 批量接口单次请求的最大任务数
+BULK_MAX_JOBS = 1000
+
+
+class ScheduledJobBulkCreateReq(BaseModel):
+    jobs: List[ScheduledJobCreateReq] = Field(
+        ..., min_length=1, max_length=BULK_MAX_JOBS, description="待创建的任务"
+    )
+
+
+class ScheduledJobBulkUpdateItem(ScheduledJobUpdateReq):
+    id: int = Field(..., description="任务ID")
+
+
+class ScheduledJobBulkUpdateReq(BaseModel):
+    jobs: List[ScheduledJobBulkUpdateItem] = Field(
+        ..., min_length=1, max_length=BULK_MAX_JOBS, description="待更新的任务，仅更新传入的字段"
+    )
+
+
+class ScheduledJobBulkDeleteReq(BaseModel):
+    job_ids: List[int] = Field(
+        ..., min_length=1, max_length=BULK_MAX_JOBS, description="待删除的任务ID"
+    )
+
+
+class ScheduledJobBulkDeleteRsp(BaseModel):
+    deleted: List[int] = Field(default_factory=list, description="已删除的任务ID")
+    missing: List[int] = Field(default_factory=list, description="不存在的任务ID")
 
 
 class ScheduledJobRsp(BaseModel):
@@ -62,17 +127,123 @@ class ScheduledJobRsp(BaseModel):
     is_active: bool
     next_run_time: Optional[str]
     override_config: Optional[Dict[str, Any]]
+    retention_days: Optional[int] = None
+    upstream_job_ids: List[int] = []
     created_at: Optional[str]
     updated_at: Optional[str]
 
 
 class JobRunRsp(BaseModel):
+    """运行记录列表项，不含结果（按需通过 /runs/{run_id}/result 获取）"""
+
     id: int
     job_id: int
     status: str
-    started_at: Optional[str]
-    finished_at: Optional[str]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
     duration_ms: Optional[int]
     rows_affected: Optional[int]
-    result: Optional[Any]
+    result_size: Optional[int] = Field(None, description="结果存储字节数")
+    error: Optional[str]
+    dag_run_id: Optional[int] = None
+    metrics: Optional[Dict[str, Any]] = None
+
+
+class JobRunResultRsp(BaseModel):
+    run_id: int
+    job_id: int
+    status: str
+    result: Optional[Any] = Field(None, description="预览行、总行数等运行结果")
+    result_size: Optional[int] = None
+
+
+class JobRunShardRsp(BaseModel):
+    id: int
+    run_id: int
+    shard_index: int
+    shard_key: str
+    status: str
+    attempts: int
+    rows_affected: Optional[int]
+    duration_ms: Optional[int]
     error: Optional[str]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+class JobRunMetricsRsp(BaseModel):
+    runs: List[JobRunRsp] = Field(default_factory=list, description="最近运行（不含结果）")
+    summary: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict, description="各指标的 avg/p50/p95/max"
+    )
+
+
+class DagRunRsp(BaseModel):
+    id: int
+    root_job_id: int
+    status: str
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    duration_ms: Optional[int]
+    critical_path_ms: Optional[int]
+    critical_path: Optional[List[int]]
+    runs: List[JobRunRsp] = []
+
+
+class CircuitBreakerRsp(BaseModel):
+    connector_id: int
+    state: str = Field(..., description="closed|open|half_open")
+    consecutive_failures: int
+    open_seconds: float = Field(..., description="当前熔断时长（秒）")
+    opened_at: Optional[float] = None
+    retry_at: Optional[float] = Field(None, description="熔断到期时间戳")
+    last_error: Optional[str] = None
+
+
+class SchedulerStatsRsp(BaseModel):
+    backend: str = Field(..., description="执行后端 local|redis")
+    queue: Dict[str, Any] = Field(default_factory=dict, description="触发队列状态")
+    executor: Dict[str, float] = Field(
+        default_factory=dict, description="执行线程数、执行中数量与占用率"
+    )
+    running_by_connector: Dict[int, int] = Field(default_factory=dict)
+    scheduled_jobs: int = 0
+    watched_jobs: int = Field(0, description="按源表变更触发的任务数")
+    overdue_jobs: int = Field(0, description="已到计划时间但尚未触发的任务数")
+    misfires: int = 0
+    max_instances_skipped: int = 0
+    start_lag_ms: Dict[str, float] = Field(
+        default_factory=dict, description="计划时间到开始执行的延迟 p50/p95/p99/max"
+    )
+    queue_wait_ms: Dict[str, float] = Field(default_factory=dict)
+    run_duration_ms: Dict[str, float] = Field(default_factory=dict)
+    triggers: Dict[str, Dict[str, int]] = Field(
+        default_factory=dict, description="按来源统计的触发结果"
+    )
+    runs: Dict[str, int] = Field(default_factory=dict, description="按状态统计的运行数")
+    plan_cache: Dict[str, int] = Field(default_factory=dict)
+    recorder_pending: int = 0
+    breakers_open: int = 0
+
+
+class RunPruneRsp(BaseModel):
+    archived: int = Field(0, description="归档并删除的运行记录数")
+    deleted: int = Field(0, description="未归档直接删除的运行记录数")
+    purged: int = Field(0, description="清理的过期归档记录数")
+
+
+class JobWatermarkRsp(BaseModel):
+    job_id: int
+    watermark_value: Optional[str]
+    value_type: str
+    total_rows: int
+    run_count: int
+    updated_at: Optional[datetime] = None
+
+
+class JobWatermarkResetReq(BaseModel):
+    value: Optional[Any] = Field(None, description="新的水位值，None 表示清空")
+    value_type: Optional[str] = Field(
+        None,
+        description="水位类型 int|decimal|float|datetime|date|str，不填按 value 推断",
+    )
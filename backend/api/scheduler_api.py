@@ -1,7 +1,10 @@
+import math
 from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import List
+from fastapi.responses import PlainTextResponse
+from typing import List, Optional
 from pymysql.cursors import DictCursor
-from backend.database.session import get_db_cursor, create_tables
+from backend.database.session import db_connection, get_db_cursor, create_tables
+from backend.database.dao.scheduler_dao import BulkInsertConflict
 from backend.database.service.scheduler_service import SchedulerService
 from backend.api.model.scheduler import (
     JobTemplateCreateReq,
@@ -10,17 +13,44 @@ from backend.api.model.scheduler import (
     ScheduledJobCreateReq,
     ScheduledJobUpdateReq,
     ScheduledJobRsp,
+    ScheduledJobBulkCreateReq,
+    ScheduledJobBulkUpdateReq,
+    ScheduledJobBulkDeleteReq,
+    ScheduledJobBulkDeleteRsp,
+    RunPruneRsp,
+    DagRunRsp,
+    JobWatermarkRsp,
+    JobWatermarkResetReq,
+    JobRunMetricsRsp,
+    JobRunShardRsp,
+    JobRunRsp,
+    JobRunResultRsp,
+    CircuitBreakerRsp,
+    SchedulerStatsRsp,
 )
 from backend.scheduler.manager import scheduler_manager
-from backend.database.dao.scheduler_dao import SchedulerDAO
+from backend.scheduler.dispatcher import (
+    DispatchQueueFull,
+    DuplicateTrigger,
+    TriggerRateLimited,
+)
+from backend.scheduler.incremental import decode_watermark, encode_watermark
 
 
 router = APIRouter()
 
 
+_tables_ready = False
+
+
 def ensure_scheduler_tables():
+    """建表只需成功执行一次（启动时通常已完成），之后的请求直接跳过"""
+    global _tables_ready
+    if _tables_ready:
+        return
     create_tables()  # 基础表
     # 其余表在 create_tables 内部扩展或在此处保证
+    _tables_ready = True
 
 
 # 模板
@@ -50,40 +80,88 @@ def list_templates(
 
 
 @router.put("/templates/{template_id}", response_model=JobTemplateRsp)
-def update_template(
-    template_id: int,
-    req: JobTemplateUpdateReq,
-    cursor: DictCursor = Depends(get_db_cursor),
-):
+def update_template(template_id: int, req: JobTemplateUpdateReq):
     ensure_scheduler_tables()
-    service = SchedulerService(cursor)
-    tpl = service.update_template(template_id, req.dict(exclude_unset=True))
+    try:
+        with db_connection.get_cursor() as cursor:
+            tpl = SchedulerService(cursor).update_template(
+                template_id, req.dict(exclude_unset=True)
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not tpl:
         raise HTTPException(status_code=404, detail="模板不存在")
+    # 提交后再失效执行计划，避免并发运行按旧模板重新缓存
+    scheduler_manager.invalidate_template(template_id)
     return JobTemplateRsp.model_validate(tpl.model_dump())
 
 
 @router.delete("/templates/{template_id}")
-def delete_template(template_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+def delete_template(template_id: int):
     ensure_scheduler_tables()
-    service = SchedulerService(cursor)
-    if not service.delete_template(template_id):
+    with db_connection.get_cursor() as cursor:
+        deleted = SchedulerService(cursor).delete_template(template_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="模板不存在")
+    scheduler_manager.invalidate_template(template_id)
     return {"message": "删除成功"}
 
 
 # 任务
+# 增删改任务时事务在 with 块退出时提交，之后再注册调度并重载依赖图，
+# 否则 DagCoordinator 用另一个连接读 job_dependencies 时看不到本次变更
 @router.post("/jobs", response_model=ScheduledJobRsp)
-def create_job(req: ScheduledJobCreateReq, cursor: DictCursor = Depends(get_db_cursor)):
+def create_job(req: ScheduledJobCreateReq):
+    ensure_scheduler_tables()
+    try:
+        with db_connection.get_cursor() as cursor:
+            job = SchedulerService(cursor).create_job(req.dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # 注册到 APScheduler
+    scheduler_manager.sync_job(job)
+    return ScheduledJobRsp.model_validate(job.model_dump())
+
+
+# 批量接口需注册在 /jobs/{job_id} 之前
+@router.post("/jobs/bulk", response_model=List[ScheduledJobRsp])
+def create_jobs_bulk(req: ScheduledJobBulkCreateReq):
+    ensure_scheduler_tables()
+    try:
+        with db_connection.get_cursor() as cursor:
+            jobs = SchedulerService(cursor).create_jobs([job.dict() for job in req.jobs])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BulkInsertConflict as e:
+        # 事务已回滚，可直接重试
+        raise HTTPException(status_code=409, detail=str(e))
+    scheduler_manager.sync_jobs(jobs)
+    return [ScheduledJobRsp.model_validate(j.model_dump()) for j in jobs]
+
+
+@router.put("/jobs/bulk", response_model=List[ScheduledJobRsp])
+def update_jobs_bulk(req: ScheduledJobBulkUpdateReq):
     ensure_scheduler_tables()
-    service = SchedulerService(cursor)
     try:
-        job = service.create_job(req.dict())
-        # 注册到 APScheduler
-        scheduler_manager.sync_job(job)
-        return ScheduledJobRsp.model_validate(job.model_dump())
+        with db_connection.get_cursor() as cursor:
+            jobs = SchedulerService(cursor).update_jobs(
+                [job.dict(exclude_unset=True) for job in req.jobs]
+            )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    scheduler_manager.sync_jobs(jobs)
+    return [ScheduledJobRsp.model_validate(j.model_dump()) for j in jobs]
+
+
+@router.delete("/jobs/bulk", response_model=ScheduledJobBulkDeleteRsp)
+def delete_jobs_bulk(req: ScheduledJobBulkDeleteReq):
+    ensure_scheduler_tables()
+    with db_connection.get_cursor() as cursor:
+        deleted = SchedulerService(cursor).delete_jobs(req.job_ids)
+    scheduler_manager.remove_jobs(deleted)
+    return ScheduledJobBulkDeleteRsp(
+        deleted=deleted, missing=sorted(set(req.job_ids) - set(deleted))
+    )
 
 
 @router.get("/jobs", response_model=List[ScheduledJobRsp])
@@ -99,12 +177,15 @@ def list_jobs(
 
 
 @router.put("/jobs/{job_id}", response_model=ScheduledJobRsp)
-def update_job(
-    job_id: int, req: ScheduledJobUpdateReq, cursor: DictCursor = Depends(get_db_cursor)
-):
+def update_job(job_id: int, req: ScheduledJobUpdateReq):
     ensure_scheduler_tables()
-    service = SchedulerService(cursor)
-    job = service.update_job(job_id, req.dict(exclude_unset=True))
+    try:
+        with db_connection.get_cursor() as cursor:
+            job = SchedulerService(cursor).update_job(
+                job_id, req.dict(exclude_unset=True)
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not job:
         raise HTTPException(status_code=404, detail="任务不存在")
     scheduler_manager.sync_job(job)
@@ -112,31 +193,172 @@ def update_job(
 
 
 @router.delete("/jobs/{job_id}")
-def delete_job(job_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+def delete_job(job_id: int):
     ensure_scheduler_tables()
-    service = SchedulerService(cursor)
-    if not service.delete_job(job_id):
+    with db_connection.get_cursor() as cursor:
+        deleted = SchedulerService(cursor).delete_job(job_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="任务不存在")
     scheduler_manager.remove_job(job_id)
     return {"message": "删除成功"}
 
 
 @router.post("/jobs/{job_id}/run")
-def run_job_now(job_id: int):
-    # 触发一次立即运行
-    ok = scheduler_manager.trigger_job(job_id)
-    if not ok:
-        raise HTTPException(status_code=404, detail="任务不存在或未激活")
+def run_job_now(job_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+    if not SchedulerService(cursor).get_job(job_id):
+        raise HTTPException(status_code=404, detail="任务不存在")
+    # 触发一次立即运行（进入分发队列，按优先级执行）
+    try:
+        scheduler_manager.trigger_job(job_id)
+    except DuplicateTrigger as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except TriggerRateLimited as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except DispatchQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     return {"message": "已触发执行"}
 
 
-@router.get("/jobs/{job_id}/runs")
+@router.get("/jobs/{job_id}/runs", response_model=List[JobRunRsp])
 def list_job_runs(
     job_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    before_id: Optional[int] = Query(
+        None, ge=1, description="键集分页：返回 id 小于该值的记录，传入时忽略 skip"
+    ),
     cursor: DictCursor = Depends(get_db_cursor),
 ):
-    dao = SchedulerDAO(cursor)
-    runs = dao.list_job_runs(job_id, skip, limit)
+    service = SchedulerService(cursor)
+    runs = service.list_job_runs(job_id, skip, limit, before_id)
     return [r.model_dump() for r in runs]
+
+
+@router.get("/jobs/{job_id}/metrics", response_model=JobRunMetricsRsp)
+def list_job_run_metrics(
+    job_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: DictCursor = Depends(get_db_cursor),
+):
+    # 最近运行的分阶段耗时与资源指标，用于趋势分析
+    service = SchedulerService(cursor)
+    runs, summary = service.list_run_metrics(job_id, limit)
+    return JobRunMetricsRsp(
+        runs=[r.model_dump() for r in runs],
+        summary=summary,
+    )
+
+
+@router.get("/runs/{run_id}/result", response_model=JobRunResultRsp)
+def get_run_result(run_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+    # 列表只返回轻量字段，结果按需单独读取
+    run = SchedulerService(cursor).get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="运行记录不存在")
+    return JobRunResultRsp(
+        run_id=run.id,
+        job_id=run.job_id,
+        status=run.status,
+        result=run.result,
+        result_size=run.result_size,
+    )
+
+
+@router.get("/runs/{run_id}/shards", response_model=List[JobRunShardRsp])
+def list_run_shards(run_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+    service = SchedulerService(cursor)
+    shards = service.list_run_shards(run_id)
+    return [JobRunShardRsp.model_validate(s.model_dump()) for s in shards]
+
+
+@router.post("/runs/prune", response_model=RunPruneRsp)
+def prune_job_runs():
+    # 立即执行一次运行记录保留策略
+    return RunPruneRsp(**scheduler_manager.prune_runs())
+
+
+@router.get("/stats", response_model=SchedulerStatsRsp)
+def get_scheduler_stats():
+    # 队列深度、执行线程占用、错过触发与启动延迟，用于容量评估
+    return SchedulerStatsRsp(**scheduler_manager.stats())
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_scheduler_metrics():
+    # Prometheus 抓取端点
+    return PlainTextResponse(
+        scheduler_manager.render_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/breakers", response_model=List[CircuitBreakerRsp])
+def list_circuit_breakers():
+    # 只列出有失败记录的连接器，健康的连接器不在列表中
+    return [CircuitBreakerRsp(**b) for b in scheduler_manager.breakers.snapshot()]
+
+
+@router.post("/breakers/{connector_id}/reset")
+def reset_circuit_breaker(connector_id: int):
+    # 人工确认源库恢复后立即关闭熔断
+    if not scheduler_manager.breakers.reset(connector_id):
+        raise HTTPException(status_code=404, detail="该连接器没有熔断记录")
+    return {"message": "熔断已重置"}
+
+
+@router.get("/dags/runs", response_model=List[DagRunRsp])
+def list_dag_runs(
+    root_job_id: Optional[int] = Query(None, description="按根任务过滤"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: DictCursor = Depends(get_db_cursor),
+):
+    service = SchedulerService(cursor)
+    dag_runs = service.list_dag_runs(root_job_id, limit)
+    return [DagRunRsp.model_validate(d.model_dump()) for d in dag_runs]
+
+
+@router.get("/dags/runs/{dag_run_id}", response_model=DagRunRsp)
+def get_dag_run(dag_run_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+    service = SchedulerService(cursor)
+    dag_run = service.get_dag_run(dag_run_id)
+    if not dag_run:
+        raise HTTPException(status_code=404, detail="DAG 运行不存在")
+    runs = service.list_runs_by_dag_run(dag_run_id)
+    return DagRunRsp(
+        **dag_run.model_dump(), runs=[r.model_dump() for r in runs]
+    )
+
+
+@router.get("/jobs/{job_id}/watermark", response_model=JobWatermarkRsp)
+def get_job_watermark(job_id: int, cursor: DictCursor = Depends(get_db_cursor)):
+    service = SchedulerService(cursor)
+    watermark = service.get_watermark(job_id)
+    if not watermark:
+        raise HTTPException(status_code=404, detail="水位不存在")
+    return JobWatermarkRsp.model_validate(watermark.model_dump())
+
+
+@router.put("/jobs/{job_id}/watermark", response_model=JobWatermarkRsp)
+def reset_job_watermark(
+    job_id: int,
+    req: JobWatermarkResetReq,
+    cursor: DictCursor = Depends(get_db_cursor),
+):
+    # 重置水位（用于回补历史数据），累计统计同时清零
+    service = SchedulerService(cursor)
+    if not service.get_job(job_id):
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if req.value_type and req.value is not None:
+        raw, value_type = str(req.value), req.value_type
+        try:
+            decode_watermark(raw, value_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"水位值无效: {e}")
+    else:
+        raw, value_type = encode_watermark(req.value)
+    watermark = service.reset_watermark(job_id, raw, value_type)
+    return JobWatermarkRsp.model_validate(watermark.model_dump())
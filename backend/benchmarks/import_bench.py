@@ -0,0 +1,154 @@
+"""导入耗时基准测试
+
+在全新的子进程中分别导入各模块，统计冷启动导入耗时（多次取中位数）与是否
+加载了 langchain 等重依赖，并按 -X importtime 列出累计耗时最高的顶层包，
+输出可对比的 JSON 报告。
+
+用法:
+    python -m backend.benchmarks.import_bench --repeat 5 \\
+        --report tmp/import_bench.json \\
+        --baseline tmp/import_bench_baseline.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.config import PROJECT_ROOT
+
+
+DEFAULT_MODULES = [
+    "backend.config",
+    "backend.scheduler.worker",
+    "backend.api",
+    "backend.main",
+]
+# 导入后检查是否已加载的重依赖
+HEAVY_PACKAGES = [
+    "langchain",
+    "langchain_core",
+    "langchain_google_genai",
+    "numpy",
+    "apscheduler",
+]
+
+# 计时结束后才导入 json，避免把被测模块的依赖提前加载
+PROBE = """
+import importlib, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = (time.perf_counter() - start) * 1000
+import json
+print(json.dumps({
+    "ms": elapsed,
+    "loaded": [p for p in sys.argv[2].split(",") if p in sys.modules],
+    "module_count": len(sys.modules),
+}))
+"""
+
+
+def probe(module: str) -> Dict[str, Any]:
+    """新进程中导入一次模块；模块导入时可能有输出，结果取最后一行"""
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, module, ",".join(HEAVY_PACKAGES)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def slowest_packages(module: str, top: int) -> List[List[Any]]:
+    """-X importtime 统计中累计耗时最高的顶层包 [包名, 毫秒]"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        cumulative[package] = max(cumulative.get(package, 0), int(cumulative_us))
+    ranked = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+    return [[name, round(us / 1000, 1)] for name, us in ranked[:top]]
+
+
+def measure(module: str, repeat: int, top: int) -> Dict[str, Any]:
+    try:
+        runs = [probe(module) for _ in range(repeat)]
+    except Exception as e:
+        return {"error": str(e)}
+    timings = [r["ms"] for r in runs]
+    return {
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "module_count": runs[-1]["module_count"],
+        "heavy_loaded": runs[-1]["loaded"],
+        "slowest_packages": slowest_packages(module, top),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """生成与基线的对比行（中位数导入耗时）"""
+    lines = [f"{'module':<28}{'baseline':>12}{'current':>12}{'delta':>10}"]
+    for module, current in report["modules"].items():
+        old = baseline.get("modules", {}).get(module, {}).get("median_ms")
+        new = current.get("median_ms")
+        if old is None or new is None:
+            continue
+        delta = (new - old) / old * 100 if old else 0.0
+        flag = " !" if delta >= 10 else ""
+        lines.append(f"{module:<28}{old:>12.1f}{new:>12.1f}{delta:>9.1f}%{flag}")
+    return lines
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="导入耗时基准测试")
+    parser.add_argument(
+        "modules", nargs="*", default=DEFAULT_MODULES, help="要测量的模块"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块的导入次数")
+    parser.add_argument("--top", type=int, default=8, help="列出的最慢顶层包数")
+    parser.add_argument(
+        "--report",
+        default=str(PROJECT_ROOT / "tmp" / "import_bench.json"),
+        help="报告输出路径",
+    )
+    parser.add_argument("--baseline", default=None, help="用于对比的历史报告")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    report = {
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "modules": {m: measure(m, args.repeat, args.top) for m in args.modules},
+    }
+
+    path = Path(args.report)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"report written to {path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print("\n".join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""调度器吞吐基准测试
+
+注册大量合成的 interval 任务，源端使用进程内 SQLite 伪连接器，
+元数据库使用配置中的 MySQL。统计调度延迟、运行记录写入耗时与
+每次运行的元数据库查询数，并输出可对比的 JSON 报告。
+
+用法:
+    python -m backend.benchmarks.scheduler_bench --jobs 2000 --interval 5 \\
+        --duration 60 --report tmp/scheduler_bench.json \\
+        --baseline tmp/scheduler_bench_baseline.json
+"""
+
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
+
+from backend.config import PROJECT_ROOT
+from backend.database.session import create_tables, db_connection
+from backend.database.service.connector_service import ConnectorService
+from backend.database.service.scheduler_service import SchedulerService
+from backend.infra.connectors.base import DatabaseConnector
+from backend.scheduler import manager as manager_module
+from backend.scheduler.dispatcher import TriggerTicket
+from backend.scheduler.manager import SchedulerManager
+from backend.scheduler.rate_limit import RateLimiter
+
+
+logger = logging.getLogger("scheduler_bench")
+
+SOURCE_DB_URI = "file:scheduler_bench_source?mode=memory&cache=shared"
+SOURCE_TABLE = "bench_source"
+BENCH_SQL = f"SELECT id, value FROM {SOURCE_TABLE} WHERE id <= %(limit)s"
+
+# 越小越好的指标，对比基线时用于判断回退方向
+LOWER_IS_BETTER = (
+    "schedule_lag_ms",
+    "claim_txn_ms",
+    "flush_txn_ms",
+    "meta_queries_per_run",
+    "meta_txns_per_run",
+    "missed",
+)
+
+
+class SQLiteFakeConnector(DatabaseConnector):
+    """基于共享内存 SQLite 的伪连接器，模拟源端查询"""
+
+    _PARAM_PATTERN = re.compile(r"%\((\w+)\)s")
+
+    def __init__(self, latency_ms: float = 0.0, **kwargs: Any):
+        super().__init__(
+            kwargs.get("host", "bench"),
+            kwargs.get("port", 0),
+            kwargs.get("username", ""),
+            kwargs.get("password", ""),
+            kwargs.get("database", "bench"),
+        )
+        self.db_type = "sqlite"
+        self.latency = latency_ms / 1000
+
+    @classmethod
+    def seed(cls, rows: int):
+        """初始化源表，返回需保持打开的连接（共享内存库随最后一个连接释放）"""
+        keeper = sqlite3.connect(SOURCE_DB_URI, uri=True, check_same_thread=False)
+        keeper.execute(f"DROP TABLE IF EXISTS {SOURCE_TABLE}")
+        keeper.execute(f"CREATE TABLE {SOURCE_TABLE} (id INTEGER PRIMARY KEY, value TEXT)")
+        keeper.executemany(
+            f"INSERT INTO {SOURCE_TABLE} (id, value) VALUES (?, ?)",
+            [(i, f"value-{i}") for i in range(1, rows + 1)],
+        )
+        keeper.commit()
+        return keeper
+
+    def _translate(self, sql: str) -> str:
+        return self._PARAM_PATTERN.sub(r":\1", sql).replace("%s", "?")
+
+    @contextmanager
+    def get_connection(self):
+        connection = sqlite3.connect(SOURCE_DB_URI, uri=True)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def test_connection(self) -> bool:
+        return True
+
+    def get_tables(self) -> List[str]:
+        rows = self.execute_query(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        )
+        return [row["name"] for row in rows]
+
+    def get_table_structure(self, table_name: str) -> List[Dict[str, Any]]:
+        with self.get_connection() as connection:
+            rows = connection.execute(f"PRAGMA table_info({table_name})").fetchall()
+        return [
+            {
+                "field": row["name"],
+                "type": row["type"],
+                "null": "NO" if row["notnull"] else "YES",
+                "key": "PRI" if row["pk"] else "",
+                "default": row["dflt_value"],
+                "extra": "",
+            }
+            for row in rows
+        ]
+
+    def execute_query(
+        self, sql: str, params: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.get_connection() as connection:
+            rows = connection.execute(self._translate(sql), params or {}).fetchall()
+        return [dict(row) for row in rows]
+
+    def execute_query_iterator(
+        self, sql: str, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self.get_connection() as connection:
+            cursor = connection.execute(self._translate(sql), params or {})
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield [dict(row) for row in batch]
+
+    def execute_update(self, sql: str, params: Optional[Dict[str, Any]] = None) -> int:
+        with self.get_connection() as connection:
+            cursor = connection.execute(self._translate(sql), params or {})
+            connection.commit()
+            return cursor.rowcount
+
+    def get_table_data(
+        self, table_name: str, limit: int = 100, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        return self.execute_query(
+            f"SELECT * FROM {table_name} LIMIT {limit} OFFSET {offset}"
+        )
+
+    def get_table_data_iterator(
+        self, table_name: str, batch_size: int = 1000
+    ) -> Iterator[List[Dict[str, Any]]]:
+        return self.execute_query_iterator(
+            f"SELECT * FROM {table_name}", batch_size=batch_size
+        )
+
+    def get_table_count(self, table_name: str) -> int:
+        rows = self.execute_query(f"SELECT COUNT(*) AS count FROM {table_name}")
+        return rows[0]["count"] if rows else 0
+
+
+class CountingCursor:
+    """统计元数据库语句数的游标代理"""
+
+    def __init__(self, cursor, probe: "MetadataProbe"):
+        self._cursor = cursor
+        self._probe = probe
+
+    def execute(self, *args, **kwargs):
+        self._probe.count_query()
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        self._probe.count_query()
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class MetadataProbe:
+    """拦截 db_connection.get_cursor，按线程类型统计事务耗时与语句数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.transactions = 0
+        self.txn_ms: Dict[str, List[float]] = defaultdict(list)
+        self._original = None
+
+    def count_query(self):
+        with self._lock:
+            self.queries += 1
+
+    def install(self):
+        self._original = db_connection.get_cursor
+        original = self._original
+        probe = self
+
+        @contextmanager
+        def counting_get_cursor():
+            start = time.perf_counter()
+            with original() as cursor:
+                yield CountingCursor(cursor, probe)
+            elapsed = (time.perf_counter() - start) * 1000
+            kind = (
+                "flush"
+                if threading.current_thread().name == "run-recorder"
+                else "claim"
+            )
+            with probe._lock:
+                probe.transactions += 1
+                probe.txn_ms[kind].append(elapsed)
+
+        db_connection.get_cursor = counting_get_cursor
+
+    def uninstall(self):
+        if self._original is not None:
+            db_connection.get_cursor = self._original
+            self._original = None
+
+    def reset(self):
+        with self._lock:
+            self.queries = 0
+            self.transactions = 0
+            self.txn_ms = defaultdict(list)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class SchedulerBenchmark:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.prefix = f"bench_{int(time.time())}"
+        self.probe = MetadataProbe()
+        self.manager = SchedulerManager()
+        # 连接器限流会把吞吐压到令牌速率，基准测试测的是调度本身的开销
+        self.manager.connector_limiter = RateLimiter(0, 0)
+        self.lags_ms: List[float] = []
+        self.tickets: List[Tuple[TriggerTicket, float]] = []
+        self.firings = 0
+        self.missed = 0
+        self._lock = threading.Lock()
+        self._connector_id: Optional[int] = None
+        self._template_id: Optional[int] = None
+        self._job_ids: List[int] = []
+
+    # 准备与清理
+    def setup(self):
+        create_tables()
+        with db_connection.get_cursor() as cursor:
+            connector = ConnectorService(cursor).create_connector(
+                {
+                    "name": self.prefix,
+                    "db_type": "mysql",
+                    "host": "bench",
+                    "port": 0,
+                    "username": "bench",
+                    "password": "",
+                    "database": "bench",
+                    "description": "scheduler benchmark fake connector",
+                    "is_active": True,
+                }
+            )
+            self._connector_id = connector.id
+            service = SchedulerService(cursor)
+            template = service.create_template(
+                {
+                    "name": self.prefix,
+                    "description": "scheduler benchmark",
+                    "template_type": "db_query",
+                    "default_config": {
+                        "connector_id": connector.id,
+                        "sql": BENCH_SQL,
+                        "params": {"limit": self.args.rows_per_run},
+                    },
+                }
+            )
+            self._template_id = template.id
+            jobs = [
+                service.create_job(
+                    {
+                        "name": f"{self.prefix}_{i}",
+                        "template_id": template.id,
+                        "schedule_type": "interval",
+                        "interval_seconds": self.args.interval,
+                        "is_active": True,
+                    }
+                )
+                for i in range(self.args.jobs)
+            ]
+        self._job_ids = [job.id for job in jobs]
+        return jobs
+
+    def cleanup(self):
+        with db_connection.get_cursor() as cursor:
+            service = SchedulerService(cursor)
+            if self._template_id:
+                # 任务与运行记录随模板级联删除
+                service.delete_template(self._template_id)
+            if self._connector_id:
+                ConnectorService(cursor).delete_connector(self._connector_id)
+
+    # 事件统计
+    def _on_event(self, event):
+        if event.code == EVENT_JOB_MISSED:
+            with self._lock:
+                self.missed += 1
+            return
+        ticket = event.retval
+        if not isinstance(ticket, TriggerTicket) or not event.scheduled_run_time:
+            return
+        with self._lock:
+            self.tickets.append((ticket, event.scheduled_run_time.timestamp()))
+
+    def _collect_lags(self):
+        # 调度延迟 = 计划触发时间到分发器开始执行（含入队与排队等待）
+        for ticket, scheduled in self.tickets:
+            if ticket.started_at is not None:
+                self.firings += 1
+                self.lags_ms.append((ticket.started_at - scheduled) * 1000)
+
+    # 执行
+    def run(self) -> Dict[str, Any]:
+        keeper = SQLiteFakeConnector.seed(self.args.source_rows)
+        latency = self.args.query_latency_ms
+        original_factory = manager_module.get_connector_instance
+        manager_module.get_connector_instance = (
+            lambda **kwargs: SQLiteFakeConnector(latency_ms=latency, **kwargs)
+        )
+        try:
+            jobs = self.setup()
+            self.probe.install()
+            self.manager.scheduler.add_listener(
+                self._on_event, EVENT_JOB_EXECUTED | EVENT_JOB_MISSED
+            )
+            self.manager.start(sync_jobs=False)
+            register_start = time.perf_counter()
+            for job in jobs:
+                self.manager.sync_job(job, reload_dependencies=False)
+            register_s = time.perf_counter() - register_start
+            # 排除注册阶段的元数据库访问
+            self.probe.reset()
+
+            time.sleep(self.args.duration)
+            self.manager.shutdown()
+            self._collect_lags()
+            return self.report(register_s)
+        finally:
+            self.probe.uninstall()
+            manager_module.get_connector_instance = original_factory
+            if self.manager.started:
+                self.manager.shutdown()
+            try:
+                self.cleanup()
+            finally:
+                keeper.close()
+
+    def report(self, register_s: float) -> Dict[str, Any]:
+        runs = max(self.firings, 1)
+        return {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "params": {
+                "jobs": self.args.jobs,
+                "interval": self.args.interval,
+                "duration": self.args.duration,
+                "rows_per_run": self.args.rows_per_run,
+                "query_latency_ms": self.args.query_latency_ms,
+            },
+            "register_seconds": round(register_s, 3),
+            "firings": self.firings,
+            "firings_per_sec": round(self.firings / self.args.duration, 3),
+            "missed": self.missed,
+            "rejected": self.manager.dispatcher.stats()["rejected"],
+            "schedule_lag_ms": summarize(self.lags_ms),
+            "claim_txn_ms": summarize(self.probe.txn_ms["claim"]),
+            "flush_txn_ms": summarize(self.probe.txn_ms["flush"]),
+            "meta_queries_per_run": round(self.probe.queries / runs, 3),
+            "meta_txns_per_run": round(self.probe.transactions / runs, 3),
+        }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """生成与基线的对比行，数值型取 p95/自身值"""
+
+    def scalar(value: Any) -> Optional[float]:
+        if isinstance(value, dict):
+            return value.get("p95")
+        return value if isinstance(value, (int, float)) else None
+
+    lines = [f"{'metric':<24}{'baseline':>14}{'current':>14}{'delta':>10}"]
+    for key in (
+        "firings_per_sec",
+        "missed",
+        "schedule_lag_ms",
+        "claim_txn_ms",
+        "flush_txn_ms",
+        "meta_queries_per_run",
+        "meta_txns_per_run",
+    ):
+        old, new = scalar(baseline.get(key)), scalar(report.get(key))
+        if old is None or new is None:
+            continue
+        delta = (new - old) / old * 100 if old else 0.0
+        worse = delta > 0 if key in LOWER_IS_BETTER else delta < 0
+        flag = " !" if worse and abs(delta) >= 10 else ""
+        lines.append(f"{key:<24}{old:>14.3f}{new:>14.3f}{delta:>9.1f}%{flag}")
+    return lines
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="调度器吞吐基准测试")
+    parser.add_argument("--jobs", type=int, default=1000, help="合成任务数")
+    parser.add_argument("--interval", type=int, default=5, help="任务间隔秒数")
+    parser.add_argument("--duration", type=int, default=30, help="压测时长秒数")
+    parser.add_argument("--rows-per-run", type=int, default=100, help="每次查询行数")
+    parser.add_argument("--source-rows", type=int, default=10000, help="源表行数")
+    parser.add_argument(
+        "--query-latency-ms", type=float, default=0.0, help="模拟源端查询延迟"
+    )
+    parser.add_argument(
+        "--report",
+        default=str(PROJECT_ROOT / "tmp" / "scheduler_bench.json"),
+        help="报告输出路径",
+    )
+    parser.add_argument("--baseline", default=None, help="用于对比的历史报告")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    logging.basicConfig(level=logging.WARNING)
+    args = parse_args(argv)
+    report = SchedulerBenchmark(args).run()
+
+    path = Path(args.report)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"report written to {path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        print("\n".join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from starlette.concurrency import run_in_threadpool
+
+from backend.chat.history_cache import history_cache
+from backend.chat.schema_index import schema_index
+from backend.config import settings
+from backend.database.dao.chat_dao import ChatDAO
+from backend.database.model.chat import Conversation
+from backend.database.session import db_connection
+
+
+logger = logging.getLogger("chat_context")
+
+# 中日韩字符大致一字一 token，其余按 4 字符一 token 估算
+_CJK = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+# 每条消息的角色、分隔符等固定开销
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_INSTRUCTION = (
+    "请将以下对话内容与已有摘要合并为一份新的摘要，保留用户的目标、已确认的事实、"
+    "涉及的库表与字段、工具调用得到的关键结论和尚未解决的问题，省略寒暄与重复内容。"
+    "只输出摘要正文，不超过 {max_tokens} 个字。"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本 token 数
+
+    不调用模型的计数接口（需要网络往返），误差对窗口裁剪足够小。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def message_tokens(message: BaseMessage) -> int:
+    return estimate_tokens(str(message.content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """保留首尾，中间以省略标记替代"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    head = max_chars * 2 // 3
+    tail = max_chars - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n...[省略 {omitted} 字符]...\n{text[-tail:]}"
+
+
+def compact_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """工具结果在带入上下文前截断，原文仍完整保存在 messages 表"""
+    if row["role"] != "tool":
+        return row
+    max_chars = settings.chat.tool_result_max_chars
+    if len(row["content"]) <= max_chars:
+        return row
+    return {**row, "content": truncate_text(row["content"], max_chars)}
+
+
+def to_lc_messages(rows: List[Dict[str, Any]]) -> List[BaseMessage]:
+    lc_messages: List[BaseMessage] = []
+    for r in rows:
+        role = r["role"]
+        content = r["content"]
+        if role == "system":
+            lc_messages.append(SystemMessage(content=content))
+        elif role == "assistant":
+            # 只有工具调用、没有文本的助手消息不带入，调用结果由随后的工具消息体现
+            if r.get("tool_call") and not content:
+                continue
+            lc_messages.append(AIMessage(content=content))
+        elif role == "tool":
+            # 将工具结果作为系统信息供模型参考
+            lc_messages.append(
+                SystemMessage(content=f"TOOL_RESULT[{r.get('name')}] => {content}")
+            )
+        else:
+            lc_messages.append(HumanMessage(content=content))
+    return lc_messages
+
+
+def fit_window(messages: List[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """从最早的消息开始丢弃直至不超过 token 上限，至少保留最后一条"""
+    total = sum(message_tokens(m) for m in messages)
+    start = 0
+    while total > max_tokens and start < len(messages) - 1:
+        total -= message_tokens(messages[start])
+        start += 1
+    window = messages[start:]
+    # 窗口不以孤立的工具结果或助手回复开头
+    while len(window) > 1 and not isinstance(window[0], HumanMessage):
+        window = window[1:]
+    return window
+
+
+async def schema_context(question: str) -> Optional[SystemMessage]:
+    """按本轮用户问题检索相关表结构，在 token 上限内拼成系统消息
+
+    向量检索会调用远程接口，应在打开数据库事务之前调用。
+    """
+    cfg = settings.chat
+    if not cfg.schema_index_enabled or not question:
+        return None
+    try:
+        docs = await schema_index.asearch(question, cfg.schema_index_top_k)
+    except Exception as e:
+        logger.warning(f"search schema index failed: {e}")
+        return None
+    parts, used = [], 0
+    for doc in docs:
+        tokens = estimate_tokens(doc.text)
+        if used + tokens > cfg.schema_index_max_tokens:
+            break
+        parts.append(doc.text)
+        used += tokens
+    if not parts:
+        return None
+    return SystemMessage(content="可能相关的库表结构：\n" + "\n\n".join(parts))
+
+
+def build_context(
+    conversation: Optional[Conversation],
+    chat_dao: ChatDAO,
+    instruction: str,
+    schema: Optional[SystemMessage] = None,
+) -> List[BaseMessage]:
+    """本轮模型输入：系统说明 + 滚动摘要 + 相关表结构（schema_context 预先检索）+ 近期消息窗口
+
+    尚未并入摘要的消息最多比窗口多一批，一并带入（再受 token 上限约束），
+    避免消息在移出窗口与写入摘要之间的空档里丢失。
+    """
+    cfg = settings.chat
+    if not conversation:
+        return [SystemMessage(content=instruction)]
+    rows = history_cache.history(
+        chat_dao,
+        conversation.id,
+        conversation.version,
+        after_id=conversation.summary_upto,
+        limit=cfg.context_recent_messages + cfg.summary_batch_messages,
+    )
+    prefix: List[BaseMessage] = [SystemMessage(content=instruction)]
+    if conversation.summary:
+        prefix.append(
+            SystemMessage(content=f"之前对话的摘要：\n{conversation.summary}")
+        )
+    if schema is not None:
+        prefix.append(schema)
+    budget = cfg.context_max_tokens - sum(message_tokens(m) for m in prefix)
+    window = fit_window(to_lc_messages([compact_row(r) for r in rows]), budget)
+    return prefix + window
+
+
+def _format_for_summary(rows: List[Dict[str, Any]]) -> str:
+    lines = []
+    for r in map(compact_row, rows):
+        name = f"[{r['name']}]" if r.get("name") else ""
+        lines.append(f"{r['role']}{name}: {r['content']}")
+    return "\n".join(lines)
+
+
+def _pending_rows(conversation_id: int) -> Optional[Dict[str, Any]]:
+    """窗口之外、尚未并入摘要的最早一批消息"""
+    cfg = settings.chat
+    with db_connection.get_cursor() as cursor:
+        chat_dao = ChatDAO(cursor)
+        conversation = chat_dao.get_conversation(conversation_id)
+        if not conversation:
+            return None
+        window = history_cache.history(
+            chat_dao,
+            conversation_id,
+            conversation.version,
+            after_id=conversation.summary_upto,
+            limit=cfg.context_recent_messages,
+        )
+        if len(window) < cfg.context_recent_messages:
+            return None
+        rows = chat_dao.get_messages_between(
+            conversation_id,
+            conversation.summary_upto,
+            window[0]["id"],
+            cfg.summary_batch_messages,
+        )
+        if len(rows) < cfg.summary_batch_messages:
+            return None
+        return {
+            "summary": conversation.summary,
+            "summary_upto": conversation.summary_upto,
+            "rows": rows,
+        }
+
+
+def _save_summary(
+    conversation_id: int, summary: str, summary_upto: int, expected_upto: Optional[int]
+) -> bool:
+    with db_connection.get_cursor() as cursor:
+        return ChatDAO(cursor).update_summary(
+            conversation_id, summary, summary_upto, expected_upto
+        )
+
+
+async def summarize_if_needed(llm, conversation_id: int) -> bool:
+    """窗口外的消息攒够一批时合并进会话滚动摘要，应在回复用户之后调用"""
+    try:
+        pending = await run_in_threadpool(_pending_rows, conversation_id)
+        if not pending:
+            return False
+        cfg = settings.chat
+        prompt = [
+            SystemMessage(
+                content=SUMMARY_INSTRUCTION.format(max_tokens=cfg.summary_max_tokens)
+            ),
+            HumanMessage(
+                content=(
+                    f"已有摘要：\n{pending['summary'] or '（无）'}\n\n"
+                    f"新增对话：\n{_format_for_summary(pending['rows'])}"
+                )
+            ),
+        ]
+        response = await llm.ainvoke(prompt)
+        summary = str(getattr(response, "content", response)).strip()
+        if not summary:
+            return False
+        # 摘要本身也受上限约束，避免逐轮膨胀
+        summary = truncate_text(summary, cfg.summary_max_tokens * 2)
+        return await run_in_threadpool(
+            _save_summary,
+            conversation_id,
+            summary,
+            pending["rows"][-1]["id"],
+            pending["summary_upto"],
+        )
+    except Exception as e:
+        logger.warning(f"summarize conversation {conversation_id} failed: {e}")
+        return False
@@ -0,0 +1,159 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from backend.config import settings
+from backend.database.dao.chat_dao import ChatDAO
+
+
+logger = logging.getLogger("chat_history_cache")
+
+
+class _Entry:
+    def __init__(self, version: int, rows: List[Dict[str, Any]], complete: bool):
+        self.version = version
+        # 会话最近的消息（按 id 升序）；complete 表示包含了会话的全部消息
+        self.rows = rows
+        self.complete = complete
+
+
+class HistoryCache:
+    """会话消息历史缓存（LRU，线程安全）
+
+    以 conversations.version 判断新旧：读取时与会话行的版本比对，不一致即重新加载，
+    其他副本写入的消息因此能被发现而无需额外的通知通道。本进程写入的消息在保存后
+    直接追加，版本连续时无需回源。每个会话最多缓存 max_messages 条最近消息。
+    """
+
+    def __init__(self, max_conversations: int = 256, max_messages: int = 200):
+        self.max_conversations = max(max_conversations, 0)
+        self.max_messages = max(max_messages, 1)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, conversation_id: int, version: int) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(conversation_id)
+            self.hits += 1
+            return entry
+
+    def _put(self, conversation_id: int, entry: _Entry):
+        if self.max_conversations <= 0:
+            return
+        if len(entry.rows) > self.max_messages:
+            entry.rows = entry.rows[-self.max_messages:]
+            entry.complete = False
+        with self._lock:
+            self._entries[conversation_id] = entry
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_conversations:
+                self._entries.popitem(last=False)
+
+    def _load(self, chat_dao: ChatDAO, conversation_id: int, version: int) -> _Entry:
+        rows = chat_dao.list_recent_messages(conversation_id, self.max_messages + 1)
+        entry = _Entry(version, rows, complete=len(rows) <= self.max_messages)
+        self._put(conversation_id, entry)
+        return entry
+
+    def prime(self, conversation_id: int, version: int = 0):
+        """新建的会话没有消息，直接缓存空历史"""
+        self._put(conversation_id, _Entry(version, [], complete=True))
+
+    def history(
+        self,
+        chat_dao: ChatDAO,
+        conversation_id: int,
+        version: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """after_id 之后的消息（最多最近 limit 条），语义同 ChatDAO.get_message_history"""
+        entry = self._get(conversation_id, version) or self._load(
+            chat_dao, conversation_id, version
+        )
+        rows = [r for r in entry.rows if not after_id or r["id"] > after_id]
+        covered = (
+            entry.complete
+            or (after_id and entry.rows and entry.rows[0]["id"] <= after_id)
+            or (limit and len(rows) >= limit)
+        )
+        if not covered:
+            return chat_dao.get_message_history(conversation_id, after_id, limit)
+        return rows[-limit:] if limit else rows
+
+    def page(
+        self,
+        chat_dao: ChatDAO,
+        conversation_id: int,
+        version: int,
+        since_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """键集分页，语义同 ChatDAO.list_messages_page"""
+        entry = self._get(conversation_id, version) or self._load(
+            chat_dao, conversation_id, version
+        )
+        rows = [
+            r
+            for r in entry.rows
+            if (since_id is None or r["id"] > since_id)
+            and (before_id is None or r["id"] < before_id)
+        ]
+        if since_id is not None:
+            covered = entry.complete or (entry.rows and entry.rows[0]["id"] <= since_id)
+            page = rows[:limit]
+        else:
+            covered = entry.complete or len(rows) >= limit
+            page = rows[-limit:]
+        if not covered:
+            return chat_dao.list_messages_page(
+                conversation_id, since_id, before_id, limit
+            )
+        return page
+
+    def append(self, conversation_id: int, row: Dict[str, Any], version: int):
+        """本进程保存的消息在事务提交后追加
+
+        版本不连续说明期间有其他写入，丢弃缓存待下次回源。
+        """
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return
+            if entry.rows and entry.rows[-1]["id"] >= row["id"]:
+                # 同一事务内加载历史时已包含该消息
+                if entry.version != version:
+                    del self._entries[conversation_id]
+                return
+            if entry.version != version - 1:
+                del self._entries[conversation_id]
+                return
+            entry.rows.append(row)
+            entry.version = version
+            if len(entry.rows) > self.max_messages:
+                del entry.rows[0]
+                entry.complete = False
+
+    def invalidate(self, conversation_id: Optional[int] = None):
+        with self._lock:
+            if conversation_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(conversation_id, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+history_cache = HistoryCache(
+    max_conversations=settings.chat.history_cache_conversations,
+    max_messages=settings.chat.history_cache_messages,
+)
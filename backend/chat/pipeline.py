@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain.schema import BaseMessage, SystemMessage
+from langchain_core.messages import ToolMessage
+from starlette.concurrency import run_in_threadpool
+
+from backend.chat.context import build_context, schema_context, truncate_text
+from backend.chat.store import save_assistant_message, save_messages
+from backend.chat.tools import tool_registry
+from backend.config import settings
+from backend.database.dao.chat_dao import ChatDAO
+from backend.database.session import db_connection
+from backend.infra.llm.response_cache import create_response_cache
+
+
+logger = logging.getLogger("chat_pipeline")
+
+# 注入的工具使用说明，工具定义通过 bind_tools 以原生 function calling 传给模型
+TOOL_INSTRUCTION = (
+    "你是数据分析助手，可以调用工具查看已注册连接器的库表结构并执行只读查询。"
+    "需要多项互不依赖的信息时，请在同一步中同时发起多个工具调用；"
+    "工具返回 error 时根据错误修正参数后重试；若不需要工具，则直接自然语言回答。"
+)
+# 达到步数上限仍在请求工具时的回复
+STEP_LIMIT_REPLY = "本轮工具调用已达到 {steps} 步上限，请缩小问题范围或拆分后再问。"
+
+response_cache = create_response_cache(settings.chat, settings.llm.api_key)
+
+
+def chat_model(llm, response_cache_enabled: bool = True, tools: bool = True):
+    """绑定工具定义；会话未关闭回复缓存时，在模型前加一层缓存"""
+    model = llm.bind_tools(tool_registry.function_specs()) if tools else llm
+    if response_cache_enabled and response_cache.enabled:
+        return response_cache.wrap(model)
+    return model
+
+
+def tool_calls_of(message: Any) -> List[Dict[str, Any]]:
+    """模型本步请求的工具调用，缺少 id 时补上以便与工具结果对应"""
+    calls = []
+    for call in getattr(message, "tool_calls", None) or []:
+        call["id"] = call.get("id") or f"call_{uuid.uuid4().hex[:12]}"
+        calls.append(
+            {"id": call["id"], "name": call["name"], "arguments": call.get("args") or {}}
+        )
+    return calls
+
+
+def run_tool(tool_call: Dict[str, Any]) -> Any:
+    return tool_registry.run(tool_call["name"], tool_call["arguments"])
+
+
+async def run_tool_calls(tool_calls: List[Dict[str, Any]]) -> List[Any]:
+    """同一步的多个工具调用在线程池并发执行，结果按调用顺序返回"""
+    limit = asyncio.Semaphore(max(settings.chat.agent_max_parallel_tools, 1))
+
+    async def run(tool_call: Dict[str, Any]) -> Any:
+        async with limit:
+            return await run_in_threadpool(run_tool, tool_call)
+
+    return list(await asyncio.gather(*(run(call) for call in tool_calls)))
+
+
+def dump_result(result: Any) -> str:
+    return json.dumps(result, ensure_ascii=False, default=str)
+
+
+def tool_messages(
+    tool_calls: List[Dict[str, Any]], results: List[Any]
+) -> List[ToolMessage]:
+    """工具结果按调用 id 回传给模型，过长的结果截断"""
+    max_chars = settings.chat.tool_result_max_chars
+    return [
+        ToolMessage(
+            content=truncate_text(dump_result(result), max_chars),
+            tool_call_id=call["id"],
+            name=call["name"],
+        )
+        for call, result in zip(tool_calls, results)
+    ]
+
+
+def content_text(message: Any) -> str:
+    """模型返回（整条或流式分片）中的文本"""
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        # 部分模型按片段列表返回内容
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return content if isinstance(content, str) else str(content)
+
+
+def begin_turn(
+    conversation_id: Optional[int],
+    content: str,
+    schema: Optional[SystemMessage] = None,
+) -> Tuple[int, Dict[str, Any], List[BaseMessage], bool]:
+    """必要时新建会话，保存用户消息并加载历史
+
+    返回 (会话ID, 用户消息, 历史, 是否使用回复缓存)。
+    """
+    conversation_id, rows = save_messages(
+        conversation_id, [{"role": "user", "content": content}]
+    )
+    with db_connection.get_cursor() as cursor:
+        chat_dao = ChatDAO(cursor)
+        conversation = chat_dao.get_conversation(conversation_id)
+        history = build_context(conversation, chat_dao, TOOL_INSTRUCTION, schema)
+    use_cache = conversation.response_cache if conversation else True
+    return conversation_id, rows[0], history, use_cache
+
+
+async def start_turn(
+    conversation_id: Optional[int], content: str
+) -> Tuple[int, Dict[str, Any], List[BaseMessage], bool]:
+    """先异步检索相关表结构，再在线程池中以短事务执行 begin_turn，检索期间不持有连接"""
+    schema = await schema_context(content)
+    return await run_in_threadpool(begin_turn, conversation_id, content, schema)
+
+
+def record_tool_exchange(
+    conversation_id: int,
+    assistant_text: str,
+    tool_calls: List[Dict[str, Any]],
+    results: List[Any],
+) -> List[Dict[str, Any]]:
+    """保存一步的工具调用（每个调用一条助手消息，文本记在第一条）与对应结果"""
+    messages = [
+        {
+            "role": "assistant",
+            "content": assistant_text if i == 0 else "",
+            "name": call["name"],
+            "tool_call": call,
+        }
+        for i, call in enumerate(tool_calls)
+    ]
+    messages += [
+        {"role": "tool", "content": dump_result(result), "name": call["name"]}
+        for call, result in zip(tool_calls, results)
+    ]
+    _, rows = save_messages(conversation_id, messages)
+    return rows
+
+
+async def chat_turn(llm, conversation_id: Optional[int], content: str) -> Dict[str, Any]:
+    """一轮非流式对话
+
+    模型调用使用 ainvoke，不占用线程；数据库操作拆成模型调用前后的短事务并在线程池执行，
+    生成期间不持有连接与事务。每步模型可同时请求多个工具，并发执行后把结果交回模型，
+    最多 agent_max_steps 步。滚动摘要不在本函数内更新，由调用方在响应后执行
+    summarize_if_needed。
+    """
+    conversation_id, user_row, history, use_cache = await start_turn(
+        conversation_id, content
+    )
+    model = chat_model(llm, use_cache)
+    turn_rows = [user_row]
+    executed: List[Dict[str, Any]] = []
+    max_steps = max(settings.chat.agent_max_steps, 1)
+
+    for step in range(max_steps):
+        response = await model.ainvoke(history)
+        assistant_text = content_text(response)
+        tool_calls = tool_calls_of(response)
+        if not tool_calls:
+            break
+        if step == max_steps - 1:
+            notice = STEP_LIMIT_REPLY.format(steps=max_steps)
+            assistant_text = f"{assistant_text}\n{notice}" if assistant_text else notice
+            break
+        results = await run_tool_calls(tool_calls)
+        # 把工具调用和结果作为消息写入历史
+        turn_rows.extend(
+            await run_in_threadpool(
+                record_tool_exchange, conversation_id, assistant_text, tool_calls, results
+            )
+        )
+        executed.extend(
+            {**call, "result": result} for call, result in zip(tool_calls, results)
+        )
+        history = history + [response] + tool_messages(tool_calls, results)
+
+    # 保存最终助手消息
+    turn_rows.append(
+        await run_in_threadpool(save_assistant_message, conversation_id, assistant_text)
+    )
+    return {
+        "conversation_id": conversation_id,
+        "assistant_message": assistant_text,
+        "tool_calls": executed,
+        # 只返回本轮新增的消息，完整历史通过 /conversations/{id}/messages 分页获取
+        "messages": turn_rows,
+    }
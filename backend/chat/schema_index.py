@@ -0,0 +1,344 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时只使用 BM25
+    np = None
+
+from backend.config import settings
+from backend.database.dao.connector_dao import ConnectorDAO
+from backend.database.dao.knowledge_dao import KnowledgeDAO
+from backend.database.model.connector import ConnectorModel
+from backend.database.session import db_connection
+from backend.infra.connectors import get_connector_instance
+from backend.infra.llm.embeddings import LazyEmbeddings, create_embeddings
+
+
+logger = logging.getLogger("schema_index")
+
+_WORD = re.compile(r"[A-Za-z0-9_]+|[㐀-䶿一-鿿]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_CJK = re.compile(r"[㐀-䶿一-鿿]")
+# 单表带入的列数上限，超宽表只保留前若干列
+MAX_COLUMNS_PER_TABLE = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """英文按单词（下划线、驼峰再拆分），中文按单字与相邻二字切分"""
+    tokens: List[str] = []
+    for word in _WORD.findall(text or ""):
+        if _CJK.match(word):
+            tokens.extend(word)
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+            continue
+        lower = word.lower()
+        tokens.append(lower)
+        parts = [p.lower() for p in re.split(r"_+", _CAMEL.sub("_", word)) if p]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """可增量增删文档的 BM25 倒排索引"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._terms: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, key: str, tokens: List[str]):
+        self.remove(key)
+        terms = Counter(tokens)
+        self._terms[key] = terms
+        self._lengths[key] = len(tokens)
+        self._total_length += len(tokens)
+        for term, tf in terms.items():
+            self._postings[term][key] = tf
+
+    def remove(self, key: str):
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(key)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self._postings[term]
+
+    def search(self, tokens: List[str], limit: int) -> List[Tuple[str, float]]:
+        n = len(self._terms)
+        if not n or not tokens:
+            return []
+        avg_length = self._total_length / n
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokens):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for key, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / avg_length)
+                scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+@dataclass
+class SchemaDoc:
+    """检索单元：一张表（含列与知识标注）或一个库的知识标注"""
+
+    key: str
+    connector_id: int
+    text: str
+    signature: str
+
+
+def _knowledge_by_target(items) -> Dict[str, List[str]]:
+    notes: Dict[str, List[str]] = defaultdict(list)
+    for item in items:
+        if item.content:
+            notes[item.target_name].append(item.content.strip())
+    return notes
+
+
+def build_docs(
+    connector: ConnectorModel,
+    schema: Dict[str, Dict[str, Any]],
+    notes: Dict[str, List[str]],
+) -> List[SchemaDoc]:
+    """按 connector::db::table 组织表文档，知识标注按 target_name 并入对应表与列"""
+    prefix = f"{connector.name}::{connector.database_name}"
+    docs = []
+    db_notes = notes.get(prefix)
+    if db_notes:
+        docs.append(_doc(prefix, connector.id, f"库 {prefix}\n说明：{'；'.join(db_notes)}"))
+    for table, meta in sorted(schema.items()):
+        key = f"{prefix}::{table}"
+        header = f"表 {key}"
+        if meta.get("comment"):
+            header += f"（{meta['comment']}）"
+        lines = [header]
+        if notes.get(key):
+            lines.append(f"说明：{'；'.join(notes[key])}")
+        columns = meta.get("columns") or []
+        for column in columns[:MAX_COLUMNS_PER_TABLE]:
+            line = f"- {column['field']} {column['type']}"
+            described = [column.get("comment")] + notes.get(f"{key}::{column['field']}", [])
+            described = [d for d in described if d]
+            if described:
+                line += f" {'；'.join(described)}"
+            lines.append(line)
+        if len(columns) > MAX_COLUMNS_PER_TABLE:
+            lines.append(f"- ...（共 {len(columns)} 列）")
+        docs.append(_doc(key, connector.id, "\n".join(lines)))
+    return docs
+
+
+def _doc(key: str, connector_id: int, text: str) -> SchemaDoc:
+    signature = hashlib.md5(text.encode("utf-8")).hexdigest()
+    return SchemaDoc(key, connector_id, text, signature)
+
+
+class SchemaIndex:
+    """连接器元数据与知识标注的检索索引
+
+    后台线程构建与刷新，检索只读内存、不阻塞请求：
+    - 每个连接器一次 get_schema 读取全部表与列，知识标注一次全量读取；
+    - 文档按内容签名增量更新，未变化的表不重新切词或计算向量；
+    - 连接器、知识标注变更时显式失效，另按 refresh_seconds 周期刷新以发现表结构变更。
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: int = 600,
+        embeddings: Optional[LazyEmbeddings] = None,
+        semantic_weight: float = 0.5,
+    ):
+        self.refresh_seconds = refresh_seconds
+        if embeddings is not None and np is None:
+            logger.warning("numpy 未安装，元数据检索仅使用 BM25")
+            embeddings = None
+        self.embeddings = embeddings
+        self.semantic_weight = semantic_weight
+        self._lock = threading.Lock()
+        self._docs: Dict[str, SchemaDoc] = {}
+        self._bm25 = BM25Index()
+        self._vectors: Dict[str, Any] = {}
+        # connector_id -> (连接器, 表结构)，知识标注变更时复用，无需重新读取源库
+        self._schemas: Dict[int, Tuple[ConnectorModel, Dict[str, Dict[str, Any]]]] = {}
+        self._refreshed_at = 0.0
+        self._dirty_connectors: Set[int] = set()
+        self._knowledge_dirty = False
+        self._refreshing = False
+
+    def invalidate_connector(self, connector_id: int):
+        with self._lock:
+            self._dirty_connectors.add(connector_id)
+
+    def invalidate_knowledge(self):
+        with self._lock:
+            self._knowledge_dirty = True
+
+    def maybe_refresh(self):
+        """需要刷新时在后台线程执行，同一时刻只有一个刷新"""
+        with self._lock:
+            stale = time.monotonic() - self._refreshed_at >= self.refresh_seconds
+            if self._refreshing or not (
+                stale or self._dirty_connectors or self._knowledge_dirty
+            ):
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_safely, name="schema-index", daemon=True).start()
+
+    def _refresh_safely(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"refresh schema index failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh(self):
+        with self._lock:
+            full = time.monotonic() - self._refreshed_at >= self.refresh_seconds
+            dirty = set(self._dirty_connectors)
+            self._dirty_connectors.clear()
+            self._knowledge_dirty = False
+        with db_connection.get_cursor() as cursor:
+            connectors = ConnectorDAO(cursor).get_active()
+            notes = _knowledge_by_target(KnowledgeDAO(cursor).list_all())
+
+        schemas: Dict[int, Tuple[ConnectorModel, Dict[str, Dict[str, Any]]]] = {}
+        for connector in connectors:
+            cached = self._schemas.get(connector.id)
+            if cached and not full and connector.id not in dirty:
+                schemas[connector.id] = (connector, cached[1])
+                continue
+            try:
+                schemas[connector.id] = (connector, self._load_schema(connector))
+            except Exception as e:
+                logger.warning(f"load schema of connector {connector.id} failed: {e}")
+                if cached:
+                    schemas[connector.id] = (connector, cached[1])
+
+        docs: Dict[str, SchemaDoc] = {}
+        for connector, schema in schemas.values():
+            for doc in build_docs(connector, schema, notes):
+                docs[doc.key] = doc
+        changed = [
+            doc
+            for key, doc in docs.items()
+            if key not in self._docs or self._docs[key].signature != doc.signature
+        ]
+        vectors = self._embed(changed)
+        with self._lock:
+            for key in set(self._docs) - set(docs):
+                self._bm25.remove(key)
+                self._vectors.pop(key, None)
+            for doc in changed:
+                self._bm25.add(doc.key, tokenize(doc.text))
+                if doc.key in vectors:
+                    self._vectors[doc.key] = vectors[doc.key]
+                else:
+                    self._vectors.pop(doc.key, None)
+            self._docs = docs
+            self._schemas = schemas
+            if full:
+                self._refreshed_at = time.monotonic()
+        logger.info(
+            f"schema index refreshed: {len(docs)} docs, {len(changed)} updated"
+        )
+
+    def _load_schema(self, connector: ConnectorModel) -> Dict[str, Dict[str, Any]]:
+        instance = get_connector_instance(
+            db_type=connector.db_type,
+            host=connector.host,
+            port=connector.port,
+            username=connector.username,
+            password=connector.password,
+            database=connector.database_name,
+        )
+        return instance.get_schema()
+
+    def _embed(self, docs: List[SchemaDoc]) -> Dict[str, Any]:
+        if self.embeddings is None or not docs:
+            return {}
+        try:
+            vectors = self.embeddings.embed_documents([doc.text for doc in docs])
+        except Exception as e:
+            logger.warning(f"embed schema docs failed: {e}")
+            return {}
+        return {doc.key: _normalize(vector) for doc, vector in zip(docs, vectors)}
+
+    async def asearch(self, query: str, top_k: int) -> List[SchemaDoc]:
+        """检索与问题最相关的 top_k 个文档；索引尚未构建时返回空列表
+
+        开启向量检索时问题向量经 aembed_query 异步计算，不占用请求线程。
+        """
+        self.maybe_refresh()
+        query_vector = None
+        if self.embeddings is not None and self._vectors:
+            try:
+                query_vector = _normalize(await self.embeddings.aembed_query(query))
+            except Exception as e:
+                logger.warning(f"embed query failed: {e}")
+        return self.search(query, top_k, query_vector)
+
+    def search(self, query: str, top_k: int, query_vector=None) -> List[SchemaDoc]:
+        """只读内存索引：BM25 排序，给出问题向量时再与余弦相似度加权"""
+        tokens = tokenize(query)
+        with self._lock:
+            ranked = self._bm25.search(tokens, max(top_k * 4, top_k))
+            if query_vector is not None:
+                ranked = self._blend(ranked, query_vector)
+            return [self._docs[key] for key, score in ranked[:top_k] if score > 0]
+
+    def _blend(self, ranked: List[Tuple[str, float]], query_vector) -> List[Tuple[str, float]]:
+        """BM25 归一化后与余弦相似度加权，向量召回可补充字面不匹配的表"""
+        top = ranked[0][1] if ranked else 0.0
+        scores = {key: (1 - self.semantic_weight) * score / top for key, score in ranked}
+        for key, vector in self._vectors.items():
+            similarity = max(float(vector @ query_vector), 0.0)
+            scores[key] = scores.get(key, 0.0) + self.semantic_weight * similarity
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "docs": len(self._docs),
+            "connectors": len(self._schemas),
+            "vectors": len(self._vectors),
+        }
+
+
+def _normalize(vector):
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else array
+
+
+schema_index = SchemaIndex(
+    refresh_seconds=settings.chat.schema_index_refresh_seconds,
+    embeddings=(
+        create_embeddings(settings.chat.embedding_model, settings.llm.api_key)
+        if settings.chat.schema_index_semantic
+        else None
+    ),
+    semantic_weight=settings.chat.schema_index_semantic_weight,
+)
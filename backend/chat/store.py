@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.chat.history_cache import history_cache
+from backend.database.dao.chat_dao import ChatDAO
+from backend.database.session import db_connection
+
+
+_tables_ready = False
+
+
+def ensure_chat_tables(chat_dao: ChatDAO):
+    """建表只在进程内第一次成功后跳过"""
+    global _tables_ready
+    if not _tables_ready:
+        chat_dao.ensure_tables()
+        _tables_ready = True
+
+
+# 以下函数各自使用短事务，供对话流程在模型调用前后分别调用。
+# 写入与读取历史分属不同事务：消息提交后才追加进历史缓存，随后的读取直接命中缓存
+def save_messages(
+    conversation_id: Optional[int], messages: List[Dict[str, Any]]
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """保存若干条消息（会话不存在时先新建），返回 (会话ID, 保存的消息行)"""
+    saved = []
+    created = False
+    with db_connection.get_cursor() as cursor:
+        chat_dao = ChatDAO(cursor)
+        ensure_chat_tables(chat_dao)
+        if not conversation_id:
+            conversation_id = chat_dao.create_conversation().id
+            created = True
+        for message in messages:
+            message_id = chat_dao.save_message(conversation_id, **message)
+            saved.append(chat_dao.get_message_with_version(message_id))
+    if created:
+        history_cache.prime(conversation_id)
+    for row, version in saved:
+        history_cache.append(conversation_id, row, version)
+    return conversation_id, [row for row, _ in saved]
+
+
+def save_assistant_message(conversation_id: int, text: str) -> Dict[str, Any]:
+    _, rows = save_messages(conversation_id, [{"role": "assistant", "content": text}])
+    return rows[0]
+
+
+def list_messages_page(
+    chat_dao: ChatDAO,
+    conversation_id: int,
+    since_id: Optional[int] = None,
+    before_id: Optional[int] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """键集分页获取会话消息，优先由历史缓存提供"""
+    conversation = chat_dao.get_conversation(conversation_id)
+    if not conversation:
+        return []
+    return history_cache.page(
+        chat_dao, conversation_id, conversation.version, since_id, before_id, limit
+    )
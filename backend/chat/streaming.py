@@ -0,0 +1,131 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import anyio
+from starlette.background import BackgroundTasks
+from starlette.concurrency import run_in_threadpool
+
+from backend.chat.context import summarize_if_needed
+from backend.chat.pipeline import (
+    STEP_LIMIT_REPLY,
+    chat_model,
+    content_text,
+    record_tool_exchange,
+    run_tool_calls,
+    start_turn,
+    tool_calls_of,
+    tool_messages,
+)
+from backend.chat.store import save_assistant_message
+from backend.config import settings
+
+
+logger = logging.getLogger("chat_streaming")
+
+
+def sse_event(event: str, data: Any) -> str:
+    """编码一条 server-sent event"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class _Step:
+    """一步模型输出：文本分片即时下发，工具调用分片累加到 message，结束后再解析"""
+
+    def __init__(self):
+        self.text = ""
+        self.message: Any = None
+
+    def feed(self, chunk: Any) -> str:
+        """累加分片，返回需要下发的文本"""
+        delta = content_text(chunk)
+        self.text += delta
+        self.message = chunk if self.message is None else self.message + chunk
+        return delta
+
+
+async def stream_chat(
+    llm, conversation_id: Optional[int], content: str, background: BackgroundTasks
+) -> AsyncIterator[str]:
+    """流式对话
+
+    依次下发 start、token*、[tool_call*、tool_result*、token*]*、done 事件，出错时下发 error。
+    每步模型可同时请求多个工具，并发执行后把结果交回模型，最多 agent_max_steps 步。
+    数据库操作均为短事务并放到线程池执行，不在模型生成期间占用连接；
+    客户端中途断开时已生成的部分回答仍会保存。
+    滚动摘要加入 background（作为 StreamingResponse 的 background 传入），
+    在响应结束、连接关闭后执行，其失败不会出现在事件流中。
+    """
+    step: Optional[_Step] = None
+    saved = False
+    try:
+        conversation_id, user_row, history, use_cache = await start_turn(
+            conversation_id, content
+        )
+        model = chat_model(llm, use_cache)
+        yield sse_event(
+            "start", {"conversation_id": conversation_id, "message_id": user_row["id"]}
+        )
+
+        executed: List[Dict[str, Any]] = []
+        max_steps = max(settings.chat.agent_max_steps, 1)
+        for index in range(max_steps):
+            step = _Step()
+            async for chunk in model.astream(history):
+                delta = step.feed(chunk)
+                if delta:
+                    yield sse_event("token", {"delta": delta})
+            tool_calls = tool_calls_of(step.message)
+            if not tool_calls:
+                break
+            if index == max_steps - 1:
+                notice = STEP_LIMIT_REPLY.format(steps=max_steps)
+                delta = f"\n{notice}" if step.text else notice
+                step.text += delta
+                yield sse_event("token", {"delta": delta})
+                break
+            for call in tool_calls:
+                yield sse_event("tool_call", call)
+            results = await run_tool_calls(tool_calls)
+            for call, result in zip(tool_calls, results):
+                yield sse_event(
+                    "tool_result", {"id": call["id"], "name": call["name"], "result": result}
+                )
+            await run_in_threadpool(
+                record_tool_exchange, conversation_id, step.text, tool_calls, results
+            )
+            executed.extend(
+                {**call, "result": result} for call, result in zip(tool_calls, results)
+            )
+            history = history + [step.message] + tool_messages(tool_calls, results)
+            step = None
+
+        assistant_row = await run_in_threadpool(
+            save_assistant_message, conversation_id, step.text
+        )
+        saved = True
+        yield sse_event(
+            "done",
+            {
+                "conversation_id": conversation_id,
+                "message_id": assistant_row["id"],
+                "assistant_message": step.text,
+                "tool_calls": executed,
+            },
+        )
+        background.add_task(summarize_if_needed, llm, conversation_id)
+    except Exception as e:
+        logger.exception(f"stream chat error: {e}")
+        yield sse_event("error", {"detail": str(e)})
+    finally:
+        # 客户端断开或生成中途失败时，保存当前步已下发的部分回答
+        if not saved and step is not None and step.text:
+            try:
+                # 断开时生成器所在任务已被取消，需屏蔽取消才能完成写入
+                with anyio.CancelScope(shield=True):
+                    await run_in_threadpool(
+                        save_assistant_message, conversation_id, step.text
+                    )
+            except Exception as e:
+                logger.error(f"save partial answer failed: {e}")
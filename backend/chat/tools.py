@@ -0,0 +1,305 @@
+import datetime
+import decimal
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.config import settings
+from backend.database.dao.connector_dao import ConnectorDAO
+from backend.database.session import db_connection
+from backend.infra.connectors import get_connector_instance
+from backend.infra.connectors.base import DatabaseConnector
+
+
+logger = logging.getLogger("chat_tools")
+
+_READ_ONLY = re.compile(r"^(select|with|show|desc|describe|explain)\b", re.IGNORECASE)
+_LIMITABLE = re.compile(r"^(select|with)\b", re.IGNORECASE)
+# MySQL 8 的 EXPLAIN ANALYZE 会真正执行被解释的语句（包括 UPDATE/DELETE）
+_ANALYZE = re.compile(r"^(explain|desc|describe)\b.*\banalyze\b", re.IGNORECASE | re.DOTALL)
+# 只读前缀下仍会写文件、写变量或加锁的子句；Doris 不支持只读事务，这是它唯一的防线
+_WRITE_CLAUSE = re.compile(
+    r"\binto\s+(outfile|dumpfile|@)|\bfor\s+(update|share)\b|\block\s+in\s+share\s+mode\b",
+    re.IGNORECASE,
+)
+# MySQL 8 支持 WITH ... UPDATE/DELETE
+_WITH_WRITE = re.compile(
+    r"^with\b.*\b(insert|update|delete|replace)\b", re.IGNORECASE | re.DOTALL
+)
+# 分批读取结果的批大小
+FETCH_BATCH_SIZE = 200
+# 单个值带入工具结果的最大字符数
+MAX_VALUE_CHARS = 200
+# list_tables 最多返回的表名数
+MAX_TABLE_NAMES = 300
+
+
+@dataclass
+class Tool:
+    name: str
+    description: str
+    # 参数的 JSON Schema
+    schema: Dict[str, Any]
+    fn: Callable[[Dict[str, Any]], Any]
+
+
+class ToolRegistry:
+    """对话可用的工具，进程启动时注册一次"""
+
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+
+    def register(self, tool: Tool) -> Tool:
+        self._tools[tool.name] = tool
+        return tool
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def specs(self) -> List[Dict[str, Any]]:
+        return [
+            {"name": t.name, "description": t.description, "schema": t.schema}
+            for t in self._tools.values()
+        ]
+
+    def function_specs(self) -> List[Dict[str, Any]]:
+        """供 bind_tools 使用的函数定义"""
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": t.name,
+                    "description": t.description,
+                    "parameters": t.schema,
+                },
+            }
+            for t in self._tools.values()
+        ]
+
+    def run(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """执行工具；参数错误、SQL 报错等以 {"error": ...} 返回给模型，便于其修正后重试"""
+        tool = self._tools.get(name)
+        if tool is None:
+            return {"error": f"未知工具: {name}"}
+        try:
+            return tool.fn(arguments or {})
+        except Exception as e:
+            logger.warning(f"tool {name} failed: {e}")
+            return {"error": str(e)}
+
+
+def _connector(name: Optional[str]) -> DatabaseConnector:
+    if not name:
+        raise ValueError("缺少参数 connector")
+    with db_connection.get_cursor() as cursor:
+        connector = ConnectorDAO(cursor).get_by_name(name)
+    if not connector or not connector.is_active:
+        raise ValueError(f"连接器不存在或未激活: {name}")
+    return get_connector_instance(
+        db_type=connector.db_type,
+        host=connector.host,
+        port=connector.port,
+        username=connector.username,
+        password=connector.password,
+        database=connector.database_name,
+    )
+
+
+def compact_value(value: Any) -> Any:
+    """查询结果中的值转为可 JSON 序列化的紧凑形式"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    text = str(value)
+    if len(text) > MAX_VALUE_CHARS:
+        return text[:MAX_VALUE_CHARS] + "..."
+    return text
+
+
+def _row_bytes(row: Dict[str, Any]) -> int:
+    """粗略估算一行的数据量：字符串/二进制按长度，其它值按 8 字节计"""
+    total = 0
+    for value in row.values():
+        if isinstance(value, (str, bytes, bytearray)):
+            total += len(value)
+        elif value is not None:
+            total += 8
+    return total
+
+
+def read_only_sql(sql: Optional[str]) -> str:
+    """只接受单条只读语句，返回去掉末尾分号的 SQL"""
+    sql = (sql or "").strip().rstrip(";").strip()
+    if not sql:
+        raise ValueError("缺少参数 sql")
+    if ";" in sql:
+        raise ValueError("只允许执行单条语句")
+    if not _READ_ONLY.match(sql):
+        raise ValueError("只允许只读查询（SELECT/WITH/SHOW/DESCRIBE/EXPLAIN）")
+    if _ANALYZE.match(sql):
+        raise ValueError("不允许 EXPLAIN ANALYZE，它会实际执行语句")
+    if _WRITE_CLAUSE.search(sql) or _WITH_WRITE.match(sql):
+        raise ValueError("不允许 INTO OUTFILE/DUMPFILE/@变量、FOR UPDATE/SHARE 等写入或加锁子句")
+    return sql
+
+
+def list_tables(args: Dict[str, Any]) -> Dict[str, Any]:
+    if not args.get("connector"):
+        with db_connection.get_cursor() as cursor:
+            connectors = ConnectorDAO(cursor).get_active()
+        return {
+            "connectors": [
+                {
+                    "name": c.name,
+                    "db_type": c.db_type,
+                    "database": c.database_name,
+                    "description": c.description,
+                }
+                for c in connectors
+            ]
+        }
+    tables = _connector(args["connector"]).get_tables()
+    return {
+        "tables": tables[:MAX_TABLE_NAMES],
+        "count": len(tables),
+        "truncated": len(tables) > MAX_TABLE_NAMES,
+    }
+
+
+def describe_table(args: Dict[str, Any]) -> Dict[str, Any]:
+    connector = _connector(args.get("connector"))
+    schema, table = connector.split_table_name(args.get("table") or "")
+    columns = connector.get_table_structure(f"`{schema}`.`{table}`")
+    return {
+        "table": f"{schema}.{table}",
+        "columns": [
+            {
+                "field": c["field"],
+                "type": c["type"],
+                **({"key": c["key"]} if c.get("key") else {}),
+                **({"nullable": False} if c.get("null") == "NO" else {}),
+            }
+            for c in columns
+        ],
+    }
+
+
+def run_sql(args: Dict[str, Any]) -> Dict[str, Any]:
+    """执行只读查询，按行数、数据量与时间预算分批读取，返回列式的样例行
+
+    语句在只读事务中执行（关键字校验之外的第二道防线）；SELECT/WITH 加上
+    LIMIT（多取一行用于判断截断）并附带数据库的执行超时提示；
+    读取过程中任一预算耗尽即停止，truncated 标明原因（rows/bytes/timeout）。
+    """
+    cfg = settings.chat
+    sql = read_only_sql(args.get("sql"))
+    connector = _connector(args.get("connector"))
+    if _LIMITABLE.match(sql):
+        sql = connector.limit_query(
+            sql, cfg.tool_sql_max_rows + 1, cfg.tool_sql_timeout_seconds
+        )
+    start = time.monotonic()
+    deadline = start + cfg.tool_sql_timeout_seconds
+    names: List[str] = []
+    sample: List[Dict[str, Any]] = []
+    row_count = 0
+    read_bytes = 0
+    truncated = None
+    batches = connector.execute_query_iterator(
+        sql, batch_size=FETCH_BATCH_SIZE, read_only=True
+    )
+    try:
+        for batch in batches:
+            if not names and batch:
+                names = list(batch[0].keys())
+            for row in batch:
+                if row_count >= cfg.tool_sql_max_rows:
+                    truncated = "rows"
+                    break
+                size = _row_bytes(row)
+                if read_bytes + size > cfg.tool_sql_max_bytes:
+                    truncated = "bytes"
+                    break
+                row_count += 1
+                read_bytes += size
+                if len(sample) < cfg.tool_sql_sample_rows:
+                    sample.append(row)
+            if truncated:
+                break
+            if time.monotonic() > deadline:
+                truncated = "timeout"
+                break
+    finally:
+        # 提前结束时关闭生成器以释放连接
+        batches.close()
+    return {
+        "columns": {
+            name: [compact_value(row.get(name)) for row in sample] for name in names
+        },
+        "row_count": row_count,
+        "sample_rows": len(sample),
+        "truncated": truncated,
+        "elapsed_ms": int((time.monotonic() - start) * 1000),
+    }
+
+
+def build_registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    registry.register(
+        Tool(
+            name="list_tables",
+            description="不传 connector 时列出可用的连接器；传入时列出该连接器默认库的表名",
+            schema={
+                "type": "object",
+                "properties": {"connector": {"type": "string", "description": "连接器名称"}},
+            },
+            fn=list_tables,
+        )
+    )
+    registry.register(
+        Tool(
+            name="describe_table",
+            description="查看表的列名、类型与主键",
+            schema={
+                "type": "object",
+                "properties": {
+                    "connector": {"type": "string", "description": "连接器名称"},
+                    "table": {"type": "string", "description": "表名，可带库名前缀 db.table"},
+                },
+                "required": ["connector", "table"],
+            },
+            fn=describe_table,
+        )
+    )
+    registry.register(
+        Tool(
+            name="run_sql",
+            description=(
+                "在连接器上执行单条只读 SQL，返回总行数与按列组织的前若干行样例；"
+                "需要统计结果时请在 SQL 中聚合，而不是取回明细"
+            ),
+            schema={
+                "type": "object",
+                "properties": {
+                    "connector": {"type": "string", "description": "连接器名称"},
+                    "sql": {"type": "string", "description": "只读 SQL"},
+                },
+                "required": ["connector", "sql"],
+            },
+            fn=run_sql,
+        )
+    )
+    return registry
+
+
+tool_registry = build_registry()
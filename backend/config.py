@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -84,9 +84,11 @@ class LogSettings(BaseSettings):
 class LLMSettings(BaseSettings):
     """LLM配置"""
 
-    model: str = Field(default="gemini-pro", alias="LLM_MODEL")
+    provider: str = Field(default="google", alias="LLM_PROVIDER")
+    # gemini-2.5-pro / gemini-2.0-flash-lite
+    model: str = Field(default="gemini-2.0-flash-lite", alias="LLM_MODEL")
     api_key: str = Field(default="", alias="LLM_GOOGLE_API_KEY")
-    temperature: float = Field(default=0.7, alias="LLM_TEMPERATURE")
+    temperature: float = Field(default=0.3, alias="LLM_TEMPERATURE")
     timeout: int = Field(default=120, alias="LLM_TIMEOUT")
 
     model_config = SettingsConfigDict(
@@ -96,6 +98,7 @@ class LLMSettings(BaseSettings):
     @property
     def config_dict(self) -> dict:
         return {
+            "provider": self.provider,
             "model": self.model,
             "api_key": self.api_key,
             "temperature": self.temperature,
@@ -121,6 +124,171 @@ class AppSettings(BaseSettings):
         }
 
 
+class SchedulerSettings(BaseSettings):
+    """调度器配置"""
+
+    # 运行记录异步批量写入：最长攒批时间与单批最大条数
+    run_flush_interval_ms: int = 200
+    run_flush_batch_size: int = 200
+    # 运行记录保留：默认保留天数（0 表示不清理）、归档与清理批次
+    run_retention_days: int = 30
+    run_archive_enabled: bool = True
+    run_archive_retention_days: int = 365
+    run_prune_interval_seconds: int = 3600
+    run_prune_batch_size: int = 1000
+    # 开始超过该秒数仍为 running 的运行视为执行进程异常退出的遗留，标记为失败（0 表示不处理）
+    run_stale_seconds: int = 86400
+    # APScheduler 触发线程池大小（只负责入队）
+    executor_max_workers: int = 20
+    # 触发分发：执行线程数、排队上限
+    dispatcher_workers: int = 20
+    dispatcher_max_queue: int = 1000
+    # 手动触发按任务限流（每分钟令牌数、突发容量），0 表示不限
+    manual_trigger_rate_per_minute: float = 6
+    manual_trigger_burst: int = 2
+    # 按连接器限制查询速率（每秒令牌数、突发容量），0 表示不限（默认）
+    connector_rate_per_second: float = 0
+    connector_burst: int = 20
+    # 分片执行：单次运行的最大并行分片数、重试退避基数
+    shard_max_workers: int = 8
+    shard_retry_backoff_ms: int = 500
+    # 运行失败重试：默认最大尝试次数（1 表示不重试）、指数退避基数与上限
+    retry_max_attempts: int = 1
+    retry_backoff_ms: int = 1000
+    retry_max_backoff_ms: int = 60000
+    # 连接器熔断：连续连接失败阈值、初始熔断时长与最大熔断时长（秒，0 表示关闭熔断）
+    breaker_failure_threshold: int = 5
+    breaker_open_seconds: int = 30
+    breaker_max_open_seconds: int = 600
+    # 任务执行计划缓存兜底过期时间（秒，0 表示仅靠显式失效）
+    plan_cache_ttl_seconds: int = 300
+    # 源表变更触发：元数据探测间隔（秒）与并行探测的连接器数
+    change_watch_interval_seconds: int = 30
+    change_watch_workers: int = 4
+    # 执行后端：local 在本进程执行；redis 只写入 Redis Streams，由独立 worker 执行
+    execution_backend: Literal["local", "redis"] = "local"
+    queue_prefix: str = "chatjob:scheduler"
+    queue_group: str = "job-workers"
+    # 去重锁过期时间（秒），防止 worker 异常退出后任务永远无法再触发
+    queue_lock_seconds: int = 3600
+    # worker：并发执行数、阻塞读取时长、认领其他 worker 未确认消息的空闲阈值
+    worker_concurrency: int = 8
+    worker_block_ms: int = 5000
+    worker_claim_idle_ms: int = 60000
+
+    model_config = SettingsConfigDict(env_prefix="SCHEDULER_", extra="ignore")
+
+    @property
+    def config_dict(self) -> dict:
+        return {
+            "run_flush_interval_ms": self.run_flush_interval_ms,
+            "run_flush_batch_size": self.run_flush_batch_size,
+            "run_retention_days": self.run_retention_days,
+            "run_archive_enabled": self.run_archive_enabled,
+            "run_archive_retention_days": self.run_archive_retention_days,
+            "run_prune_interval_seconds": self.run_prune_interval_seconds,
+            "run_prune_batch_size": self.run_prune_batch_size,
+            "run_stale_seconds": self.run_stale_seconds,
+            "executor_max_workers": self.executor_max_workers,
+            "plan_cache_ttl_seconds": self.plan_cache_ttl_seconds,
+            "shard_max_workers": self.shard_max_workers,
+            "shard_retry_backoff_ms": self.shard_retry_backoff_ms,
+            "retry_max_attempts": self.retry_max_attempts,
+            "retry_backoff_ms": self.retry_backoff_ms,
+            "retry_max_backoff_ms": self.retry_max_backoff_ms,
+            "breaker_failure_threshold": self.breaker_failure_threshold,
+            "breaker_open_seconds": self.breaker_open_seconds,
+            "breaker_max_open_seconds": self.breaker_max_open_seconds,
+            "dispatcher_workers": self.dispatcher_workers,
+            "dispatcher_max_queue": self.dispatcher_max_queue,
+            "manual_trigger_rate_per_minute": self.manual_trigger_rate_per_minute,
+            "manual_trigger_burst": self.manual_trigger_burst,
+            "connector_rate_per_second": self.connector_rate_per_second,
+            "connector_burst": self.connector_burst,
+            "change_watch_interval_seconds": self.change_watch_interval_seconds,
+            "change_watch_workers": self.change_watch_workers,
+            "execution_backend": self.execution_backend,
+            "queue_prefix": self.queue_prefix,
+            "queue_group": self.queue_group,
+            "queue_lock_seconds": self.queue_lock_seconds,
+            "worker_concurrency": self.worker_concurrency,
+            "worker_block_ms": self.worker_block_ms,
+            "worker_claim_idle_ms": self.worker_claim_idle_ms,
+        }
+
+
+class ChatSettings(BaseSettings):
+    """对话配置"""
+
+    # 上下文窗口：每轮最多带入的近期消息数与估算 token 上限
+    context_recent_messages: int = 20
+    context_max_tokens: int = 6000
+    # 窗口外的消息累积到该条数后合并进会话滚动摘要
+    summary_batch_messages: int = 10
+    summary_max_tokens: int = 800
+    # 单条工具结果带入上下文的最大字符数
+    tool_result_max_chars: int = 2000
+    # 会话历史进程内缓存：最多缓存的会话数与每个会话的最近消息数（0 表示不缓存）
+    history_cache_conversations: int = 256
+    history_cache_messages: int = 200
+    # 语义匹配（回复缓存、元数据检索）使用的向量模型
+    embedding_model: str = "models/text-embedding-004"
+    # LLM 回复缓存：精确匹配 + 可选的语义匹配（需 numpy）
+    response_cache_enabled: bool = True
+    response_cache_ttl_seconds: int = 600
+    response_cache_max_entries: int = 1000
+    response_cache_semantic: bool = False
+    response_cache_similarity: float = 0.95
+    # 元数据检索：每轮注入的相关表数、注入内容的 token 上限与后台刷新周期
+    schema_index_enabled: bool = True
+    schema_index_top_k: int = 5
+    schema_index_max_tokens: int = 1500
+    schema_index_refresh_seconds: int = 600
+    # 开启后 BM25 与向量相似度加权融合（需 numpy）
+    schema_index_semantic: bool = False
+    schema_index_semantic_weight: float = 0.5
+    # run_sql 工具：最多读取的行数与数据量、执行超时，以及返回给模型的样例行数
+    tool_sql_max_rows: int = 1000
+    tool_sql_max_bytes: int = 1048576
+    tool_sql_timeout_seconds: int = 10
+    tool_sql_sample_rows: int = 20
+    # 工具调用循环：每轮最多的模型调用步数与同一步并发执行的工具数
+    agent_max_steps: int = 5
+    agent_max_parallel_tools: int = 4
+
+    model_config = SettingsConfigDict(env_prefix="CHAT_", extra="ignore")
+
+    @property
+    def config_dict(self) -> dict:
+        return {
+            "context_recent_messages": self.context_recent_messages,
+            "context_max_tokens": self.context_max_tokens,
+            "summary_batch_messages": self.summary_batch_messages,
+            "summary_max_tokens": self.summary_max_tokens,
+            "tool_result_max_chars": self.tool_result_max_chars,
+            "history_cache_conversations": self.history_cache_conversations,
+            "history_cache_messages": self.history_cache_messages,
+            "response_cache_enabled": self.response_cache_enabled,
+            "response_cache_ttl_seconds": self.response_cache_ttl_seconds,
+            "response_cache_max_entries": self.response_cache_max_entries,
+            "response_cache_semantic": self.response_cache_semantic,
+            "response_cache_similarity": self.response_cache_similarity,
+            "embedding_model": self.embedding_model,
+            "schema_index_enabled": self.schema_index_enabled,
+            "schema_index_top_k": self.schema_index_top_k,
+            "schema_index_max_tokens": self.schema_index_max_tokens,
+            "schema_index_refresh_seconds": self.schema_index_refresh_seconds,
+            "schema_index_semantic": self.schema_index_semantic,
+            "schema_index_semantic_weight": self.schema_index_semantic_weight,
+            "tool_sql_max_rows": self.tool_sql_max_rows,
+            "tool_sql_max_bytes": self.tool_sql_max_bytes,
+            "tool_sql_timeout_seconds": self.tool_sql_timeout_seconds,
+            "tool_sql_sample_rows": self.tool_sql_sample_rows,
+            "agent_max_steps": self.agent_max_steps,
+            "agent_max_parallel_tools": self.agent_max_parallel_tools,
+        }
+
+
 class TestSettings(BaseSettings):
     """测试配置"""
 
@@ -145,6 +313,8 @@ class Settings(BaseSettings):
     log: LogSettings = LogSettings()
     llm: LLMSettings = LLMSettings()
     app: AppSettings = AppSettings()
+    scheduler: SchedulerSettings = SchedulerSettings()
+    chat: ChatSettings = ChatSettings()
     test: TestSettings = TestSettings()
 
     model_config = SettingsConfigDict(
@@ -1,4 +1,3 @@
-from backend.database.config import DatabaseConfig
 from backend.database.session import get_db_cursor, db_connection
 
-__all__ = ["DatabaseConfig", "get_db_cursor", "db_connection"]
+__all__ = ["get_db_cursor", "db_connection"]
@@ -1,10 +1,11 @@
 import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from pymysql.cursors import DictCursor
 
 from backend.database.model.chat import Conversation, Message
+from backend.database.session import ensure_column, ensure_index
 
 logger = logging.getLogger("chat_dao")
 
@@ -35,15 +36,34 @@ class ChatDAO:
                 name VARCHAR(128) NULL,
                 tool_call LONGTEXT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_conversation_message (conversation_id, id),
                 FOREIGN KEY (conversation_id) REFERENCES conversations(id) ON DELETE CASCADE
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
             """
         )
+        # 滚动摘要：summary 概括了 id <= summary_upto 的消息
+        ensure_column(self.cursor, "conversations", "summary", "LONGTEXT NULL")
+        ensure_column(self.cursor, "conversations", "summary_upto", "INT NULL")
+        # 会话级关闭 LLM 回复缓存
+        ensure_column(
+            self.cursor, "conversations", "response_cache", "TINYINT(1) NOT NULL DEFAULT 1"
+        )
+        # 按会话键集分页（已有表补建）
+        ensure_index(
+            self.cursor, "messages", "idx_conversation_message", "conversation_id, id"
+        )
+        # 每写入一条消息递增，各副本据此判断本地历史缓存是否过期
+        ensure_column(
+            self.cursor, "conversations", "version", "INT NOT NULL DEFAULT 0"
+        )
 
-    def create_conversation(self, title: Optional[str] = None) -> Conversation:
+    def create_conversation(
+        self, title: Optional[str] = None, response_cache: bool = True
+    ) -> Conversation:
         """创建新会话"""
         self.cursor.execute(
-            "INSERT INTO conversations (title) VALUES (%s)", (title,)
+            "INSERT INTO conversations (title, response_cache) VALUES (%s, %s)",
+            (title, response_cache),
         )
         conv_id = self.cursor.lastrowid
         self.cursor.execute("SELECT * FROM conversations WHERE id=%s", (conv_id,))
@@ -56,30 +76,122 @@ class ChatDAO:
         row = self.cursor.fetchone()
         return Conversation(**row) if row else None
 
+    def update_conversation(self, conversation_id: int, fields: Dict[str, Any]) -> bool:
+        """更新会话的标题、回复缓存开关等字段"""
+        allowed = {k: v for k, v in fields.items() if k in ("title", "response_cache")}
+        if not allowed:
+            return False
+        assignments = ", ".join(f"{k}=%s" for k in allowed)
+        self.cursor.execute(
+            f"UPDATE conversations SET {assignments} WHERE id=%s",
+            (*allowed.values(), conversation_id),
+        )
+        return self.cursor.rowcount > 0
+
     def list_messages(self, conversation_id: int) -> List[Dict[str, Any]]:
         """获取会话的所有消息"""
         self.cursor.execute(
             "SELECT * FROM messages WHERE conversation_id=%s ORDER BY id",
             (conversation_id,),
         )
-        rows = self.cursor.fetchall()
-        # 反序列化 tool_call
-        for row in rows:
-            if row.get("tool_call") and isinstance(row["tool_call"], (str, bytes)):
-                try:
-                    row["tool_call"] = json.loads(row["tool_call"]) if row["tool_call"] else None
-                except Exception:
-                    pass
-        return rows
-
-    def get_message_history(self, conversation_id: int) -> List[Dict[str, Any]]:
-        """获取消息历史，用于LLM调用"""
+        return _decode_tool_calls(self.cursor.fetchall())
+
+    def list_messages_page(
+        self,
+        conversation_id: int,
+        since_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """键集分页获取消息（按 id 升序）
+
+        传入 since_id 时返回其后最早的 limit 条（增量拉取），否则返回 before_id 之前
+        （未传则为全部）最近的 limit 条（向前翻页）。
+        """
+        sql = "SELECT * FROM messages WHERE conversation_id=%s"
+        params: List[Any] = [conversation_id]
+        if since_id is not None:
+            sql += " AND id>%s"
+            params.append(since_id)
+        if before_id is not None:
+            sql += " AND id<%s"
+            params.append(before_id)
+        if since_id is not None:
+            self.cursor.execute(sql + " ORDER BY id LIMIT %s", params + [limit])
+            return _decode_tool_calls(self.cursor.fetchall())
+        self.cursor.execute(sql + " ORDER BY id DESC LIMIT %s", params + [limit])
+        return _decode_tool_calls(list(reversed(self.cursor.fetchall())))
+
+    def list_recent_messages(self, conversation_id: int, limit: int) -> List[Dict[str, Any]]:
+        """获取会话最近的 limit 条消息（按 id 升序）"""
+        self.cursor.execute(
+            "SELECT * FROM messages WHERE conversation_id=%s ORDER BY id DESC LIMIT %s",
+            (conversation_id, limit),
+        )
+        return _decode_tool_calls(list(reversed(self.cursor.fetchall())))
+
+    def get_message_with_version(
+        self, message_id: int
+    ) -> Tuple[Optional[Dict[str, Any]], int]:
+        """获取单条消息及其所属会话当前的版本号"""
         self.cursor.execute(
-            "SELECT role, content, name FROM messages WHERE conversation_id=%s ORDER BY id",
-            (conversation_id,),
+            "SELECT m.*, c.version AS conversation_version FROM messages m "
+            "JOIN conversations c ON c.id=m.conversation_id WHERE m.id=%s",
+            (message_id,),
+        )
+        row = self.cursor.fetchone()
+        if not row:
+            return None, 0
+        version = row.pop("conversation_version")
+        return _decode_tool_calls([row])[0], version
+
+    def get_message_history(
+        self,
+        conversation_id: int,
+        after_id: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """获取消息历史，用于LLM调用
+
+        after_id 之后的消息按 id 升序返回；指定 limit 时只取最近的 limit 条。
+        """
+        sql = "SELECT id, role, content, name FROM messages WHERE conversation_id=%s"
+        params: List[Any] = [conversation_id]
+        if after_id:
+            sql += " AND id>%s"
+            params.append(after_id)
+        if not limit:
+            self.cursor.execute(sql + " ORDER BY id", params)
+            return self.cursor.fetchall()
+        self.cursor.execute(sql + " ORDER BY id DESC LIMIT %s", params + [limit])
+        return list(reversed(self.cursor.fetchall()))
+
+    def get_messages_between(
+        self, conversation_id: int, after_id: Optional[int], before_id: int, limit: int
+    ) -> List[Dict[str, Any]]:
+        """after_id 与 before_id 之间（不含两端）最早的 limit 条消息"""
+        self.cursor.execute(
+            "SELECT id, role, content, name FROM messages "
+            "WHERE conversation_id=%s AND id>%s AND id<%s ORDER BY id LIMIT %s",
+            (conversation_id, after_id or 0, before_id, limit),
         )
         return self.cursor.fetchall()
 
+    def update_summary(
+        self,
+        conversation_id: int,
+        summary: str,
+        summary_upto: int,
+        expected_upto: Optional[int],
+    ) -> bool:
+        """更新滚动摘要；摘要已被其他请求推进时放弃本次更新"""
+        self.cursor.execute(
+            "UPDATE conversations SET summary=%s, summary_upto=%s "
+            "WHERE id=%s AND COALESCE(summary_upto, 0)=%s",
+            (summary, summary_upto, conversation_id, expected_upto or 0),
+        )
+        return self.cursor.rowcount > 0
+
     def save_message(
         self,
         conversation_id: int,
@@ -99,4 +211,19 @@ class ChatDAO:
                 json.dumps(tool_call) if tool_call else None,
             ),
         )
-        return self.cursor.lastrowid
+        message_id = self.cursor.lastrowid
+        self.cursor.execute(
+            "UPDATE conversations SET version=version+1 WHERE id=%s", (conversation_id,)
+        )
+        return message_id
+
+
+def _decode_tool_calls(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """反序列化 tool_call"""
+    for row in rows:
+        if row.get("tool_call") and isinstance(row["tool_call"], (str, bytes)):
+            try:
+                row["tool_call"] = json.loads(row["tool_call"]) if row["tool_call"] else None
+            except Exception:
+                pass
+    return rows
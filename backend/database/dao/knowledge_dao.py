@@ -44,6 +44,11 @@ class KnowledgeDAO:
         results = self.cursor.fetchall()
         return [KnowledgeModel.model_validate(row) for row in results]
 
+    def list_all(self) -> List[KnowledgeModel]:
+        """全部知识标注（供元数据检索索引）"""
+        self.cursor.execute("SELECT * FROM knowledge ORDER BY id")
+        return [KnowledgeModel.model_validate(row) for row in self.cursor.fetchall()]
+
     def update_content(
         self, knowledge_id: int, content: str
     ) -> Optional[KnowledgeModel]:
@@ -1,10 +1,51 @@
-from typing import List, Optional, Dict, Any
+import json
+from typing import List, Optional, Dict, Any, Tuple
 from pymysql.cursors import DictCursor
 from backend.database.model.scheduler import (
     JobTemplateModel,
     ScheduledJobModel,
     JobRunModel,
+    DagRunModel,
+    JobWatermarkModel,
+    JobRunShardModel,
 )
+from backend.database.result_codec import decode_result, encode_result
+
+
+class BulkInsertConflict(Exception):
+    """批量插入后无法确认新行的ID，调用方应回滚事务"""
+
+
+# 批量更新运行记录时可写入的字段
+RUN_UPDATE_FIELDS = (
+    "status",
+    "finished_at",
+    "duration_ms",
+    "rows_affected",
+    "result_blob",
+    "result_size",
+    "error",
+    "metrics",
+)
+# JSON 字段：批量更新时与已有值合并而不是覆盖
+RUN_JSON_FIELDS = ("metrics",)
+# 更新任务时可写入的字段
+JOB_UPDATE_FIELDS = (
+    "name",
+    "schedule_type",
+    "cron_expression",
+    "interval_seconds",
+    "is_active",
+    "retention_days",
+    "override_config",
+)
+# 列表查询的轻量投影：不读取结果大字段
+RUN_LIST_COLUMNS = (
+    "id, job_id, status, started_at, finished_at, duration_ms, rows_affected, "
+    "result_size, error, dag_run_id, metrics, created_at"
+)
+# 批量创建时单条 INSERT 的最大行数
+BULK_INSERT_CHUNK = 500
 
 
 class SchedulerDAO:
@@ -35,6 +76,14 @@ class SchedulerDAO:
         row = self.cursor.fetchone()
         return JobTemplateModel.model_validate(row) if row else None
 
+    def get_templates_by_ids(self, template_ids: List[int]) -> List[JobTemplateModel]:
+        if not template_ids:
+            return []
+        self.cursor.execute(
+            "SELECT * FROM job_templates WHERE id IN %s ORDER BY id", (template_ids,)
+        )
+        return [JobTemplateModel.model_validate(r) for r in self.cursor.fetchall()]
+
     def get_template_by_name(self, name: str) -> Optional[JobTemplateModel]:
         self.cursor.execute("SELECT * FROM job_templates WHERE name=%s", (name,))
         row = self.cursor.fetchone()
@@ -75,8 +124,8 @@ class SchedulerDAO:
         self.cursor.execute(
             """
             INSERT INTO scheduled_jobs
-            (name, template_id, schedule_type, cron_expression, interval_seconds, is_active, next_run_time, override_config)
-            VALUES (%s,%s,%s,%s,%s,%s,NULL,CAST(%s AS JSON))
+            (name, template_id, schedule_type, cron_expression, interval_seconds, is_active, next_run_time, override_config, retention_days)
+            VALUES (%s,%s,%s,%s,%s,%s,NULL,CAST(%s AS JSON),%s)
             """,
             (
                 data.get("name"),
@@ -86,11 +135,67 @@ class SchedulerDAO:
                 data.get("interval_seconds"),
                 data.get("is_active", True),
                 json_dumps(data.get("override_config")),
+                data.get("retention_days"),
             ),
         )
         job_id = self.cursor.lastrowid
         return self.get_job_by_id(job_id)
 
+    def create_jobs(self, items: List[Dict[str, Any]]) -> List[int]:
+        """多行 INSERT 批量创建任务，按输入顺序返回新任务ID
+
+        单条多行 INSERT 分配的自增值按 auto_increment_increment 等距递增
+        （主主复制等场景步长大于 1），按首个 ID 与步长推算后回查校验。
+        """
+        self.cursor.execute("SELECT @@auto_increment_increment AS step")
+        step = int(self.cursor.fetchone()["step"])
+        job_ids: List[int] = []
+        for start in range(0, len(items), BULK_INSERT_CHUNK):
+            chunk = items[start : start + BULK_INSERT_CHUNK]
+            placeholders = ", ".join(
+                ["(%s,%s,%s,%s,%s,%s,NULL,CAST(%s AS JSON),%s)"] * len(chunk)
+            )
+            values: List[Any] = []
+            for data in chunk:
+                values.extend(
+                    (
+                        data.get("name"),
+                        data.get("template_id"),
+                        data.get("schedule_type", "cron"),
+                        data.get("cron_expression"),
+                        data.get("interval_seconds"),
+                        data.get("is_active", True),
+                        json_dumps(data.get("override_config")),
+                        data.get("retention_days"),
+                    )
+                )
+            self.cursor.execute(
+                "INSERT INTO scheduled_jobs "
+                "(name, template_id, schedule_type, cron_expression, interval_seconds, "
+                "is_active, next_run_time, override_config, retention_days) "
+                f"VALUES {placeholders}",
+                values,
+            )
+            first_id = self.cursor.lastrowid
+            chunk_ids = list(range(first_id, first_id + len(chunk) * step, step))
+            self.cursor.execute(
+                "SELECT id, name FROM scheduled_jobs WHERE id IN %s ORDER BY id",
+                (chunk_ids,),
+            )
+            names = [row["name"] for row in self.cursor.fetchall()]
+            if names != [data.get("name") for data in chunk]:
+                raise BulkInsertConflict("批量创建任务时无法确认新任务ID，请重试")
+            job_ids.extend(chunk_ids)
+        return job_ids
+
+    def get_jobs_by_ids(self, job_ids: List[int]) -> List[ScheduledJobModel]:
+        if not job_ids:
+            return []
+        self.cursor.execute(
+            "SELECT * FROM scheduled_jobs WHERE id IN %s ORDER BY id", (job_ids,)
+        )
+        return [ScheduledJobModel.model_validate(r) for r in self.cursor.fetchall()]
+
     def get_job_by_id(self, job_id: int) -> Optional[ScheduledJobModel]:
         self.cursor.execute("SELECT * FROM scheduled_jobs WHERE id=%s", (job_id,))
         row = self.cursor.fetchone()
@@ -113,45 +218,89 @@ class SchedulerDAO:
     def update_job(
         self, job_id: int, update: Dict[str, Any]
     ) -> Optional[ScheduledJobModel]:
+        self.update_job_fields(job_id, update)
+        return self.get_job_by_id(job_id)
+
+    def update_job_fields(self, job_id: int, update: Dict[str, Any]):
+        """只执行 UPDATE，不回查"""
         set_clauses = []
         values: List[Any] = []
-        for key in (
-            "name",
-            "schedule_type",
-            "cron_expression",
-            "interval_seconds",
-            "is_active",
-        ):
-            if key in update:
+        for key in JOB_UPDATE_FIELDS:
+            if key not in update:
+                continue
+            if key == "override_config":
+                set_clauses.append("override_config=CAST(%s AS JSON)")
+                values.append(json_dumps(update[key]))
+            else:
                 set_clauses.append(f"{key}=%s")
                 values.append(update[key])
-        if "override_config" in update:
-            set_clauses.append("override_config=CAST(%s AS JSON)")
-            values.append(json_dumps(update["override_config"]))
         if not set_clauses:
-            return self.get_job_by_id(job_id)
+            return
         sql = f"UPDATE scheduled_jobs SET {', '.join(set_clauses)} WHERE id=%s"
         values.append(job_id)
         self.cursor.execute(sql, values)
-        return self.get_job_by_id(job_id)
+
+    def update_jobs_fields(self, updates: List[Dict[str, Any]]) -> int:
+        """批量更新任务字段，每项需包含 id
+
+        合并为一条 UPDATE ... JOIN (SELECT ... UNION ALL ...) 语句。各项可更新不同的
+        字段，以 set_<字段> 标记区分"未提供"与"置为 NULL"。返回受影响行数。
+        """
+        keys = [k for k in JOB_UPDATE_FIELDS if any(k in u for u in updates)]
+        if not updates or not keys:
+            return 0
+        selects = []
+        values: List[Any] = []
+        columns = ", ".join(["%s AS id"] + [f"%s AS {k}, %s AS set_{k}" for k in keys])
+        for update in updates:
+            selects.append(f"SELECT {columns}")
+            values.append(update["id"])
+            for key in keys:
+                value = update.get(key)
+                if key == "override_config":
+                    value = json_dumps(value)
+                values.extend((value, int(key in update)))
+        assignments = ", ".join(
+            f"j.{k}=IF(u.set_{k}, CAST(u.{k} AS JSON), j.{k})"
+            if k == "override_config"
+            else f"j.{k}=IF(u.set_{k}, u.{k}, j.{k})"
+            for k in keys
+        )
+        sql = (
+            f"UPDATE scheduled_jobs j JOIN ({' UNION ALL '.join(selects)}) u "
+            f"ON j.id=u.id SET {assignments}"
+        )
+        self.cursor.execute(sql, values)
+        return self.cursor.rowcount
 
     def delete_job(self, job_id: int) -> bool:
         self.cursor.execute("DELETE FROM scheduled_jobs WHERE id=%s", (job_id,))
         return self.cursor.rowcount > 0
 
+    def delete_jobs(self, job_ids: List[int]) -> int:
+        if not job_ids:
+            return 0
+        self.cursor.execute("DELETE FROM scheduled_jobs WHERE id IN %s", (job_ids,))
+        return self.cursor.rowcount
+
     # Job runs
-    def create_job_run(self, data: Dict[str, Any]) -> JobRunModel:
+    def insert_job_run(self, data: Dict[str, Any]) -> int:
+        """插入运行记录，仅返回主键，不回查"""
         self.cursor.execute(
             """
-            INSERT INTO job_runs (job_id, status, started_at)
-            VALUES (%s,%s,NOW())
+            INSERT INTO job_runs (job_id, status, started_at, dag_run_id)
+            VALUES (%s,%s,NOW(),%s)
             """,
             (
                 data.get("job_id"),
                 data.get("status", "running"),
+                data.get("dag_run_id"),
             ),
         )
-        run_id = self.cursor.lastrowid
+        return self.cursor.lastrowid
+
+    def create_job_run(self, data: Dict[str, Any]) -> JobRunModel:
+        run_id = self.insert_job_run(data)
         return self.get_job_run_by_id(run_id)
 
     def finish_job_run(
@@ -159,36 +308,389 @@ class SchedulerDAO:
     ) -> Optional[JobRunModel]:
         set_clauses = ["finished_at=NOW()"]
         values: List[Any] = []
-        for key in ("status", "duration_ms", "rows_affected", "result", "error"):
+        if "result" in data:
+            data = {**data, **_encode_run_result(data.pop("result"))}
+        for key in ("status", "duration_ms", "rows_affected", "result_blob", "result_size", "error"):
             if key in data:
-                if key in ("result", "error"):
-                    set_clauses.append(f"{key}=%s")
-                    values.append(data[key])
-                else:
-                    set_clauses.append(f"{key}=%s")
-                    values.append(data[key])
+                set_clauses.append(f"{key}=%s")
+                values.append(data[key])
         sql = f"UPDATE job_runs SET {', '.join(set_clauses)} WHERE id=%s"
         values.append(run_id)
         self.cursor.execute(sql, values)
         return self.get_job_run_by_id(run_id)
 
+    def finish_job_runs(self, updates: List[Dict[str, Any]]) -> int:
+        """批量更新运行记录
+
+        多条更新合并为一条 UPDATE ... JOIN (SELECT ... UNION ALL ...) 语句，
+        未提供（为 None）的字段保持原值。返回受影响行数。
+        """
+        if not updates:
+            return 0
+        selects = []
+        values: List[Any] = []
+        for update in updates:
+            columns = ", ".join(
+                f"%s AS {key}" for key in ("id",) + RUN_UPDATE_FIELDS
+            )
+            selects.append(f"SELECT {columns}")
+            values.append(update["id"])
+            for key in RUN_UPDATE_FIELDS:
+                value = update.get(key)
+                if key in RUN_JSON_FIELDS and value is not None:
+                    value = json_dumps(value)
+                values.append(value)
+        assignments = ", ".join(
+            f"r.{key}=IF(u.{key} IS NULL, r.{key}, "
+            f"JSON_MERGE_PATCH(COALESCE(r.{key}, JSON_OBJECT()), CAST(u.{key} AS JSON)))"
+            if key in RUN_JSON_FIELDS
+            else f"r.{key}=COALESCE(u.{key}, r.{key})"
+            for key in RUN_UPDATE_FIELDS
+        )
+        sql = (
+            f"UPDATE job_runs r JOIN ({' UNION ALL '.join(selects)}) u "
+            f"ON r.id=u.id SET {assignments}"
+        )
+        self.cursor.execute(sql, values)
+        return self.cursor.rowcount
+
     def get_job_run_by_id(self, run_id: int) -> Optional[JobRunModel]:
+        """单条运行记录（含解码后的结果）"""
         self.cursor.execute("SELECT * FROM job_runs WHERE id=%s", (run_id,))
         row = self.cursor.fetchone()
-        return JobRunModel.model_validate(row) if row else None
+        return _job_run_from_row(row) if row else None
 
     def list_job_runs(
-        self, job_id: int, skip: int = 0, limit: int = 100
+        self,
+        job_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        before_id: Optional[int] = None,
     ) -> List[JobRunModel]:
+        """按 id 倒序列出运行记录
+
+        传入 before_id 时使用键集分页（走 (job_id, id) 索引），忽略 skip。
+        """
+        if before_id is not None:
+            self.cursor.execute(
+                f"SELECT {RUN_LIST_COLUMNS} FROM job_runs WHERE job_id=%s AND id<%s "
+                "ORDER BY id DESC LIMIT %s",
+                (job_id, before_id, limit),
+            )
+        else:
+            self.cursor.execute(
+                f"SELECT {RUN_LIST_COLUMNS} FROM job_runs WHERE job_id=%s "
+                "ORDER BY id DESC LIMIT %s OFFSET %s",
+                (job_id, limit, skip),
+            )
+        rows = self.cursor.fetchall()
+        return [_job_run_from_row(r) for r in rows]
+
+    def list_run_metrics(self, job_id: int, limit: int = 100) -> List[JobRunModel]:
+        """最近运行的指标（不读取 result 大字段）"""
         self.cursor.execute(
-            "SELECT * FROM job_runs WHERE job_id=%s ORDER BY id DESC LIMIT %s OFFSET %s",
-            (job_id, limit, skip),
+            "SELECT id, job_id, status, started_at, finished_at, duration_ms, "
+            "rows_affected, dag_run_id, metrics FROM job_runs "
+            "WHERE job_id=%s AND metrics IS NOT NULL ORDER BY id DESC LIMIT %s",
+            (job_id, limit),
         )
-        rows = self.cursor.fetchall()
-        return [JobRunModel.model_validate(r) for r in rows]
+        return [_job_run_from_row(r) for r in self.cursor.fetchall()]
 
+    # Run shards
+    def insert_run_shards(self, run_id: int, shards: List[Dict[str, Any]]) -> int:
+        if not shards:
+            return 0
+        self.cursor.executemany(
+            """
+            INSERT INTO job_run_shards
+            (run_id, shard_index, shard_key, status, attempts, rows_affected, duration_ms, error, started_at, finished_at)
+            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+            """,
+            [
+                (
+                    run_id,
+                    shard["shard_index"],
+                    shard["shard_key"],
+                    shard["status"],
+                    shard.get("attempts", 1),
+                    shard.get("rows_affected"),
+                    shard.get("duration_ms"),
+                    shard.get("error"),
+                    shard.get("started_at"),
+                    shard.get("finished_at"),
+                )
+                for shard in shards
+            ],
+        )
+        return self.cursor.rowcount
 
-def json_dumps(obj: Any) -> str:
-    import json
+    def list_run_shards(self, run_id: int) -> List[JobRunShardModel]:
+        self.cursor.execute(
+            "SELECT * FROM job_run_shards WHERE run_id=%s ORDER BY shard_index",
+            (run_id,),
+        )
+        return [JobRunShardModel.model_validate(r) for r in self.cursor.fetchall()]
+
+    # Dependencies
+    def list_dependencies(self, active_only: bool = False) -> List[Tuple[int, int]]:
+        """依赖边 (job_id, upstream_job_id)，active_only 时只含激活的下游任务"""
+        if active_only:
+            self.cursor.execute(
+                "SELECT d.job_id, d.upstream_job_id FROM job_dependencies d "
+                "JOIN scheduled_jobs j ON j.id=d.job_id WHERE j.is_active=TRUE"
+            )
+        else:
+            self.cursor.execute(
+                "SELECT job_id, upstream_job_id FROM job_dependencies"
+            )
+        return [(r["job_id"], r["upstream_job_id"]) for r in self.cursor.fetchall()]
+
+    def get_upstream_ids(self, job_ids: List[int]) -> Dict[int, List[int]]:
+        if not job_ids:
+            return {}
+        self.cursor.execute(
+            "SELECT job_id, upstream_job_id FROM job_dependencies "
+            "WHERE job_id IN %s ORDER BY upstream_job_id",
+            (job_ids,),
+        )
+        result: Dict[int, List[int]] = {job_id: [] for job_id in job_ids}
+        for row in self.cursor.fetchall():
+            result[row["job_id"]].append(row["upstream_job_id"])
+        return result
 
+    def set_upstream_ids(self, job_id: int, upstream_ids: List[int]):
+        """覆盖设置任务的上游依赖"""
+        self.cursor.execute("DELETE FROM job_dependencies WHERE job_id=%s", (job_id,))
+        if upstream_ids:
+            self.cursor.executemany(
+                "INSERT INTO job_dependencies (job_id, upstream_job_id) VALUES (%s,%s)",
+                [(job_id, upstream_id) for upstream_id in upstream_ids],
+            )
+
+    def replace_upstream_ids(self, upstreams: Dict[int, List[int]]):
+        """批量覆盖多个任务的上游依赖：一条 DELETE 加一条多行 INSERT"""
+        if not upstreams:
+            return
+        self.cursor.execute(
+            "DELETE FROM job_dependencies WHERE job_id IN %s", (list(upstreams),)
+        )
+        pairs = [
+            (job_id, upstream_id)
+            for job_id, upstream_ids in upstreams.items()
+            for upstream_id in upstream_ids
+        ]
+        if pairs:
+            self.cursor.executemany(
+                "INSERT INTO job_dependencies (job_id, upstream_job_id) VALUES (%s,%s)",
+                pairs,
+            )
+
+    def list_existing_job_ids(self, job_ids: List[int]) -> List[int]:
+        if not job_ids:
+            return []
+        self.cursor.execute(
+            "SELECT id FROM scheduled_jobs WHERE id IN %s", (job_ids,)
+        )
+        return [row["id"] for row in self.cursor.fetchall()]
+
+    # DAG runs
+    def create_dag_run(self, root_job_id: int) -> int:
+        self.cursor.execute(
+            "INSERT INTO dag_runs (root_job_id, status, started_at) "
+            "VALUES (%s,'running',NOW())",
+            (root_job_id,),
+        )
+        return self.cursor.lastrowid
+
+    def finish_dag_run(self, dag_run_id: int, data: Dict[str, Any]) -> int:
+        self.cursor.execute(
+            """
+            UPDATE dag_runs SET status=%s, finished_at=%s, duration_ms=%s,
+            critical_path_ms=%s, critical_path=CAST(%s AS JSON)
+            WHERE id=%s
+            """,
+            (
+                data.get("status"),
+                data.get("finished_at"),
+                data.get("duration_ms"),
+                data.get("critical_path_ms"),
+                json_dumps(data.get("critical_path")),
+                dag_run_id,
+            ),
+        )
+        return self.cursor.rowcount
+
+    def get_dag_run_by_id(self, dag_run_id: int) -> Optional[DagRunModel]:
+        self.cursor.execute("SELECT * FROM dag_runs WHERE id=%s", (dag_run_id,))
+        row = self.cursor.fetchone()
+        return _dag_run_from_row(row) if row else None
+
+    def list_dag_runs(
+        self, root_job_id: Optional[int] = None, limit: int = 100
+    ) -> List[DagRunModel]:
+        if root_job_id is not None:
+            self.cursor.execute(
+                "SELECT * FROM dag_runs WHERE root_job_id=%s ORDER BY id DESC LIMIT %s",
+                (root_job_id, limit),
+            )
+        else:
+            self.cursor.execute(
+                "SELECT * FROM dag_runs ORDER BY id DESC LIMIT %s", (limit,)
+            )
+        return [_dag_run_from_row(r) for r in self.cursor.fetchall()]
+
+    def list_runs_by_dag_run(self, dag_run_id: int) -> List[JobRunModel]:
+        self.cursor.execute(
+            f"SELECT {RUN_LIST_COLUMNS} FROM job_runs WHERE dag_run_id=%s ORDER BY id",
+            (dag_run_id,),
+        )
+        return [_job_run_from_row(r) for r in self.cursor.fetchall()]
+
+    # Watermarks
+    def get_watermark(self, job_id: int) -> Optional[JobWatermarkModel]:
+        self.cursor.execute("SELECT * FROM job_watermarks WHERE job_id=%s", (job_id,))
+        row = self.cursor.fetchone()
+        return JobWatermarkModel.model_validate(row) if row else None
+
+    def init_watermark(
+        self, job_id: int, watermark_value: Optional[str], value_type: str
+    ):
+        """水位不存在时写入初始值"""
+        self.cursor.execute(
+            "INSERT IGNORE INTO job_watermarks (job_id, watermark_value, value_type) "
+            "VALUES (%s,%s,%s)",
+            (job_id, watermark_value, value_type),
+        )
+
+    def advance_watermark(
+        self,
+        job_id: int,
+        expected_value: Optional[str],
+        watermark_value: Optional[str],
+        value_type: str,
+        rows: int,
+    ) -> bool:
+        """比较交换推进水位，当前值不等于 expected_value 时不更新"""
+        self.cursor.execute(
+            """
+            UPDATE job_watermarks
+            SET watermark_value=%s, value_type=%s,
+                total_rows=total_rows+%s, run_count=run_count+1
+            WHERE job_id=%s AND watermark_value <=> %s
+            """,
+            (watermark_value, value_type, rows, job_id, expected_value),
+        )
+        return self.cursor.rowcount > 0
+
+    def reset_watermark(
+        self, job_id: int, watermark_value: Optional[str], value_type: str
+    ):
+        self.cursor.execute(
+            """
+            INSERT INTO job_watermarks (job_id, watermark_value, value_type)
+            VALUES (%s,%s,%s)
+            ON DUPLICATE KEY UPDATE watermark_value=VALUES(watermark_value),
+                value_type=VALUES(value_type), total_rows=0, run_count=0
+            """,
+            (job_id, watermark_value, value_type),
+        )
+
+    # Run retention
+    def list_retention_days(self, default_days: int) -> List[int]:
+        """当前任务中出现的所有生效保留天数"""
+        self.cursor.execute(
+            "SELECT DISTINCT COALESCE(retention_days, %s) AS days FROM scheduled_jobs",
+            (default_days,),
+        )
+        return [row["days"] for row in self.cursor.fetchall()]
+
+    def list_expired_run_ids(
+        self, retention_days: int, default_days: int, limit: int
+    ) -> List[int]:
+        """保留天数为 retention_days 的任务中已过期的运行记录ID"""
+        self.cursor.execute(
+            """
+            SELECT r.id FROM job_runs r
+            JOIN scheduled_jobs j ON j.id=r.job_id
+            WHERE COALESCE(j.retention_days, %s)=%s
+              AND r.created_at < NOW() - INTERVAL %s DAY
+            ORDER BY r.id LIMIT %s
+            """,
+            (default_days, retention_days, retention_days, limit),
+        )
+        return [row["id"] for row in self.cursor.fetchall()]
+
+    def archive_job_runs(self, run_ids: List[int]) -> int:
+        """将运行记录（不含 result）复制到归档表"""
+        if not run_ids:
+            return 0
+        self.cursor.execute(
+            """
+            INSERT IGNORE INTO job_runs_archive
+            (id, job_id, status, started_at, finished_at, duration_ms, rows_affected, error, metrics, created_at)
+            SELECT id, job_id, status, started_at, finished_at, duration_ms,
+                   rows_affected, LEFT(error, 1000), metrics, created_at
+            FROM job_runs WHERE id IN %s
+            """,
+            (run_ids,),
+        )
+        return self.cursor.rowcount
+
+    def delete_job_runs(self, run_ids: List[int]) -> int:
+        if not run_ids:
+            return 0
+        self.cursor.execute("DELETE FROM job_runs WHERE id IN %s", (run_ids,))
+        return self.cursor.rowcount
+
+    def fail_stale_runs(self, stale_seconds: int, error: str, limit: int) -> int:
+        """将开始超过 stale_seconds 秒仍为 running 的运行记录标记为失败"""
+        self.cursor.execute(
+            """
+            UPDATE job_runs SET status='failed', finished_at=NOW(), error=%s
+            WHERE status='running' AND started_at < NOW() - INTERVAL %s SECOND
+            LIMIT %s
+            """,
+            (error, stale_seconds, limit),
+        )
+        return self.cursor.rowcount
+
+    def purge_archived_runs(self, retention_days: int, limit: int) -> int:
+        """删除超过归档保留期的归档记录"""
+        self.cursor.execute(
+            "DELETE FROM job_runs_archive "
+            "WHERE created_at < NOW() - INTERVAL %s DAY LIMIT %s",
+            (retention_days, limit),
+        )
+        return self.cursor.rowcount
+
+
+def _job_run_from_row(row: Dict[str, Any]) -> JobRunModel:
+    if isinstance(row.get("metrics"), str):
+        row["metrics"] = json.loads(row["metrics"])
+    blob = row.pop("result_blob", None)
+    if blob is not None:
+        row["result"] = decode_result(blob)
+    elif isinstance(row.get("result"), str):
+        # 旧版以 JSON 文本保存的结果
+        try:
+            row["result"] = json.loads(row["result"])
+        except ValueError:
+            pass
+    return JobRunModel.model_validate(row)
+
+
+def _encode_run_result(result: Any) -> Dict[str, Any]:
+    if result is None:
+        return {}
+    blob = encode_result(result)
+    return {"result_blob": blob, "result_size": len(blob)}
+
+
+def _dag_run_from_row(row: Dict[str, Any]) -> DagRunModel:
+    if isinstance(row.get("critical_path"), (str, bytes)):
+        row["critical_path"] = json.loads(row["critical_path"])
+    return DagRunModel.model_validate(row)
+
+
+def json_dumps(obj: Any) -> str:
     return json.dumps(obj, ensure_ascii=False)
@@ -7,6 +7,10 @@ from pydantic import BaseModel
 class Conversation(BaseModel):
     id: Optional[int] = None
     title: Optional[str] = None
+    summary: Optional[str] = None
+    summary_upto: Optional[int] = None
+    version: int = 0
+    response_cache: bool = True
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
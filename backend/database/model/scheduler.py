@@ -1,6 +1,6 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class JobTemplateModel(BaseModel):
@@ -22,12 +22,16 @@ class ScheduledJobModel(BaseModel):
     id: Optional[int] = Field(None, description="主键ID")
     name: str = Field("", description="任务名称")
     template_id: int = Field(..., description="模板ID")
-    schedule_type: str = Field("cron", description="cron|interval")
+    schedule_type: str = Field("cron", description="cron|interval|dependent|on_change")
     cron_expression: Optional[str] = Field(None, description="cron 表达式")
     interval_seconds: Optional[int] = Field(None, description="间隔秒")
     is_active: bool = Field(True, description="是否激活")
     next_run_time: Optional[datetime] = Field(None, description="下次运行时间")
     override_config: Optional[Dict[str, Any]] = Field(None, description="覆盖配置")
+    retention_days: Optional[int] = Field(None, description="运行记录保留天数")
+    upstream_job_ids: List[int] = Field(
+        default_factory=list, description="上游依赖任务ID"
+    )
     created_at: Optional[datetime] = Field(None, description="创建时间")
     updated_at: Optional[datetime] = Field(None, description="更新时间")
 
@@ -44,7 +48,51 @@ class JobRunModel(BaseModel):
     duration_ms: Optional[int] = Field(None)
     rows_affected: Optional[int] = Field(None)
     result: Optional[Any] = Field(None)
+    result_size: Optional[int] = Field(None, description="结果存储字节数")
     error: Optional[str] = Field(None)
+    dag_run_id: Optional[int] = Field(None, description="所属 DAG 运行ID")
+    metrics: Optional[Dict[str, Any]] = Field(None, description="分阶段耗时与资源指标")
 
     class Config:
         from_attributes = True
+
+
+class JobRunShardModel(BaseModel):
+    id: Optional[int] = Field(None, description="主键ID")
+    run_id: int = Field(..., description="父运行记录ID")
+    shard_index: int = Field(..., description="分片序号")
+    shard_key: str = Field("", description="分片范围或分区名")
+    status: str = Field("success", description="success|failed")
+    attempts: int = Field(1, description="执行次数（含重试）")
+    rows_affected: Optional[int] = Field(None)
+    duration_ms: Optional[int] = Field(None)
+    error: Optional[str] = Field(None)
+    started_at: Optional[datetime] = Field(None)
+    finished_at: Optional[datetime] = Field(None)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DagRunModel(BaseModel):
+    id: Optional[int] = Field(None, description="主键ID")
+    root_job_id: int = Field(..., description="触发本次 DAG 运行的根任务ID")
+    status: str = Field("running", description="running|success|failed")
+    started_at: Optional[datetime] = Field(None)
+    finished_at: Optional[datetime] = Field(None)
+    duration_ms: Optional[int] = Field(None, description="整体耗时")
+    critical_path_ms: Optional[int] = Field(None, description="关键路径耗时")
+    critical_path: Optional[List[int]] = Field(None, description="关键路径任务ID")
+    created_at: Optional[datetime] = Field(None)
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobWatermarkModel(BaseModel):
+    job_id: int = Field(..., description="任务ID")
+    watermark_value: Optional[str] = Field(None, description="当前高水位（字符串编码）")
+    value_type: str = Field("none", description="水位值类型")
+    total_rows: int = Field(0, description="累计处理行数")
+    run_count: int = Field(0, description="累计成功推进次数")
+    updated_at: Optional[datetime] = Field(None, description="更新时间")
+
+    model_config = ConfigDict(from_attributes=True)
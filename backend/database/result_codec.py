@@ -0,0 +1,62 @@
+import base64
+import json
+import uuid
+import zlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+
+# 存储格式：首字节标记编码方式，其后为紧凑 JSON（超过阈值时 zlib 压缩）
+PLAIN = b"j"
+ZLIB = b"z"
+# 小结果压缩收益不抵头部开销，直接存原文
+COMPRESS_THRESHOLD = 512
+COMPRESS_LEVEL = 6
+
+
+def _default(obj: Any) -> Any:
+    """数据库驱动返回的常见非 JSON 类型"""
+    if isinstance(obj, Decimal):
+        # 保留精度，避免转 float 丢失尾数
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        raw = bytes(obj)
+        try:
+            return raw.decode("utf-8")
+        except UnicodeDecodeError:
+            return base64.b64encode(raw).decode("ascii")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_compact(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
+
+
+def encode_result(obj: Any) -> bytes:
+    """运行结果编码为 job_runs.result_blob"""
+    raw = dumps_compact(obj).encode("utf-8")
+    if len(raw) >= COMPRESS_THRESHOLD:
+        compressed = zlib.compress(raw, COMPRESS_LEVEL)
+        if len(compressed) < len(raw):
+            return ZLIB + compressed
+    return PLAIN + raw
+
+
+def decode_result(blob: Optional[bytes]) -> Any:
+    if not blob:
+        return None
+    blob = bytes(blob)
+    marker, payload = blob[:1], blob[1:]
+    if marker == ZLIB:
+        payload = zlib.decompress(payload)
+    elif marker != PLAIN:
+        raise ValueError(f"未知的结果编码: {marker!r}")
+    return json.loads(payload.decode("utf-8"))
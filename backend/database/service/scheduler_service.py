@@ -1,12 +1,26 @@
-from typing import List, Optional, Dict, Any
+import re
+from collections import defaultdict
+from typing import List, Optional, Dict, Any, Iterable, Set, Tuple
 from pymysql.cursors import DictCursor
 from backend.database.dao.scheduler_dao import SchedulerDAO
 from backend.database.model.scheduler import (
     JobTemplateModel,
     ScheduledJobModel,
     JobRunModel,
+    DagRunModel,
+    JobWatermarkModel,
+    JobRunShardModel,
 )
 
+# 支持的模板类型
+TEMPLATE_TYPES = ("db_query", "incremental_query")
+# 分片执行策略：按整数键范围切分，或按 Doris 分区切分
+SHARD_STRATEGIES = ("key_range", "doris_partition")
+# 源表变更探测方式：MySQL 读表元数据更新时间或 CHECKSUM（Doris 固定按分区版本）
+WATCH_MODES = ("update_time", "checksum")
+# 更新任务时需与模板配置合并后重新校验的字段
+JOB_CONFIG_FIELDS = {"template_id", "schedule_type", "override_config"}
+
 
 class SchedulerService:
     def __init__(self, cursor: DictCursor):
@@ -16,6 +30,9 @@ class SchedulerService:
     def create_template(self, data: Dict[str, Any]) -> JobTemplateModel:
         if self.dao.get_template_by_name(data["name"]):
             raise ValueError("模板名称已存在")
+        self._validate_template(
+            data.get("template_type", "db_query"), data.get("default_config") or {}
+        )
         return self.dao.create_template(data)
 
     def get_template(self, template_id: int) -> Optional[JobTemplateModel]:
@@ -27,37 +44,269 @@ class SchedulerService:
     def update_template(
         self, template_id: int, update: Dict[str, Any]
     ) -> Optional[JobTemplateModel]:
+        if "default_config" in update or "template_type" in update:
+            current = self.dao.get_template_by_id(template_id)
+            if not current:
+                return None
+            self._validate_template(
+                update.get("template_type", current.template_type),
+                update.get("default_config", current.default_config) or {},
+            )
         return self.dao.update_template(template_id, update)
 
+    def _validate_template(self, template_type: str, config: Dict[str, Any]):
+        if template_type not in TEMPLATE_TYPES:
+            raise ValueError(f"不支持的模板类型: {template_type}")
+        if template_type == "incremental_query":
+            self._validate_incremental(config)
+        if config.get("sharding"):
+            self._validate_sharding(template_type, config)
+        if config.get("retry"):
+            self._validate_retry(config["retry"])
+        if "watch_tables" in config or "watch_mode" in config:
+            self._validate_watch(config)
+
+    def _validate_incremental(self, config: Dict[str, Any]):
+        """水位参数必须出现在 SQL 中；没有初始水位时首次运行绑定 NULL，
+        `col > NULL` 查不到任何数据、水位永远无法推进，因此要求 SQL 显式处理 NULL"""
+        if not config.get("watermark_column"):
+            raise ValueError("增量查询模板需要配置 watermark_column")
+        sql = config.get("sql")
+        if not sql:
+            # sql 可由任务覆盖配置提供
+            return
+        placeholder = f"%({config.get('watermark_param') or 'watermark'})s"
+        if placeholder not in sql:
+            raise ValueError(f"增量查询的 SQL 需以 {placeholder} 引用当前水位")
+        if config.get("initial_watermark") is None and not re.search(
+            re.escape(placeholder) + r"\s+IS\s+NULL", sql, re.IGNORECASE
+        ):
+            raise ValueError(
+                f"增量查询需要配置 initial_watermark，"
+                f"或在 SQL 中以 {placeholder} IS NULL 处理首次运行"
+            )
+
+    def _validate_watch(self, config: Dict[str, Any]):
+        tables = config.get("watch_tables")
+        if not isinstance(tables, list) or not tables:
+            raise ValueError("watch_tables 必须是非空的表名列表")
+        if not all(isinstance(t, str) and t for t in tables):
+            raise ValueError("watch_tables 中的表名必须是字符串")
+        mode = config.get("watch_mode", "update_time")
+        if mode not in WATCH_MODES:
+            raise ValueError(f"不支持的变更探测方式: {mode}")
+
+    def _validate_retry(self, retry: Any):
+        if not isinstance(retry, dict):
+            raise ValueError("retry 配置必须是对象")
+        for key, minimum in (
+            ("max_attempts", 1),
+            ("backoff_ms", 0),
+            ("max_backoff_ms", 0),
+        ):
+            value = retry.get(key)
+            if value is None:
+                continue
+            if not isinstance(value, int) or isinstance(value, bool) or value < minimum:
+                raise ValueError(f"retry.{key} 必须是不小于 {minimum} 的整数")
+
+    def _validate_sharding(self, template_type: str, config: Dict[str, Any]):
+        sharding = config["sharding"]
+        if template_type != "db_query":
+            raise ValueError("仅 db_query 模板支持分片执行")
+        if not isinstance(sharding, dict):
+            raise ValueError("sharding 配置必须是对象")
+        strategy = sharding.get("strategy")
+        if strategy not in SHARD_STRATEGIES:
+            raise ValueError(f"不支持的分片策略: {strategy}")
+        sql = config.get("sql") or ""
+        if strategy == "key_range":
+            if not sharding.get("column"):
+                raise ValueError("key_range 分片需要配置 column")
+            has_bounds = sharding.get("min") is not None and sharding.get("max") is not None
+            if not has_bounds and not sharding.get("table"):
+                raise ValueError("key_range 分片需要配置 table 或 min/max")
+            if "%(shard_start)s" not in sql or "%(shard_end)s" not in sql:
+                raise ValueError(
+                    "key_range 分片的 SQL 需以 %(shard_start)s、%(shard_end)s 引用分片范围"
+                )
+        else:
+            if not sharding.get("table") and not sharding.get("partitions"):
+                raise ValueError("doris_partition 分片需要配置 table 或 partitions")
+            if "{partition}" not in sql:
+                raise ValueError("doris_partition 分片的 SQL 需包含 {partition} 占位符")
+
     def delete_template(self, template_id: int) -> bool:
         return self.dao.delete_template(template_id)
 
     # Jobs
     def create_job(self, data: Dict[str, Any]) -> ScheduledJobModel:
-        if not self.dao.get_template_by_id(data["template_id"]):
+        template = self.dao.get_template_by_id(data["template_id"])
+        if not template:
             raise ValueError("模板不存在")
-        return self.dao.create_job(data)
+        self._validate_job(data, template)
+        upstream_ids = list(data.pop("upstream_job_ids", None) or [])
+        self._validate_upstreams(None, upstream_ids)
+        job = self.dao.create_job(data)
+        if upstream_ids:
+            self.dao.set_upstream_ids(job.id, upstream_ids)
+            job.upstream_job_ids = sorted(upstream_ids)
+        return job
+
+    def create_jobs(self, items: List[Dict[str, Any]]) -> List[ScheduledJobModel]:
+        """批量创建任务：模板一次查询，每项按所属模板校验，上游任务校验一次，多行插入"""
+        template_ids = sorted({item["template_id"] for item in items})
+        templates = {t.id: t for t in self.dao.get_templates_by_ids(template_ids)}
+        missing = set(template_ids) - set(templates)
+        if missing:
+            raise ValueError(f"模板不存在: {sorted(missing)}")
+        for item in items:
+            self._validate_job(item, templates[item["template_id"]])
+        upstreams = [
+            sorted(set(item.pop("upstream_job_ids", None) or [])) for item in items
+        ]
+        self._check_jobs_exist({u for ups in upstreams for u in ups}, "上游任务")
+        job_ids = self.dao.create_jobs(items)
+        self.dao.replace_upstream_ids(
+            {job_id: ups for job_id, ups in zip(job_ids, upstreams) if ups}
+        )
+        return self._attach_upstreams(self.dao.get_jobs_by_ids(job_ids))
 
     def get_job(self, job_id: int) -> Optional[ScheduledJobModel]:
-        return self.dao.get_job_by_id(job_id)
+        job = self.dao.get_job_by_id(job_id)
+        return self._attach_upstreams([job])[0] if job else None
 
     def list_jobs(self, skip: int = 0, limit: int = 100) -> List[ScheduledJobModel]:
-        return self.dao.list_jobs(skip, limit)
+        return self._attach_upstreams(self.dao.list_jobs(skip, limit))
 
     def list_active_jobs(self) -> List[ScheduledJobModel]:
-        return self.dao.list_active_jobs()
+        return self._attach_upstreams(self.dao.list_active_jobs())
 
     def update_job(
         self, job_id: int, update: Dict[str, Any]
     ) -> Optional[ScheduledJobModel]:
-        return self.dao.update_job(job_id, update)
+        if update.keys() & JOB_CONFIG_FIELDS:
+            current = self.dao.get_job_by_id(job_id)
+            if not current:
+                return None
+            self._validate_job_update(current, update)
+        upstream_ids = update.pop("upstream_job_ids", None)
+        if upstream_ids is not None:
+            if not self.dao.get_job_by_id(job_id):
+                return None
+            self._validate_upstreams(job_id, upstream_ids)
+            self.dao.set_upstream_ids(job_id, upstream_ids)
+        job = self.dao.update_job(job_id, update)
+        return self._attach_upstreams([job])[0] if job else None
+
+    def update_jobs(self, items: List[Dict[str, Any]]) -> List[ScheduledJobModel]:
+        """批量更新任务，每项需包含 id；依赖环检测只加载一次依赖图"""
+        job_ids = [item["id"] for item in items]
+        if len(set(job_ids)) != len(job_ids):
+            raise ValueError("批量更新中存在重复的任务ID")
+        self._check_jobs_exist(set(job_ids), "任务")
+        changed = [item for item in items if item.keys() & JOB_CONFIG_FIELDS]
+        if changed:
+            current = {
+                job.id: job
+                for job in self.dao.get_jobs_by_ids([item["id"] for item in changed])
+            }
+            for item in changed:
+                self._validate_job_update(current[item["id"]], item)
+        upstream_updates: Dict[int, List[int]] = {}
+        for item in items:
+            upstream_ids = item.pop("upstream_job_ids", None)
+            if upstream_ids is not None:
+                upstream_updates[item["id"]] = sorted(set(upstream_ids))
+        self._validate_upstream_updates(upstream_updates)
+        self.dao.update_jobs_fields(items)
+        self.dao.replace_upstream_ids(upstream_updates)
+        return self._attach_upstreams(self.dao.get_jobs_by_ids(job_ids))
 
     def delete_job(self, job_id: int) -> bool:
         return self.dao.delete_job(job_id)
 
+    def _validate_job_update(self, current: ScheduledJobModel, update: Dict[str, Any]):
+        merged = {
+            field: update.get(field, getattr(current, field))
+            for field in JOB_CONFIG_FIELDS
+        }
+        template = self.dao.get_template_by_id(merged["template_id"])
+        if not template:
+            raise ValueError("模板不存在")
+        self._validate_job(merged, template)
+
+    def _validate_job(self, job: Dict[str, Any], template: JobTemplateModel):
+        """按模板默认配置合并任务覆盖配置后，按模板类型校验生效配置；
+        on_change 任务还必须有监听的源表，否则注册后永远不会触发"""
+        config = {**(template.default_config or {}), **(job.get("override_config") or {})}
+        if job.get("schedule_type") == "on_change" and not config.get("watch_tables"):
+            raise ValueError("on_change 任务需要在模板或覆盖配置中指定 watch_tables")
+        self._validate_template(template.template_type, config)
+
+    def delete_jobs(self, job_ids: List[int]) -> List[int]:
+        """批量删除任务，返回实际删除的任务ID"""
+        existing = sorted(self.dao.list_existing_job_ids(list(set(job_ids))))
+        self.dao.delete_jobs(existing)
+        return existing
+
+    # Dependencies
+    def list_dependencies(self, active_only: bool = False) -> List[Tuple[int, int]]:
+        return self.dao.list_dependencies(active_only)
+
+    def _attach_upstreams(
+        self, jobs: List[ScheduledJobModel]
+    ) -> List[ScheduledJobModel]:
+        upstreams = self.dao.get_upstream_ids([job.id for job in jobs])
+        for job in jobs:
+            job.upstream_job_ids = upstreams.get(job.id, [])
+        return jobs
+
+    def _validate_upstreams(self, job_id: Optional[int], upstream_ids: List[int]):
+        if job_id is None:
+            self._check_jobs_exist(set(upstream_ids), "上游任务")
+            return
+        self._validate_upstream_updates({job_id: list(set(upstream_ids))})
+
+    def _validate_upstream_updates(self, updates: Dict[int, List[int]]):
+        """校验一批上游依赖变更：不能自依赖、上游须存在、变更后不能成环"""
+        if not updates:
+            return
+        for job_id, upstream_ids in updates.items():
+            if job_id in upstream_ids:
+                raise ValueError("任务不能依赖自身")
+        self._check_jobs_exist(
+            {u for upstream_ids in updates.values() for u in upstream_ids}, "上游任务"
+        )
+        upstreams: Dict[int, Set[int]] = defaultdict(set)
+        for downstream, upstream in self.dao.list_dependencies():
+            upstreams[downstream].add(upstream)
+        # 先应用全部变更再逐个检测，覆盖批内任务之间形成的环
+        for job_id, upstream_ids in updates.items():
+            upstreams[job_id] = set(upstream_ids)
+        for job_id, upstream_ids in updates.items():
+            cycle = _find_cycle(upstreams, job_id, upstream_ids)
+            if cycle:
+                path = " -> ".join(str(node) for node in reversed(cycle))
+                raise ValueError(f"任务依赖存在环: {path}")
+
+    def _check_jobs_exist(self, job_ids: Set[int], label: str):
+        if not job_ids:
+            return
+        missing = job_ids - set(self.dao.list_existing_job_ids(sorted(job_ids)))
+        if missing:
+            raise ValueError(f"{label}不存在: {sorted(missing)}")
+
     # Runs
-    def start_run(self, job_id: int) -> JobRunModel:
-        return self.dao.create_job_run({"job_id": job_id, "status": "running"})
+    def start_run(self, job_id: int, dag_run_id: Optional[int] = None) -> int:
+        """登记一次运行，返回运行记录ID"""
+        return self.dao.insert_job_run(
+            {"job_id": job_id, "status": "running", "dag_run_id": dag_run_id}
+        )
+
+    def finish_runs(self, updates: List[Dict[str, Any]]) -> int:
+        """批量写回运行结果，每项需包含 id"""
+        return self.dao.finish_job_runs(updates)
 
     def finish_run(
         self,
@@ -65,7 +314,7 @@ class SchedulerService:
         status: str,
         duration_ms: Optional[int] = None,
         rows_affected: Optional[int] = None,
-        result: Optional[str] = None,
+        result: Optional[Any] = None,
         error: Optional[str] = None,
     ) -> Optional[JobRunModel]:
         data: Dict[str, Any] = {"status": status}
@@ -78,3 +327,138 @@ class SchedulerService:
         if error is not None:
             data["error"] = error
         return self.dao.finish_job_run(run_id, data)
+
+    def get_run(self, run_id: int) -> Optional[JobRunModel]:
+        """单条运行记录，含结果"""
+        return self.dao.get_job_run_by_id(run_id)
+
+    def list_job_runs(
+        self,
+        job_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+    ) -> List[JobRunModel]:
+        return self.dao.list_job_runs(job_id, skip, limit, before_id)
+
+    def list_run_metrics(
+        self, job_id: int, limit: int = 100
+    ) -> Tuple[List[JobRunModel], Dict[str, Dict[str, float]]]:
+        """最近运行的指标及按指标汇总的 avg/p50/p95/max"""
+        runs = self.dao.list_run_metrics(job_id, limit)
+        return runs, _summarize_metrics(runs)
+
+    def record_run_shards(self, run_id: int, shards: List[Dict[str, Any]]) -> int:
+        return self.dao.insert_run_shards(run_id, shards)
+
+    def list_run_shards(self, run_id: int) -> List[JobRunShardModel]:
+        return self.dao.list_run_shards(run_id)
+
+    # DAG runs
+    def start_dag_run(self, root_job_id: int) -> int:
+        return self.dao.create_dag_run(root_job_id)
+
+    def finish_dag_run(self, dag_run_id: int, **data: Any) -> bool:
+        return self.dao.finish_dag_run(dag_run_id, data) > 0
+
+    def get_dag_run(self, dag_run_id: int) -> Optional[DagRunModel]:
+        return self.dao.get_dag_run_by_id(dag_run_id)
+
+    def list_dag_runs(
+        self, root_job_id: Optional[int] = None, limit: int = 100
+    ) -> List[DagRunModel]:
+        return self.dao.list_dag_runs(root_job_id, limit)
+
+    def list_runs_by_dag_run(self, dag_run_id: int) -> List[JobRunModel]:
+        return self.dao.list_runs_by_dag_run(dag_run_id)
+
+    # Watermarks
+    def get_watermark(self, job_id: int) -> Optional[JobWatermarkModel]:
+        return self.dao.get_watermark(job_id)
+
+    def load_watermark(
+        self, job_id: int, initial_value: Optional[str], value_type: str
+    ) -> JobWatermarkModel:
+        """读取任务水位，不存在时以初始值创建"""
+        self.dao.init_watermark(job_id, initial_value, value_type)
+        return self.dao.get_watermark(job_id)
+
+    def advance_watermark(
+        self,
+        job_id: int,
+        expected_value: Optional[str],
+        watermark_value: Optional[str],
+        value_type: str,
+        rows: int,
+    ) -> bool:
+        return self.dao.advance_watermark(
+            job_id, expected_value, watermark_value, value_type, rows
+        )
+
+    def reset_watermark(
+        self, job_id: int, watermark_value: Optional[str], value_type: str
+    ) -> JobWatermarkModel:
+        self.dao.reset_watermark(job_id, watermark_value, value_type)
+        return self.dao.get_watermark(job_id)
+
+    # Retention
+    def list_retention_days(self, default_days: int) -> List[int]:
+        return self.dao.list_retention_days(default_days)
+
+    def prune_expired_runs(
+        self, retention_days: int, default_days: int, limit: int, archive: bool
+    ) -> int:
+        """清理一批过期运行记录，返回处理条数（0 表示已清理完）"""
+        run_ids = self.dao.list_expired_run_ids(retention_days, default_days, limit)
+        if archive:
+            self.dao.archive_job_runs(run_ids)
+        return self.dao.delete_job_runs(run_ids)
+
+    def purge_archived_runs(self, retention_days: int, limit: int) -> int:
+        return self.dao.purge_archived_runs(retention_days, limit)
+
+    def fail_stale_runs(self, stale_seconds: int, limit: int) -> int:
+        """一批遗留的 running 记录标记为失败，返回处理条数"""
+        return self.dao.fail_stale_runs(
+            stale_seconds,
+            f"运行超过 {stale_seconds} 秒仍未结束，执行进程可能已异常退出",
+            limit,
+        )
+
+
+def _find_cycle(
+    upstreams: Dict[int, Set[int]], job_id: int, new_upstreams: Iterable[int]
+) -> Optional[List[int]]:
+    """为 job_id 设置 new_upstreams 后若成环，返回沿上游方向的环路径"""
+    stack: List[Tuple[int, List[int]]] = [
+        (upstream, [job_id, upstream]) for upstream in new_upstreams
+    ]
+    visited: Set[int] = set()
+    while stack:
+        node, path = stack.pop()
+        if node == job_id:
+            return path
+        if node in visited:
+            continue
+        visited.add(node)
+        for upstream in upstreams.get(node, ()):
+            stack.append((upstream, path + [upstream]))
+    return None
+
+
+def _summarize_metrics(runs: List[JobRunModel]) -> Dict[str, Dict[str, float]]:
+    values: Dict[str, List[float]] = defaultdict(list)
+    for run in runs:
+        for key, value in (run.metrics or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                values[key].append(value)
+    summary: Dict[str, Dict[str, float]] = {}
+    for key, items in values.items():
+        items.sort()
+        summary[key] = {
+            "avg": round(sum(items) / len(items), 3),
+            "p50": items[len(items) // 2],
+            "p95": items[min(len(items) - 1, int(len(items) * 0.95))],
+            "max": items[-1],
+        }
+    return summary
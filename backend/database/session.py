@@ -221,6 +221,7 @@ def create_tables():
             is_active BOOLEAN DEFAULT TRUE,
             next_run_time TIMESTAMP NULL,
             override_config JSON NULL,
+            retention_days INT NULL COMMENT '运行记录保留天数，NULL 使用全局默认',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (template_id) REFERENCES job_templates(id) ON DELETE CASCADE
@@ -237,14 +238,144 @@ def create_tables():
             finished_at TIMESTAMP NULL,
             duration_ms INT NULL,
             rows_affected INT NULL,
-            result LONGTEXT NULL,
+            result LONGTEXT NULL COMMENT '旧版 JSON 文本结果，新运行写入 result_blob',
+            result_blob LONGBLOB NULL COMMENT '紧凑编码（可压缩）的运行结果',
+            result_size INT NULL COMMENT '结果编码后的存储字节数',
             error LONGTEXT NULL,
+            dag_run_id INT NULL,
+            metrics JSON NULL COMMENT '分阶段耗时与资源指标',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_job_runs_job_id_id (job_id, id),
+            INDEX idx_job_runs_created_at (created_at),
+            INDEX idx_job_runs_dag_run_id (dag_run_id),
+            INDEX idx_job_runs_status_started_at (status, started_at),
             FOREIGN KEY (job_id) REFERENCES scheduled_jobs(id) ON DELETE CASCADE
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
         """
         cursor.execute(create_job_runs_table)
 
+        # 过期运行记录的归档表：不保存 result 大字段，不受任务删除级联影响
+        create_job_runs_archive_table = """
+        CREATE TABLE IF NOT EXISTS job_runs_archive (
+            id INT PRIMARY KEY,
+            job_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            started_at TIMESTAMP NULL,
+            finished_at TIMESTAMP NULL,
+            duration_ms INT NULL,
+            rows_affected INT NULL,
+            error TEXT NULL,
+            metrics JSON NULL,
+            created_at TIMESTAMP NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_job_runs_archive_job_id_id (job_id, id),
+            INDEX idx_job_runs_archive_created_at (created_at)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        cursor.execute(create_job_runs_archive_table)
+
+        # 任务依赖（DAG）：job_id 依赖 upstream_job_id
+        create_job_dependencies_table = """
+        CREATE TABLE IF NOT EXISTS job_dependencies (
+            job_id INT NOT NULL,
+            upstream_job_id INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, upstream_job_id),
+            INDEX idx_job_dependencies_upstream (upstream_job_id),
+            FOREIGN KEY (job_id) REFERENCES scheduled_jobs(id) ON DELETE CASCADE,
+            FOREIGN KEY (upstream_job_id) REFERENCES scheduled_jobs(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        cursor.execute(create_job_dependencies_table)
+
+        create_dag_runs_table = """
+        CREATE TABLE IF NOT EXISTS dag_runs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            root_job_id INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            started_at TIMESTAMP NULL,
+            finished_at TIMESTAMP NULL,
+            duration_ms INT NULL COMMENT '整体耗时',
+            critical_path_ms INT NULL COMMENT '关键路径耗时',
+            critical_path JSON NULL COMMENT '关键路径上的任务ID',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_dag_runs_root_job_id_id (root_job_id, id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        cursor.execute(create_dag_runs_table)
+
+        # 增量任务水位：每个任务一行，成功后以比较交换方式推进
+        create_job_watermarks_table = """
+        CREATE TABLE IF NOT EXISTS job_watermarks (
+            job_id INT PRIMARY KEY,
+            watermark_value VARCHAR(255) NULL COMMENT '当前高水位（字符串编码）',
+            value_type VARCHAR(16) NOT NULL DEFAULT 'none' COMMENT '水位值类型',
+            total_rows BIGINT NOT NULL DEFAULT 0 COMMENT '累计处理行数',
+            run_count INT NOT NULL DEFAULT 0 COMMENT '累计成功推进次数',
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (job_id) REFERENCES scheduled_jobs(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        cursor.execute(create_job_watermarks_table)
+
+        # 分片执行的子任务记录，随父运行记录级联删除
+        create_job_run_shards_table = """
+        CREATE TABLE IF NOT EXISTS job_run_shards (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            run_id INT NOT NULL,
+            shard_index INT NOT NULL,
+            shard_key VARCHAR(255) NOT NULL COMMENT '分片范围或分区名',
+            status VARCHAR(20) NOT NULL,
+            attempts INT NOT NULL DEFAULT 1,
+            rows_affected INT NULL,
+            duration_ms INT NULL,
+            error TEXT NULL,
+            started_at TIMESTAMP NULL,
+            finished_at TIMESTAMP NULL,
+            UNIQUE KEY uk_job_run_shards_run_shard (run_id, shard_index),
+            FOREIGN KEY (run_id) REFERENCES job_runs(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+        """
+        cursor.execute(create_job_run_shards_table)
+
+        # 已存在的旧表补齐新增列与索引
+        ensure_column(cursor, "scheduled_jobs", "retention_days", "INT NULL")
+        ensure_column(cursor, "job_runs", "dag_run_id", "INT NULL")
+        ensure_column(cursor, "job_runs", "metrics", "JSON NULL")
+        ensure_column(cursor, "job_runs_archive", "metrics", "JSON NULL")
+        ensure_column(cursor, "job_runs", "result_blob", "LONGBLOB NULL")
+        ensure_column(cursor, "job_runs", "result_size", "INT NULL")
+        ensure_index(cursor, "job_runs", "idx_job_runs_job_id_id", "job_id, id")
+        ensure_index(cursor, "job_runs", "idx_job_runs_dag_run_id", "dag_run_id")
+        ensure_index(cursor, "job_runs", "idx_job_runs_created_at", "created_at")
+        ensure_index(
+            cursor, "job_runs", "idx_job_runs_status_started_at", "status, started_at"
+        )
+
+
+def ensure_column(cursor, table: str, column: str, definition: str):
+    """列不存在时追加列（MySQL 不支持 ADD COLUMN IF NOT EXISTS）"""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME=%s AND COLUMN_NAME=%s",
+        (table, column),
+    )
+    if not cursor.fetchone():
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        logger.info(f"added column {table}.{column}")
+
+
+def ensure_index(cursor, table: str, index: str, columns: str):
+    """索引不存在时创建索引"""
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA=DATABASE() AND TABLE_NAME=%s AND INDEX_NAME=%s",
+        (table, index),
+    )
+    if not cursor.fetchone():
+        cursor.execute(f"ALTER TABLE {table} ADD INDEX {index} ({columns})")
+        logger.info(f"added index {table}.{index}")
+
 
 def get_connection_info(self):
     """获取连接信息（用于调试）"""
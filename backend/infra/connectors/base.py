@@ -1,6 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Iterator
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from contextlib import contextmanager
+import logging
+import re
+import time
+
+_IDENTIFIER = re.compile(r"^[A-Za-z0-9_$]+$")
+# 语句末尾的 LIMIT：LIMIT n、LIMIT offset, n 或 LIMIT n OFFSET offset
+_TRAILING_LIMIT = re.compile(
+    r"\blimit\s+(?:(\d+)\s*,\s*)?(\d+)(?:\s+offset\s+\d+)?\s*$", re.IGNORECASE
+)
+_SELECT_PREFIX = re.compile(r"^select\b", re.IGNORECASE)
+
+logger = logging.getLogger("DatabaseConnector")
 
 
 class DatabaseConnector(ABC):
@@ -37,11 +49,143 @@ class DatabaseConnector(ABC):
         """执行SQL查询（返回完整结果）"""
         pass
 
+    # execute_query_profiled 使用的非缓冲字典游标类（如 pymysql 的 SSDictCursor），由各引擎指定
+    profiling_cursor_class: Optional[type] = None
+
+    def execute_query_profiled(
+        self, sql: str, params: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """执行SQL查询并分别统计建连、服务端执行与取数耗时（毫秒）
+
+        非缓冲游标的 execute 在收到结果集元数据后返回，行数据在 fetch 阶段读取；
+        未指定 profiling_cursor_class 的连接器只统计整体耗时（计入 execute_ms）。
+        """
+        if self.profiling_cursor_class is None:
+            start = time.perf_counter()
+            result = self.execute_query(sql, params)
+            return result, {"execute_ms": (time.perf_counter() - start) * 1000}
+        log = getattr(self, "logger", logger)
+        engine = getattr(self, "db_type", type(self).__name__)
+        timings: Dict[str, float] = {}
+        try:
+            log.info(f"Executing {engine} query (profiled): {sql[:100]}...")
+            start = time.perf_counter()
+            with self.get_connection() as connection:
+                timings["connect_ms"] = (time.perf_counter() - start) * 1000
+                with connection.cursor(self.profiling_cursor_class) as cursor:
+                    start = time.perf_counter()
+                    if params:
+                        cursor.execute(sql, params)
+                    else:
+                        cursor.execute(sql)
+                    timings["execute_ms"] = (time.perf_counter() - start) * 1000
+                    start = time.perf_counter()
+                    result = cursor.fetchall()
+                    timings["fetch_ms"] = (time.perf_counter() - start) * 1000
+                    log.info(
+                        f"{engine} query executed successfully, returned {len(result)} rows"
+                    )
+                    return list(result), timings
+        except Exception as e:
+            log.error(f"Failed to execute {engine} query: {str(e)}")
+            raise Exception(f"Failed to execute query: {str(e)}")
+
+    def get_table_versions(
+        self, tables: List[str], mode: str = "update_time"
+    ) -> Dict[str, Optional[str]]:
+        """批量返回各表的版本标识（一次元数据探测），标识变化即视为表数据有变更
+
+        tables 中的表名可带库名前缀（db.table），表不存在时对应值为 None。
+        默认不支持，由各连接器按自身元数据实现。
+        """
+        raise NotImplementedError(f"{type(self).__name__} 不支持表变更检测")
+
+    def get_schema(self) -> Dict[str, Dict[str, Any]]:
+        """批量返回默认库所有表的结构，供元数据索引使用
+
+        返回 {表名: {"comment": 表注释, "columns": [{"field", "type", "comment"}]}}。
+        默认逐表调用 get_table_structure，子类可用一次元数据查询实现。
+        """
+        schema = {}
+        for table in self.get_tables():
+            columns = self.get_table_structure(table)
+            schema[table] = {
+                "comment": None,
+                "columns": [
+                    {"field": c["field"], "type": c["type"], "comment": None}
+                    for c in columns
+                ],
+            }
+        return schema
+
+    def _get_schema_from_information_schema(self) -> Dict[str, Dict[str, Any]]:
+        """MySQL 协议数据库：两条 information_schema 查询取得全部表与列"""
+        schema: Dict[str, Dict[str, Any]] = {}
+        with self.get_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT TABLE_NAME, TABLE_COMMENT FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA=%s",
+                    (self.database,),
+                )
+                for table, comment in cursor.fetchall():
+                    schema[table] = {"comment": comment or None, "columns": []}
+                cursor.execute(
+                    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, COLUMN_COMMENT "
+                    "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA=%s "
+                    "ORDER BY TABLE_NAME, ORDINAL_POSITION",
+                    (self.database,),
+                )
+                for table, field, column_type, comment in cursor.fetchall():
+                    if table in schema:
+                        schema[table]["columns"].append(
+                            {"field": field, "type": column_type, "comment": comment or None}
+                        )
+        return schema
+
+    def limit_query(
+        self, sql: str, max_rows: int, timeout_seconds: Optional[float] = None
+    ) -> str:
+        """给只读查询加上行数上限，结果集在服务端截断；SELECT 开头时附带执行超时提示
+
+        不外包子查询（联表查询的同名列在派生表中会报重复列）：语句末尾已有 LIMIT 时
+        取两者较小值，否则在末尾追加 LIMIT（换行追加，避免被末尾的行注释吞掉）。
+        """
+        max_rows = int(max_rows)
+        match = _TRAILING_LIMIT.search(sql)
+        if match:
+            count = min(int(match.group(2)), max_rows)
+            sql = f"{sql[: match.start(2)]}{count}{sql[match.end(2):]}"
+        else:
+            sql = f"{sql}\nLIMIT {max_rows}"
+        if timeout_seconds and _SELECT_PREFIX.match(sql):
+            hint = self._timeout_hint(timeout_seconds)
+            if hint:
+                sql = f"SELECT {hint}{sql[6:].lstrip()}"
+        return sql
+
+    def _timeout_hint(self, timeout_seconds: float) -> str:
+        """查询级超时的优化器提示，默认不支持"""
+        return ""
+
+    def split_table_name(self, name: str) -> Tuple[str, str]:
+        """拆分 db.table，未带库名时使用连接器默认库；校验标识符防止注入"""
+        schema, _, table = name.rpartition(".")
+        schema = schema or self.database
+        for part in (schema, table):
+            if not _IDENTIFIER.match(part or ""):
+                raise ValueError(f"非法的表名: {name}")
+        return schema, table
+
     @abstractmethod
     def execute_query_iterator(
-        self, sql: str, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        read_only: bool = False,
     ) -> Iterator[List[Dict[str, Any]]]:
-        """执行SQL查询（返回迭代器，分批获取结果）"""
+        """执行SQL查询（返回迭代器，分批获取结果）；read_only 时在数据库支持的只读事务中执行"""
         pass
 
     @abstractmethod
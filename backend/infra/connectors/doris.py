@@ -1,3 +1,4 @@
+import hashlib
 import pymysql
 from typing import List, Dict, Any, Optional, Iterator
 from contextlib import contextmanager
@@ -8,6 +9,8 @@ import logging
 class DorisConnector(DatabaseConnector):
     """Doris数据库连接器（使用MySQL协议）"""
 
+    profiling_cursor_class = pymysql.cursors.SSDictCursor
+
     def __init__(
         self, host: str, port: int, username: str, password: str, database: str
     ):
@@ -99,16 +102,74 @@ class DorisConnector(DatabaseConnector):
             self.logger.error(f"Failed to execute Doris query: {str(e)}")
             raise Exception(f"Failed to execute query: {str(e)}")
 
+    def get_table_versions(
+        self, tables: List[str], mode: str = "update_time"
+    ) -> Dict[str, Optional[str]]:
+        """按分区可见版本（VisibleVersion）判断变更，所有表复用同一连接
+
+        导入、删除等写入都会推进分区版本，mode 参数对 Doris 无区别。
+        """
+        if not tables:
+            return {}
+        versions: Dict[str, Optional[str]] = {}
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                    for name in tables:
+                        schema, table = self.split_table_name(name)
+                        try:
+                            cursor.execute(f"SHOW PARTITIONS FROM `{schema}`.`{table}`")
+                        except pymysql.err.MySQLError as e:
+                            self.logger.warning(f"Doris table {name} not probed: {e}")
+                            versions[name] = None
+                            continue
+                        partitions = sorted(
+                            f"{row['PartitionName']}:{row['VisibleVersion']}"
+                            for row in cursor.fetchall()
+                        )
+                        versions[name] = hashlib.md5(
+                            ",".join(partitions).encode("utf-8")
+                        ).hexdigest()
+            return versions
+        except Exception as e:
+            self.logger.error(f"Failed to probe Doris table versions: {str(e)}")
+            raise Exception(f"Failed to probe table versions: {str(e)}")
+
+    def get_schema(self) -> Dict[str, Dict[str, Any]]:
+        """一次读取默认库全部表与列（含注释）"""
+        try:
+            schema = self._get_schema_from_information_schema()
+            self.logger.info(
+                f"Retrieved schema of {len(schema)} tables from Doris database {self.database}"
+            )
+            return schema
+        except Exception as e:
+            self.logger.error(f"Failed to get Doris schema: {str(e)}")
+            raise Exception(f"Failed to get schema: {str(e)}")
+
+    def _timeout_hint(self, timeout_seconds: float) -> str:
+        """query_timeout 会话变量，单位秒"""
+        return f"/*+ SET_VAR(query_timeout = {max(int(timeout_seconds), 1)}) */ "
+
     def execute_query_iterator(
-        self, sql: str, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        read_only: bool = False,
     ) -> Iterator[List[Dict[str, Any]]]:
-        """执行SQL查询（返回迭代器，分批获取结果）"""
+        """执行SQL查询（返回迭代器，分批获取结果）
+
+        使用无缓冲游标，结果按批从服务端读取，不会整体载入内存。
+        Doris 不支持只读事务，read_only 不额外处理：查询语句本身不会写入，
+        写入只能通过 INSERT/DELETE 等语句，由调用方按语句类型拦截。
+        """
         try:
             self.logger.info(
                 f"Executing Doris query with iterator: {sql[:100]}... (batch_size: {batch_size})"
             )
             with self.get_connection() as connection:
-                with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
                     if params:
                         cursor.execute(sql, params)
                     else:
@@ -8,6 +8,8 @@ import logging
 class MySQLConnector(DatabaseConnector):
     """MySQL数据库连接器"""
 
+    profiling_cursor_class = pymysql.cursors.SSDictCursor
+
     def __init__(
         self, host: str, port: int, username: str, password: str, database: str
     ):
@@ -99,16 +101,98 @@ class MySQLConnector(DatabaseConnector):
             self.logger.error(f"Failed to execute MySQL query: {str(e)}")
             raise Exception(f"Failed to execute query: {str(e)}")
 
+    def get_table_versions(
+        self, tables: List[str], mode: str = "update_time"
+    ) -> Dict[str, Optional[str]]:
+        """update_time 模式读 information_schema.TABLES（一条语句覆盖所有表），
+        checksum 模式用 CHECKSUM TABLE（更准确，但需扫描表数据）"""
+        if not tables:
+            return {}
+        names = {name: self.split_table_name(name) for name in tables}
+        versions: Dict[str, Optional[str]] = {name: None for name in tables}
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                    if mode == "checksum":
+                        cursor.execute(
+                            "CHECKSUM TABLE "
+                            + ", ".join(f"`{s}`.`{t}`" for s, t in names.values())
+                        )
+                        checksums = {
+                            row["Table"]: row["Checksum"] for row in cursor.fetchall()
+                        }
+                        for name, (schema, table) in names.items():
+                            checksum = checksums.get(f"{schema}.{table}")
+                            if checksum is not None:
+                                versions[name] = str(checksum)
+                        return versions
+                    try:
+                        # MySQL 8 默认缓存表统计信息 24 小时，探测前关闭缓存
+                        cursor.execute("SET SESSION information_schema_stats_expiry=0")
+                    except pymysql.err.MySQLError:
+                        pass
+                    pairs = list(set(names.values()))
+                    cursor.execute(
+                        "SELECT TABLE_SCHEMA, TABLE_NAME, UPDATE_TIME, TABLE_ROWS, "
+                        "DATA_LENGTH FROM information_schema.TABLES "
+                        "WHERE (TABLE_SCHEMA, TABLE_NAME) IN ("
+                        + ", ".join(["(%s, %s)"] * len(pairs))
+                        + ")",
+                        [part for pair in pairs for part in pair],
+                    )
+                    rows = {
+                        (row["TABLE_SCHEMA"], row["TABLE_NAME"]): row
+                        for row in cursor.fetchall()
+                    }
+            for name, key in names.items():
+                row = rows.get(key)
+                if row is not None:
+                    # InnoDB 重启后 UPDATE_TIME 为空，结合数据量一起判断
+                    versions[name] = (
+                        f"{row['UPDATE_TIME']}|{row['TABLE_ROWS']}|{row['DATA_LENGTH']}"
+                    )
+            return versions
+        except Exception as e:
+            self.logger.error(f"Failed to probe MySQL table versions: {str(e)}")
+            raise Exception(f"Failed to probe table versions: {str(e)}")
+
+    def get_schema(self) -> Dict[str, Dict[str, Any]]:
+        """一次读取默认库全部表与列（含注释）"""
+        try:
+            schema = self._get_schema_from_information_schema()
+            self.logger.info(
+                f"Retrieved schema of {len(schema)} tables from MySQL database {self.database}"
+            )
+            return schema
+        except Exception as e:
+            self.logger.error(f"Failed to get MySQL schema: {str(e)}")
+            raise Exception(f"Failed to get schema: {str(e)}")
+
+    def _timeout_hint(self, timeout_seconds: float) -> str:
+        """只对 SELECT 生效，单位毫秒"""
+        return f"/*+ MAX_EXECUTION_TIME({int(timeout_seconds * 1000)}) */ "
+
     def execute_query_iterator(
-        self, sql: str, params: Optional[Dict[str, Any]] = None, batch_size: int = 1000
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+        read_only: bool = False,
     ) -> Iterator[List[Dict[str, Any]]]:
-        """执行SQL查询（返回迭代器，分批获取结果）"""
+        """执行SQL查询（返回迭代器，分批获取结果）
+
+        使用无缓冲游标，结果按批从服务端读取，不会整体载入内存。
+        read_only 时在只读事务中执行，EXPLAIN ANALYZE、WITH ... UPDATE 等
+        实际会写入的语句由服务端拒绝；连接关闭时事务随之回滚。
+        """
         try:
             self.logger.info(
                 f"Executing MySQL query with iterator: {sql[:100]}... (batch_size: {batch_size})"
             )
             with self.get_connection() as connection:
-                with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+                    if read_only:
+                        cursor.execute("START TRANSACTION READ ONLY")
                     if params:
                         cursor.execute(sql, params)
                     else:
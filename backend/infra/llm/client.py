@@ -1,27 +1,72 @@
-from langchain.schema import HumanMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+import threading
+from typing import Any, Callable, Dict, Optional
 
-from backend.config import settings
+from backend.config import LLMSettings, settings
 
-print(settings.llm.model)
-print(settings.llm.api_key)
-print(settings.llm.temperature)
-print(settings.llm.timeout)
 
+_PROVIDERS: Dict[str, Callable[[LLMSettings], Any]] = {}
 
-# gemini-2.5-pro
-# gemini-2.0-flash-lite
 
+def register_provider(name: str):
+    """注册聊天模型的构造函数，SDK 在构造函数内导入"""
 
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-lite",
-    google_api_key=settings.llm.api_key,
-    temperature=0.3,
-    timeout=settings.llm.timeout,
-)
+    def decorator(factory: Callable[[LLMSettings], Any]):
+        _PROVIDERS[name] = factory
+        return factory
+
+    return decorator
+
+
+@register_provider("google")
+def _google(cfg: LLMSettings):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=cfg.model,
+        google_api_key=cfg.api_key,
+        temperature=cfg.temperature,
+        timeout=cfg.timeout,
+    )
+
+
+def create_llm(cfg: Optional[LLMSettings] = None):
+    """按 LLM_PROVIDER 创建聊天模型"""
+    cfg = cfg or settings.llm
+    factory = _PROVIDERS.get(cfg.provider)
+    if factory is None:
+        raise ValueError(f"Unsupported LLM provider: {cfg.provider}")
+    return factory(cfg)
+
+
+class LazyLLM:
+    """聊天模型的延迟代理：首次访问属性时才导入 SDK 并创建客户端（线程安全）
+
+    导入本模块不加载 langchain，只使用调度器或元数据接口的进程不必承担其导入开销。
+    """
+
+    def __init__(self, factory: Callable[[], Any] = create_llm):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name: str):
+        return getattr(self.client, name)
+
+
+llm = LazyLLM()
 
 
 if __name__ == "__main__":
+    from langchain.schema import HumanMessage, SystemMessage
+
     messages = [
         SystemMessage(
             content="请从用户输入的文本中提取出mysql的链接信息。用json格式返回。返回值包含host,port,user,password,database,charset"
@@ -0,0 +1,33 @@
+from typing import List, Optional
+
+
+class LazyEmbeddings:
+    """Google 向量模型客户端，首次调用时才导入 langchain_google_genai 并创建"""
+
+    def __init__(self, model: str, api_key: str = ""):
+        self.model = model
+        self.api_key = api_key
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            self._client = GoogleGenerativeAIEmbeddings(
+                model=self.model, google_api_key=self.api_key
+            )
+        return self._client
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.client.embed_query(text)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.client.aembed_query(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_documents(texts)
+
+
+def create_embeddings(model: Optional[str], api_key: str = "") -> Optional[LazyEmbeddings]:
+    return LazyEmbeddings(model, api_key) if model else None
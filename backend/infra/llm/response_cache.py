@@ -0,0 +1,307 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时只启用精确匹配
+    np = None
+
+from langchain.schema import AIMessage, BaseMessage, HumanMessage
+
+from backend.infra.llm.embeddings import create_embeddings
+
+
+logger = logging.getLogger("llm_response_cache")
+
+_SPACES = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?？!！。.,，;；~～]+$")
+
+
+def normalize_text(text: str) -> str:
+    """全半角、大小写、空白与句末标点归一"""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    return _TRAILING_PUNCT.sub("", _SPACES.sub(" ", text).strip())
+
+
+def _digest(parts: Sequence[Tuple[str, str]]) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _message_text(message: BaseMessage) -> str:
+    """参与缓存键的内容：归一化文本，以及助手消息请求的工具调用"""
+    text = normalize_text(message.content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        calls = [(c.get("name"), c.get("args")) for c in tool_calls]
+        text += json.dumps(calls, ensure_ascii=False, sort_keys=True, default=str)
+    return text
+
+
+def cache_keys(messages: Sequence[BaseMessage]) -> Tuple[str, str, Optional[str]]:
+    """返回 (精确键, 上下文键, 末条用户问题)
+
+    精确键覆盖全部消息；上下文键覆盖末条用户消息之前的部分，语义匹配只在
+    上下文键相同的条目间进行，避免不同对话背景下的相似问题互相命中。
+    """
+    parts = [(type(m).__name__, _message_text(m)) for m in messages]
+    exact = _digest(parts)
+    if not messages or not isinstance(messages[-1], HumanMessage):
+        return exact, exact, None
+    return exact, _digest(parts[:-1]), parts[-1][1]
+
+
+class _Entry:
+    def __init__(
+        self,
+        text: str,
+        tool_calls: List[Dict[str, Any]],
+        context_key: str,
+        expires_at: float,
+    ):
+        self.text = text
+        # 只保存工具名与参数，命中时由调用方重新分配调用 id
+        self.tool_calls = tool_calls
+        self.context_key = context_key
+        self.expires_at = expires_at
+
+    def message(self) -> AIMessage:
+        tool_calls = [dict(c, id=None) for c in self.tool_calls]
+        return AIMessage(content=self.text, tool_calls=tool_calls)
+
+
+class _VectorIndex:
+    """同一上下文下的问题向量（已归一化），按余弦相似度做精确最近邻检索
+
+    单个上下文下的条目数受缓存总量限制，矩阵乘法检索足够快，不引入 ANN 依赖。
+    矩阵按容量预分配、写满时翻倍扩容，删除时用末行填补空位，避免每次增删都复制整个矩阵。
+    """
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = max(capacity, 1)
+        self.keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self.matrix = None
+
+    def add(self, key: str, vector):
+        size = len(self.keys)
+        if self.matrix is None:
+            self.matrix = np.empty((self.capacity, vector.shape[0]), dtype=np.float32)
+        elif size == self.matrix.shape[0]:
+            grown = np.empty((size * 2, self.matrix.shape[1]), dtype=np.float32)
+            grown[:size] = self.matrix
+            self.matrix = grown
+        self.matrix[size] = vector
+        self._rows[key] = size
+        self.keys.append(key)
+
+    def remove(self, key: str):
+        index = self._rows.pop(key, None)
+        if index is None:
+            return
+        last = len(self.keys) - 1
+        if index != last:
+            moved = self.keys[last]
+            self.matrix[index] = self.matrix[last]
+            self.keys[index] = moved
+            self._rows[moved] = index
+        self.keys.pop()
+
+    def search(self, vector) -> Tuple[Optional[str], float]:
+        if not self.keys:
+            return None, 0.0
+        scores = self.matrix[: len(self.keys)] @ vector
+        best = int(np.argmax(scores))
+        return self.keys[best], float(scores[best])
+
+
+class ResponseCache:
+    """LLM 回复缓存（线程安全）
+
+    第一层按归一化后的完整输入精确匹配；开启语义匹配且已安装 numpy 时，未精确命中的
+    请求再以末条用户问题的向量在同一上下文下检索，相似度不低于阈值即命中。
+    缓存内容为模型一步的输出：文本以及请求的工具调用，命中工具调用时工具仍会实际执行。
+    条目按 TTL 过期，超过容量时按 LRU 淘汰。
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 600,
+        max_entries: int = 1000,
+        embed: Optional[Callable[[str], Any]] = None,
+        similarity: float = 0.95,
+    ):
+        self.ttl = ttl_seconds
+        self.max_entries = max(max_entries, 0)
+        self.similarity = similarity
+        if embed is not None and np is None:
+            logger.warning("numpy 未安装，LLM 回复缓存仅启用精确匹配")
+            embed = None
+        # 异步函数：问题文本 -> 向量
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._indexes: Dict[str, _VectorIndex] = {}
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.embed is not None
+
+    def _get_exact(self, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._evict(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _evict(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        index = self._indexes.get(entry.context_key)
+        if index is not None:
+            index.remove(key)
+            if not index.keys:
+                del self._indexes[entry.context_key]
+
+    async def _vector(self, question: str):
+        vector = np.asarray(await self.embed(question), dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    async def lookup(
+        self, messages: Sequence[BaseMessage]
+    ) -> Tuple[Optional[AIMessage], Any]:
+        """返回 (缓存的模型输出, 写回时复用的查询状态)"""
+        exact, context_key, question = cache_keys(messages)
+        entry = self._get_exact(exact)
+        if entry is not None:
+            self.hits += 1
+            return entry.message(), None
+        vector = None
+        if self.semantic and question:
+            try:
+                vector = await self._vector(question)
+            except Exception as e:
+                logger.warning(f"embed question failed: {e}")
+            if vector is not None:
+                with self._lock:
+                    index = self._indexes.get(context_key)
+                    key, score = index.search(vector) if index else (None, 0.0)
+                if key is not None and score >= self.similarity:
+                    entry = self._get_exact(key)
+                    if entry is not None:
+                        self.hits += 1
+                        self.semantic_hits += 1
+                        return entry.message(), None
+        self.misses += 1
+        return None, (exact, context_key, vector)
+
+    def store(self, state: Any, message: Any):
+        """写回模型一步的输出；内容不是纯文本或既无文本也无工具调用时不缓存"""
+        if not state or self.max_entries <= 0:
+            return
+        text = getattr(message, "content", None)
+        if not isinstance(text, str):
+            return
+        tool_calls = [
+            {"name": c.get("name"), "args": c.get("args") or {}}
+            for c in getattr(message, "tool_calls", None) or []
+        ]
+        if not text and not tool_calls:
+            return
+        exact, context_key, vector = state
+        with self._lock:
+            self._evict(exact)
+            self._entries[exact] = _Entry(
+                text, tool_calls, context_key, time.monotonic() + self.ttl
+            )
+            if vector is not None:
+                self._indexes.setdefault(context_key, _VectorIndex()).add(exact, vector)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "semantic": self.semantic,
+        }
+
+    def wrap(self, llm) -> "CachedChatModel":
+        return CachedChatModel(llm, self)
+
+
+class CachedChatModel:
+    """在聊天模型前加一层回复缓存，提供 ainvoke/astream"""
+
+    def __init__(self, llm, cache: ResponseCache):
+        self.llm = llm
+        self.cache = cache
+
+    async def ainvoke(self, messages: List[BaseMessage], **kwargs) -> BaseMessage:
+        cached, state = await self.cache.lookup(messages)
+        if cached is not None:
+            return cached
+        response = await self.llm.ainvoke(messages, **kwargs)
+        self.cache.store(state, response)
+        return response
+
+    async def astream(self, messages: List[BaseMessage], **kwargs) -> AsyncIterator[Any]:
+        cached, state = await self.cache.lookup(messages)
+        if cached is not None:
+            yield cached
+            return
+        message = None
+        async for chunk in self.llm.astream(messages, **kwargs):
+            # 分片相加后得到完整的文本与工具调用
+            message = chunk if message is None else message + chunk
+            yield chunk
+        # 只缓存完整生成的输出，客户端中途断开时不会执行到这里
+        if message is not None:
+            self.cache.store(state, message)
+
+
+def create_response_cache(cfg, api_key: str = "") -> ResponseCache:
+    """按对话配置创建回复缓存
+
+    开启语义匹配时使用 embedding_model 计算问题向量；未配置向量模型时告警并仅启用精确匹配。
+    """
+    embed = None
+    if cfg.response_cache_semantic:
+        embeddings = create_embeddings(cfg.embedding_model, api_key)
+        if embeddings is None:
+            logger.warning("未配置 embedding_model，LLM 回复缓存仅启用精确匹配")
+        else:
+            embed = embeddings.aembed_query
+    return ResponseCache(
+        ttl_seconds=cfg.response_cache_ttl_seconds,
+        max_entries=cfg.response_cache_max_entries if cfg.response_cache_enabled else 0,
+        embed=embed,
+        similarity=cfg.response_cache_similarity,
+    )
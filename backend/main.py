@@ -332,6 +332,12 @@ def on_startup():
         logger.info("Starting scheduler...")
         scheduler_manager.start()
         logger.info("Scheduler started successfully")
+
+        if settings.chat.schema_index_enabled:
+            # 后台预建元数据索引，首个对话请求无需等待
+            from backend.chat.schema_index import schema_index
+
+            schema_index.maybe_refresh()
     except Exception as e:
         logger.error(f"Failed to start scheduler: {e}")
         import traceback
@@ -339,6 +345,12 @@ def on_startup():
         logger.error(f"Traceback: {traceback.format_exc()}")
 
 
+@app.on_event("shutdown")
+def on_shutdown():
+    # 停止调度器并写回尚未落库的运行记录
+    scheduler_manager.shutdown()
+
+
 @app.get("/api/connections")
 def get_connections():
     """获取所有数据库连接 - 兼容性端点"""
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.database.service.scheduler_service import WATCH_MODES
+from backend.infra.connectors.base import DatabaseConnector
+from backend.scheduler.plan_cache import JobPlan
+
+
+logger = logging.getLogger("change_watcher")
+
+
+class _WatchGroup:
+    """同一连接器、同一探测方式下的所有监听任务，共用一次元数据探测"""
+
+    def __init__(self, plan: JobPlan, mode: str):
+        self.connector = plan.connector
+        self.mode = mode
+        self.tables: Set[str] = set()
+        self.jobs: List[Tuple[int, List[str]]] = []
+
+
+class ChangeWatcher:
+    """源表变更触发
+
+    on_change 任务不注册定时触发，由本组件周期性探测其 watch_tables 的元数据版本，
+    版本变化时触发任务。探测按连接器合并：同一连接器上的所有任务共享一次查询，
+    首次探测只记录基线，不触发。
+    """
+
+    def __init__(
+        self,
+        plan_loader: Callable[[int], JobPlan],
+        connect: Callable[[Any], DatabaseConnector],
+        on_change: Callable[[int], Any],
+        max_workers: int = 4,
+    ):
+        self.plan_loader = plan_loader
+        self.connect = connect
+        self.on_change = on_change
+        self.max_workers = max(max_workers, 1)
+        self._lock = threading.Lock()
+        # job_id -> 两次触发之间的最小间隔（秒）
+        self._jobs: Dict[int, float] = {}
+        self._last_fired: Dict[int, float] = {}
+        self._pending: Set[int] = set()
+        # (connector_id, mode, table) -> 最近一次探测到的版本
+        self._versions: Dict[Tuple[int, str, str], Optional[str]] = {}
+
+    def register(self, job_id: int, min_interval_seconds: Optional[int] = None):
+        with self._lock:
+            self._jobs[job_id] = float(min_interval_seconds or 0)
+
+    def unregister(self, job_id: int) -> bool:
+        with self._lock:
+            self._last_fired.pop(job_id, None)
+            self._pending.discard(job_id)
+            return self._jobs.pop(job_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _group_jobs(self) -> List[_WatchGroup]:
+        with self._lock:
+            job_ids = list(self._jobs)
+        groups: Dict[Tuple[int, str], _WatchGroup] = {}
+        for job_id in job_ids:
+            try:
+                plan = self.plan_loader(job_id)
+            except Exception as e:
+                logger.warning(f"job {job_id} not watched: {e}")
+                continue
+            tables = plan.config.get("watch_tables") or []
+            mode = plan.config.get("watch_mode") or "update_time"
+            if not tables or mode not in WATCH_MODES:
+                logger.warning(f"job {job_id} has invalid watch_tables/watch_mode")
+                continue
+            group = groups.get((plan.connector.id, mode))
+            if group is None:
+                group = groups[(plan.connector.id, mode)] = _WatchGroup(plan, mode)
+            group.tables.update(tables)
+            group.jobs.append((job_id, list(tables)))
+        return list(groups.values())
+
+    def poll(self) -> Dict[str, int]:
+        """探测一轮，返回探测的连接器数、表数与触发的任务数"""
+        groups = self._group_jobs()
+        if not groups:
+            return {"connectors": 0, "tables": 0, "triggered": 0}
+        workers = min(self.max_workers, len(groups))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="change-watch"
+        ) as pool:
+            triggered = sum(pool.map(self._poll_group, groups))
+        return {
+            "connectors": len({g.connector.id for g in groups}),
+            "tables": sum(len(g.tables) for g in groups),
+            "triggered": triggered,
+        }
+
+    def _poll_group(self, group: _WatchGroup) -> int:
+        connector_id = group.connector.id
+        try:
+            versions = self.connect(group.connector).get_table_versions(
+                sorted(group.tables), group.mode
+            )
+        except Exception as e:
+            logger.error(f"probe connector {connector_id} failed: {e}")
+            return 0
+        changed: Set[str] = set()
+        with self._lock:
+            for table, version in versions.items():
+                # 探测不到（表不存在或无权限）时保留上次版本，不视为变更
+                if version is None:
+                    continue
+                key = (connector_id, group.mode, table)
+                if key in self._versions and self._versions[key] != version:
+                    changed.add(table)
+                self._versions[key] = version
+            # 变更先记为待触发，未到最小间隔或被拒绝（如上一次仍在运行）的留到下一轮
+            for job_id, tables in group.jobs:
+                if changed.intersection(tables):
+                    self._pending.add(job_id)
+        if changed:
+            logger.info(f"connector {connector_id} tables changed: {sorted(changed)}")
+        triggered = 0
+        now = time.monotonic()
+        for job_id, _ in group.jobs:
+            if not self._due(job_id, now):
+                continue
+            try:
+                fired = self.on_change(job_id) is not None
+            except Exception as e:
+                logger.error(f"change trigger of job {job_id} failed: {e}")
+                fired = False
+            with self._lock:
+                if fired:
+                    self._pending.discard(job_id)
+                    self._last_fired[job_id] = now
+                    triggered += 1
+        return triggered
+
+    def _due(self, job_id: int, now: float) -> bool:
+        with self._lock:
+            if job_id not in self._pending:
+                return False
+            min_interval = self._jobs.get(job_id)
+            if min_interval is None:
+                return False
+            last = self._last_fired.get(job_id)
+            return last is None or now - last >= min_interval
@@ -0,0 +1,162 @@
+import logging
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymysql import err as pymysql_err
+
+
+logger = logging.getLogger("circuit_breaker")
+
+# MySQL 客户端/服务端的连接类错误码：无法连接、连接中断、连接数耗尽、握手失败等
+CONNECTION_ERROR_CODES = {
+    1040, 1042, 1043, 1047, 1053, 1129, 1130,
+    2002, 2003, 2005, 2006, 2013, 2026, 2055,
+}
+
+# 半开状态下单次探测的最长等待时间（秒）
+PROBE_TIMEOUT = 300
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """沿异常链判断是否为连接类故障（连接器会把底层异常包装为通用 Exception）"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, (socket.timeout, TimeoutError, ConnectionError)):
+            return True
+        if isinstance(exc, pymysql_err.InterfaceError):
+            return True
+        if isinstance(exc, pymysql_err.OperationalError):
+            code = exc.args[0] if exc.args else None
+            if code in CONNECTION_ERROR_CODES:
+                return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+class _BreakerState:
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_seconds = 0.0
+        self.opened_at: Optional[float] = None
+        self.retry_at: Optional[float] = None
+        self.probing = False
+        self.probe_started = 0.0
+        self.last_error: Optional[str] = None
+
+
+class CircuitBreakerRegistry:
+    """按连接器维护的熔断器
+
+    连续 failure_threshold 次连接类失败后熔断 open_seconds 秒，期间该连接器的任务
+    直接跳过或延后；到期后进入半开状态，只放行一次探测运行，成功则恢复，
+    失败则熔断时长翻倍（不超过 max_open_seconds）。
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        open_seconds: float = 30,
+        max_open_seconds: float = 600,
+    ):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max(max_open_seconds, open_seconds)
+        self._states: Dict[int, _BreakerState] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.base_open_seconds > 0
+
+    def allow(self, connector_id: int) -> Tuple[bool, float]:
+        """是否放行一次运行；拒绝时同时返回距离可重试的秒数"""
+        if not self.enabled:
+            return True, 0.0
+        with self._lock:
+            state = self._states.get(connector_id)
+            if state is None or state.state == CLOSED:
+                return True, 0.0
+            now = time.time()
+            if state.state == OPEN and now >= state.retry_at:
+                state.state = HALF_OPEN
+                state.probing = False
+            # 探测运行超过 PROBE_TIMEOUT 仍未回报结果（如中途异常退出），允许重新探测
+            probe_expired = state.probing and now - state.probe_started > PROBE_TIMEOUT
+            if state.state == HALF_OPEN and (not state.probing or probe_expired):
+                state.probing = True
+                state.probe_started = now
+                logger.info(f"connector {connector_id} breaker half-open, probing")
+                return True, 0.0
+            if state.state == HALF_OPEN:
+                # 探测进行中：retry_at 已过，按一个熔断周期（不超过探测超时）延后，
+                # 否则调用方会以 0 秒立即重试、白白消耗重试次数
+                probe_remaining = state.probe_started + PROBE_TIMEOUT - now
+                return False, max(min(state.open_seconds, probe_remaining), 1.0)
+            return False, max(state.retry_at - now, 0.0)
+
+    def record_success(self, connector_id: int):
+        with self._lock:
+            state = self._states.get(connector_id)
+            if state is None:
+                return
+            if state.state != CLOSED:
+                logger.info(f"connector {connector_id} breaker closed")
+            self._states.pop(connector_id, None)
+
+    def record_failure(self, connector_id: int, error: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            state = self._states.setdefault(connector_id, _BreakerState())
+            state.consecutive_failures += 1
+            state.last_error = error[:500]
+            if state.state == HALF_OPEN:
+                state.open_seconds = min(
+                    state.open_seconds * 2 or self.base_open_seconds,
+                    self.max_open_seconds,
+                )
+                self._open(connector_id, state)
+            elif (
+                state.state == CLOSED
+                and state.consecutive_failures >= self.failure_threshold
+            ):
+                state.open_seconds = self.base_open_seconds
+                self._open(connector_id, state)
+
+    def _open(self, connector_id: int, state: _BreakerState):
+        now = time.time()
+        state.state = OPEN
+        state.probing = False
+        state.opened_at = now
+        state.retry_at = now + state.open_seconds
+        logger.warning(
+            f"connector {connector_id} breaker opened for {state.open_seconds:.0f}s "
+            f"after {state.consecutive_failures} failures: {state.last_error}"
+        )
+
+    def reset(self, connector_id: int) -> bool:
+        with self._lock:
+            return self._states.pop(connector_id, None) is not None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "connector_id": connector_id,
+                    "state": state.state,
+                    "consecutive_failures": state.consecutive_failures,
+                    "open_seconds": state.open_seconds,
+                    "opened_at": state.opened_at,
+                    "retry_at": state.retry_at,
+                    "last_error": state.last_error,
+                }
+                for connector_id, state in sorted(self._states.items())
+            ]
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Set, Tuple
+
+from backend.database.session import db_connection
+from backend.database.service.scheduler_service import SchedulerService
+
+
+logger = logging.getLogger("scheduler_dag")
+
+
+class DagRun:
+    """一次 DAG 运行的内存状态（线程安全）"""
+
+    def __init__(
+        self,
+        dag_run_id: int,
+        root_job_id: int,
+        nodes: Set[int],
+        upstreams: Dict[int, Set[int]],
+        downstreams: Dict[int, Set[int]],
+    ):
+        self.id = dag_run_id
+        self.root_job_id = root_job_id
+        self.nodes = nodes
+        # 仅保留本次运行可达范围内的依赖边
+        self.upstreams = {n: upstreams.get(n, set()) & nodes for n in nodes}
+        self.downstreams = {n: downstreams.get(n, set()) & nodes for n in nodes}
+        self.started_at = time.time()
+        self.running: Set[int] = {root_job_id}
+        self.results: Dict[int, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def node_finished(
+        self, job_id: int, status: str, duration_ms: int
+    ) -> Tuple[List[int], bool]:
+        """记录节点结果，返回（可触发的下游节点, DAG 是否已结束）"""
+        ready: List[int] = []
+        with self._lock:
+            self.running.discard(job_id)
+            self.results[job_id] = (status, duration_ms)
+            if status == "success":
+                for downstream in sorted(self.downstreams.get(job_id, ())):
+                    if downstream in self.running or downstream in self.results:
+                        continue
+                    if all(
+                        self.results.get(u, ("",))[0] == "success"
+                        for u in self.upstreams[downstream]
+                    ):
+                        ready.append(downstream)
+                self.running.update(ready)
+            return ready, not self.running
+
+    @property
+    def status(self) -> str:
+        if len(self.results) == len(self.nodes) and all(
+            status == "success" for status, _ in self.results.values()
+        ):
+            return "success"
+        return "failed"
+
+    def critical_path(self) -> Tuple[int, List[int]]:
+        """已执行节点上按耗时加权的最长依赖路径"""
+        executed = set(self.results)
+        indegree = {n: len(self.upstreams[n] & executed) for n in executed}
+        queue = deque(n for n, d in indegree.items() if d == 0)
+        best: Dict[int, Tuple[int, List[int]]] = {}
+        while queue:
+            node = queue.popleft()
+            prev_ms, prev_path = max(
+                (best[u] for u in self.upstreams[node] & executed),
+                default=(0, []),
+                key=lambda item: item[0],
+            )
+            best[node] = (prev_ms + self.results[node][1], prev_path + [node])
+            for downstream in self.downstreams[node] & executed:
+                indegree[downstream] -= 1
+                if indegree[downstream] == 0:
+                    queue.append(downstream)
+        return max(best.values(), default=(0, []), key=lambda item: item[0])
+
+
+class DagCoordinator:
+    """任务依赖协调器
+
+    维护依赖图缓存；有下游的任务运行时开启一次 DAG 运行，上游成功后
+    由调度器把就绪的下游任务提交到执行线程池，互不依赖的分支并行执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._upstreams: Dict[int, Set[int]] = {}
+        self._downstreams: Dict[int, Set[int]] = {}
+        self._runs: Dict[int, DagRun] = {}
+
+    def reload(self):
+        """从数据库重新加载依赖图（停用的下游任务不参与 DAG 运行）"""
+        with db_connection.get_cursor() as cursor:
+            edges = SchedulerService(cursor).list_dependencies(active_only=True)
+        upstreams: Dict[int, Set[int]] = defaultdict(set)
+        downstreams: Dict[int, Set[int]] = defaultdict(set)
+        for job_id, upstream_id in edges:
+            upstreams[job_id].add(upstream_id)
+            downstreams[upstream_id].add(job_id)
+        with self._lock:
+            self._upstreams = dict(upstreams)
+            self._downstreams = dict(downstreams)
+        logger.info(f"loaded {len(edges)} job dependencies")
+
+    def has_downstream(self, job_id: int) -> bool:
+        return bool(self._downstreams.get(job_id))
+
+    def _reachable(self, root_job_id: int) -> Set[int]:
+        nodes = {root_job_id}
+        queue = deque([root_job_id])
+        while queue:
+            for downstream in self._downstreams.get(queue.popleft(), ()):
+                if downstream not in nodes:
+                    nodes.add(downstream)
+                    queue.append(downstream)
+        return nodes
+
+    def start_run(self, root_job_id: int) -> int:
+        """以 root_job_id 为起点开启一次 DAG 运行，返回 dag_run_id"""
+        with db_connection.get_cursor() as cursor:
+            dag_run_id = SchedulerService(cursor).start_dag_run(root_job_id)
+        with self._lock:
+            self._runs[dag_run_id] = DagRun(
+                dag_run_id,
+                root_job_id,
+                self._reachable(root_job_id),
+                self._upstreams,
+                self._downstreams,
+            )
+        return dag_run_id
+
+    def node_finished(
+        self, dag_run_id: int, job_id: int, status: str, duration_ms: int
+    ) -> List[int]:
+        """记录节点完成，返回应立即触发的下游任务ID"""
+        run = self._runs.get(dag_run_id)
+        if not run:
+            logger.warning(f"dag run {dag_run_id} not found in memory")
+            return []
+        ready, finished = run.node_finished(job_id, status, duration_ms)
+        if finished:
+            with self._lock:
+                self._runs.pop(dag_run_id, None)
+            self._finish_run(run)
+        return ready
+
+    def _finish_run(self, run: DagRun):
+        critical_ms, critical_path = run.critical_path()
+        try:
+            with db_connection.get_cursor() as cursor:
+                SchedulerService(cursor).finish_dag_run(
+                    run.id,
+                    status=run.status,
+                    finished_at=datetime.now(),
+                    duration_ms=int((time.time() - run.started_at) * 1000),
+                    critical_path_ms=critical_ms,
+                    critical_path=critical_path,
+                )
+        except Exception as e:
+            logger.error(f"failed to record dag run {run.id}: {e}")
+        logger.info(
+            f"dag run {run.id} {run.status}, critical path {critical_path} "
+            f"({critical_ms} ms)"
+        )
@@ -0,0 +1,182 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from backend.scheduler.rate_limit import RateLimiter
+
+
+logger = logging.getLogger("job_dispatcher")
+
+
+class TriggerPriority(IntEnum):
+    """数值越小越先执行"""
+
+    DAG = 0
+    MANUAL = 1
+    SCHEDULED = 2
+
+
+class DispatchRejected(Exception):
+    """触发请求未被接受"""
+
+
+class DuplicateTrigger(DispatchRejected):
+    """同一任务已有排队或运行中的触发"""
+
+
+class TriggerRateLimited(DispatchRejected):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DispatchQueueFull(DispatchRejected):
+    """触发队列已满"""
+
+
+class TriggerTicket:
+    """一次触发请求"""
+
+    def __init__(
+        self,
+        job_id: int,
+        priority: TriggerPriority,
+        dedup: bool,
+        kwargs: Dict[str, Any],
+        scheduled_at: Optional[float] = None,
+    ):
+        self.job_id = job_id
+        self.priority = priority
+        self.dedup = dedup
+        self.kwargs = kwargs
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        # 计划触发时间到入队之间的延迟，仅定时触发有；入队前确定，执行时一定可见
+        self.trigger_lag_ms: Optional[float] = None
+        if scheduled_at is not None:
+            self.trigger_lag_ms = max((self.enqueued_at - scheduled_at) * 1000, 0)
+
+
+class JobDispatcher:
+    """任务触发分发器
+
+    定时、手动与 DAG 下游触发统一进入有界优先级队列，由固定数量的工作线程执行。
+    同一任务排队或运行中时拒绝重复触发；手动触发按任务令牌桶限流。
+
+    DAG 下游触发属于已接受的运行，不受去重、限流与队列上限约束：
+    DagCoordinator 保证同一 DAG 运行中每个节点只提交一次，入队数量受 DAG 规模
+    约束、已在根任务被接受时确定；上游完成后被拒绝的下游不会有人重新提交，
+    整个 DAG 运行会停在 running。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[TriggerTicket], Any],
+        workers: int = 20,
+        max_queue: int = 1000,
+        job_rate_per_minute: float = 6,
+        job_burst: int = 2,
+    ):
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        self.job_limiter = RateLimiter(job_rate_per_minute / 60, job_burst)
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._active: Set[int] = set()
+        self._running = 0
+        self._threads: List[threading.Thread] = []
+        self._stop_event = threading.Event()
+        self.rejected: Dict[str, int] = {"duplicate": 0, "rate_limited": 0, "queue_full": 0}
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop_event.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._loop, name=f"job-dispatcher-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"job dispatcher started with {self.workers} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """停止工作线程，未执行的排队触发被丢弃"""
+        if not self._threads:
+            return
+        self._stop_event.set()
+        for _ in self._threads:
+            self._queue.put((-1, next(self._seq), None))
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info("job dispatcher stopped")
+
+    def submit(
+        self,
+        job_id: int,
+        priority: TriggerPriority,
+        dedup: bool = True,
+        rate_limit: bool = False,
+        scheduled_at: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TriggerTicket:
+        """提交触发请求，被拒绝时抛出 DispatchRejected 子类"""
+        bypass = priority == TriggerPriority.DAG
+        with self._lock:
+            if dedup and job_id in self._active:
+                self.rejected["duplicate"] += 1
+                raise DuplicateTrigger(f"任务 {job_id} 已在排队或运行中")
+            if not bypass and self._queue.qsize() >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise DispatchQueueFull("触发队列已满，请稍后重试")
+            if rate_limit:
+                wait = self.job_limiter.try_acquire(job_id)
+                if wait is not None:
+                    self.rejected["rate_limited"] += 1
+                    raise TriggerRateLimited(
+                        f"任务 {job_id} 触发过于频繁", retry_after=wait
+                    )
+            if dedup:
+                self._active.add(job_id)
+        ticket = TriggerTicket(job_id, priority, dedup, kwargs, scheduled_at)
+        self._queue.put((int(priority), next(self._seq), ticket))
+        return ticket
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def running(self) -> int:
+        return self._running
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending(),
+            "running": self._running,
+            "workers": self.workers,
+            "rejected": dict(self.rejected),
+        }
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            _, _, ticket = self._queue.get()
+            if ticket is None:
+                break
+            with self._lock:
+                self._running += 1
+            ticket.started_at = time.time()
+            try:
+                self.handler(ticket)
+            except Exception as e:
+                logger.error(f"job {ticket.job_id} dispatch failed: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    if ticket.dedup:
+                        self._active.discard(ticket.job_id)
@@ -0,0 +1,68 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# 增量查询模板类型
+INCREMENTAL_TEMPLATE_TYPE = "incremental_query"
+DEFAULT_WATERMARK_PARAM = "watermark"
+
+
+def encode_watermark(value: Any) -> Tuple[Optional[str], str]:
+    """水位值编码为 (字符串, 类型标记) 以便落库"""
+    if value is None:
+        return None, "none"
+    if isinstance(value, bool):
+        return str(int(value)), "int"
+    if isinstance(value, int):
+        return str(value), "int"
+    if isinstance(value, Decimal):
+        return str(value), "decimal"
+    if isinstance(value, float):
+        return repr(value), "float"
+    if isinstance(value, datetime):
+        return value.isoformat(), "datetime"
+    if isinstance(value, date):
+        return value.isoformat(), "date"
+    return str(value), "str"
+
+
+def decode_watermark(raw: Optional[str], value_type: str) -> Any:
+    """从落库的字符串与类型标记还原水位值"""
+    if raw is None or value_type == "none":
+        return None
+    if value_type == "int":
+        return int(raw)
+    if value_type == "decimal":
+        return Decimal(raw)
+    if value_type == "float":
+        return float(raw)
+    if value_type == "datetime":
+        return datetime.fromisoformat(raw)
+    if value_type == "date":
+        return date.fromisoformat(raw)
+    return raw
+
+
+def advance_watermark(
+    rows: Iterable[Dict[str, Any]], column: str, current: Any
+) -> Any:
+    """取结果中水位列的最大值，没有新数据时保持当前水位"""
+    values = [row.get(column) for row in rows]
+    values = [v for v in values if v is not None]
+    if not values:
+        return current
+    latest = max(values)
+    if current is None:
+        return latest
+    try:
+        return max(current, latest)
+    except TypeError:
+        # 初始水位类型与列类型不一致（如字符串与 datetime），以查询结果为准
+        return latest
+
+
+def build_params(cfg: Dict[str, Any], watermark: Any) -> Dict[str, Any]:
+    """把当前水位注入 SQL 参数，SQL 中以 %(watermark)s 引用"""
+    params = dict(cfg.get("params") or {})
+    params[cfg.get("watermark_param") or DEFAULT_WATERMARK_PARAM] = watermark
+    return params
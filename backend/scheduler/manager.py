@@ -1,45 +1,237 @@
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+from apscheduler.events import (
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_SUBMITTED,
+)
+from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import logging
+import threading
 import time
-import json
 
+from backend.config import settings
 from backend.database.session import db_connection
 from backend.database.service.scheduler_service import SchedulerService
 from backend.database.service.connector_service import ConnectorService
+from backend.database.model.scheduler import JobWatermarkModel
+from backend.database.result_codec import encode_result
 from backend.infra.connectors import get_connector_instance
+from backend.scheduler.change_watcher import ChangeWatcher
+from backend.scheduler.circuit_breaker import (
+    CircuitBreakerRegistry,
+    is_connection_error,
+)
+from backend.scheduler.dag import DagCoordinator
+from backend.scheduler.dispatcher import (
+    DispatchQueueFull,
+    DispatchRejected,
+    DuplicateTrigger,
+    JobDispatcher,
+    TriggerPriority,
+    TriggerRateLimited,
+    TriggerTicket,
+)
+from backend.scheduler.metrics import SchedulerMetrics
+from backend.scheduler.plan_cache import JobPlan, JobPlanCache
+from backend.scheduler.profiling import RunProfiler, estimate_rows_bytes
+from backend.scheduler.redis_queue import RedisTriggerQueue, create_redis_client
+from backend.scheduler.rate_limit import RateLimiter
+from backend.scheduler.retry import RetryPolicy
+from backend.scheduler.sharding import ShardedExecutor, aggregate, plan_shards
+from backend.scheduler.incremental import (
+    INCREMENTAL_TEMPLATE_TYPE,
+    advance_watermark,
+    build_params,
+    decode_watermark,
+    encode_watermark,
+)
+from backend.scheduler.retention import RunRetentionPruner
+from backend.scheduler.run_recorder import RunRecorder
 
 
 logger = logging.getLogger("scheduler_manager")
 
+# 内置系统任务ID，与用户任务（数字ID）区分
+RETENTION_JOB_ID = "__run_retention__"
+CHANGE_WATCH_JOB_ID = "__change_watch__"
+SYSTEM_JOB_IDS = (RETENTION_JOB_ID, CHANGE_WATCH_JOB_ID)
+
+# 触发被拒绝的原因，用于指标标签
+REJECT_OUTCOMES = (
+    (DuplicateTrigger, "duplicate"),
+    (TriggerRateLimited, "rate_limited"),
+    (DispatchQueueFull, "queue_full"),
+)
+
+
+class FireTimeTracker:
+    """监听 EVENT_JOB_SUBMITTED 记录每次提交的计划触发时间，入队函数据此算出触发延迟
+
+    APScheduler 不把计划时间传给任务函数，且提交事件在任务交给线程池之后才派发，
+    任务函数可能先于监听器执行，因此取时间时短暂等待监听器写入。
+    定时任务 max_instances=1，同一任务上一次入队返回前不会再次提交，记录不会被覆盖。
+    """
+
+    def __init__(self, wait_seconds: float = 1.0):
+        self.wait_seconds = wait_seconds
+        self._fire_times: Dict[str, datetime] = {}
+        self._cond = threading.Condition()
+
+    def on_submitted(self, event):
+        # 只记录用户定时任务（数字ID）；重试等一次性任务的 ID 不重复，记录了也不会被取走
+        if not event.job_id.isdigit():
+            return
+        with self._cond:
+            self._fire_times[event.job_id] = event.scheduled_run_times[-1]
+            self._cond.notify_all()
+
+    def pop(self, job_id: str) -> Optional[float]:
+        with self._cond:
+            self._cond.wait_for(lambda: job_id in self._fire_times, self.wait_seconds)
+            fire_time = self._fire_times.pop(job_id, None)
+        return fire_time.timestamp() if fire_time is not None else None
+
 
 class SchedulerManager:
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
+        # APScheduler 只负责按计划把触发放入分发队列，实际执行由分发器工作线程完成
+        self.scheduler = BackgroundScheduler(
+            executors={
+                "default": ThreadPoolExecutor(settings.scheduler.executor_max_workers)
+            }
+        )
+        self.fire_times = FireTimeTracker()
+        self.scheduler.add_listener(self.fire_times.on_submitted, EVENT_JOB_SUBMITTED)
         self.started = False
+        # 本进程是否执行运行；redis 后端的调度/API 进程只入队
+        self.executes = False
+        self.run_recorder = RunRecorder(
+            flush_interval_ms=settings.scheduler.run_flush_interval_ms,
+            batch_size=settings.scheduler.run_flush_batch_size,
+        )
+        self.retention_pruner = RunRetentionPruner()
+        self.dag_coordinator = DagCoordinator()
+        self.plan_cache = JobPlanCache(
+            ttl_seconds=settings.scheduler.plan_cache_ttl_seconds
+        )
+        self.metrics = SchedulerMetrics()
+        self.scheduler.add_listener(
+            self._on_job_skipped, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+        )
+        self.dispatcher = JobDispatcher(
+            self.execute_ticket,
+            workers=settings.scheduler.dispatcher_workers,
+            max_queue=settings.scheduler.dispatcher_max_queue,
+            job_rate_per_minute=settings.scheduler.manual_trigger_rate_per_minute,
+            job_burst=settings.scheduler.manual_trigger_burst,
+        )
+        self.breakers = CircuitBreakerRegistry(
+            failure_threshold=settings.scheduler.breaker_failure_threshold,
+            open_seconds=settings.scheduler.breaker_open_seconds,
+            max_open_seconds=settings.scheduler.breaker_max_open_seconds,
+        )
+        self.sharded_executor = ShardedExecutor(
+            max_workers=settings.scheduler.shard_max_workers,
+            retry_backoff_ms=settings.scheduler.shard_retry_backoff_ms,
+        )
+        # 按连接器限制实际发往源库的查询速率，拿不到令牌的运行延后重新入队
+        self.connector_limiter = RateLimiter(
+            settings.scheduler.connector_rate_per_second,
+            settings.scheduler.connector_burst,
+        )
+        # redis 执行后端：定时与手动触发写入 Redis Streams，由 worker 进程执行；
+        # 重试与 DAG 下游仍在执行该运行的进程内分发
+        self.work_queue: Optional[RedisTriggerQueue] = None
+        if settings.scheduler.execution_backend == "redis":
+            self.work_queue = RedisTriggerQueue(
+                create_redis_client(),
+                prefix=settings.scheduler.queue_prefix,
+                group=settings.scheduler.queue_group,
+                max_queue=settings.scheduler.dispatcher_max_queue,
+                lock_seconds=settings.scheduler.queue_lock_seconds,
+                job_rate_per_minute=settings.scheduler.manual_trigger_rate_per_minute,
+                job_burst=settings.scheduler.manual_trigger_burst,
+            )
+        self.trigger_queue = (
+            self.work_queue if self.work_queue is not None else self.dispatcher
+        )
+        # on_change 任务：按连接器合并探测源表元数据，变更时入队
+        self.change_watcher = ChangeWatcher(
+            self.get_plan,
+            self._connector_instance,
+            self._enqueue_changed,
+            max_workers=settings.scheduler.change_watch_workers,
+        )
 
-    def start(self):
+    def _start_runtime(self, execute: bool):
+        self.run_recorder.start()
+        self.executes = execute
+        if execute:
+            self.dispatcher.start()
+        self.scheduler.start()
+        self.started = True
+        logger.info("APScheduler started")
+
+    def start(self, sync_jobs: bool = True):
         if not self.started:
-            self.scheduler.start()
-            self.started = True
-            logger.info("APScheduler started")
-            # 启动时同步一次激活任务
-            self.sync_active_jobs()
+            self._start_runtime(execute=self.work_queue is None)
+            self.scheduler.add_job(
+                func=self.prune_runs,
+                trigger=IntervalTrigger(
+                    seconds=settings.scheduler.run_prune_interval_seconds
+                ),
+                id=RETENTION_JOB_ID,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+            )
+            self.scheduler.add_job(
+                func=self.change_watcher.poll,
+                trigger=IntervalTrigger(
+                    seconds=settings.scheduler.change_watch_interval_seconds
+                ),
+                id=CHANGE_WATCH_JOB_ID,
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True,
+            )
+            # 上次退出时未写回结束状态的运行先标记为失败，再同步一次激活任务
+            try:
+                self.retention_pruner.fail_stale_runs()
+            except Exception as e:
+                logger.error(f"fail stale job runs failed: {e}")
+            if sync_jobs:
+                self.sync_active_jobs()
+
+    def start_worker(self):
+        """worker 进程：只执行从队列取出的运行，不注册定时任务"""
+        if not self.started:
+            self.dag_coordinator.reload()
+            self._start_runtime(execute=True)
 
     def shutdown(self):
         if self.started:
             self.scheduler.shutdown(wait=False)
+            self.dispatcher.stop()
+            self.run_recorder.stop()
             self.started = False
             logger.info("APScheduler shutdown")
 
+    def prune_runs(self) -> Dict[str, int]:
+        """按保留策略清理过期运行记录"""
+        return self.retention_pruner.prune()
+
     def sync_active_jobs(self):
         with db_connection.get_cursor() as cursor:
             service = SchedulerService(cursor)
             jobs = service.list_active_jobs()
-            for job in jobs:
-                self.sync_job(job)
+        self.dag_coordinator.reload()
+        for job in jobs:
+            self.sync_job(job, reload_dependencies=False)
 
     def build_trigger(self, job) -> Optional[Any]:
         if job.schedule_type == "cron" and job.cron_expression:
@@ -48,81 +240,509 @@ class SchedulerManager:
             return IntervalTrigger(seconds=job.interval_seconds)
         return None
 
-    def _job_func(self, job_id: int):
+    def _resolve_job(self, cursor, job_id: int) -> JobPlan:
+        """读取任务、模板与连接器，生成执行计划"""
+        sched_service = SchedulerService(cursor)
+        job = sched_service.get_job(job_id)
+        if not job:
+            raise RuntimeError("job missing")
+        # 合并配置
+        tpl = sched_service.dao.get_template_by_id(job.template_id)
+        cfg: Dict[str, Any] = {}
+        if tpl and tpl.default_config:
+            cfg.update(tpl.default_config)
+        if job.override_config:
+            cfg.update(job.override_config)
+
+        if not cfg.get("connector_id") or not cfg.get("sql"):
+            raise ValueError("配置不完整: 需要 connector_id 和 sql")
+
+        conn_service = ConnectorService(cursor)
+        connector = conn_service.get_connector(cfg["connector_id"])
+        if not connector:
+            raise ValueError("连接器不存在")
+        return JobPlan(
+            job_id=job_id,
+            template_id=job.template_id,
+            template_type=tpl.template_type if tpl else "db_query",
+            config=cfg,
+            connector=connector,
+        )
+
+    @staticmethod
+    def _connector_instance(connector):
+        return get_connector_instance(
+            db_type=connector.db_type,
+            host=connector.host,
+            port=connector.port,
+            username=connector.username,
+            password=connector.password,
+            database=connector.database_name,
+        )
+
+    def _load_plan(self, job_id: int) -> JobPlan:
         with db_connection.get_cursor() as cursor:
-            sched_service = SchedulerService(cursor)
-            run = sched_service.start_run(job_id)
-            start_time = time.time()
-            rows_affected = 0
-            error: Optional[str] = None
-            result_str: Optional[str] = None
+            return self._resolve_job(cursor, job_id)
+
+    def get_plan(self, job_id: int) -> JobPlan:
+        """获取任务执行计划，命中缓存时不访问元数据库"""
+        return self.plan_cache.get(job_id, self._load_plan)
+
+    def invalidate_template(self, template_id: int):
+        self._invalidate("template", template_id)
+
+    def invalidate_connector(self, connector_id: int):
+        self._invalidate("connector", connector_id)
+
+    def _invalidate(self, kind: str, key: Optional[int] = None):
+        """失效本进程缓存，redis 后端下同时通知各 worker"""
+        self.apply_invalidation(kind, key)
+        if self.work_queue is not None:
             try:
-                job = sched_service.get_job(job_id)
-                if not job:
-                    raise RuntimeError("job missing")
-                # 合并配置
-                tpl = sched_service.dao.get_template_by_id(job.template_id)
-                cfg: Dict[str, Any] = {}
-                if tpl and tpl.default_config:
-                    cfg.update(tpl.default_config)
-                if job.override_config:
-                    cfg.update(job.override_config)
-
-                connector_id = cfg.get("connector_id")
-                sql = cfg.get("sql")
+                self.work_queue.publish_invalidation(kind, key)
+            except Exception as e:
+                # worker 侧仍有 plan_cache_ttl_seconds 兜底
+                logger.error(f"publish {kind} invalidation failed: {e}")
+
+    def apply_invalidation(self, kind: str, key: Optional[int] = None):
+        if kind == "job":
+            self.plan_cache.invalidate(key)
+        elif kind == "template":
+            self.plan_cache.invalidate_template(key)
+        elif kind == "connector":
+            self.plan_cache.invalidate_connector(key)
+        elif kind == "dag":
+            self.dag_coordinator.reload()
+
+    def _commit_watermark(
+        self,
+        job_id: int,
+        cfg: Dict[str, Any],
+        watermark: JobWatermarkModel,
+        data: List[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """成功后以比较交换推进水位，返回合并到运行结果中的增量信息"""
+        current = decode_watermark(watermark.watermark_value, watermark.value_type)
+        new_raw, new_type = encode_watermark(
+            advance_watermark(data, cfg["watermark_column"], current)
+        )
+        with db_connection.get_cursor() as cursor:
+            advanced = SchedulerService(cursor).advance_watermark(
+                job_id, watermark.watermark_value, new_raw, new_type, len(data)
+            )
+        if not advanced:
+            raise RuntimeError("水位已被并发修改，本次增量结果未提交")
+        return {
+            "watermark": {"from": watermark.watermark_value, "to": new_raw},
+            "cumulative_total": watermark.total_rows + len(data),
+        }
+
+    def execute_ticket(self, ticket: TriggerTicket):
+        self._job_func(ticket.job_id, ticket=ticket, **ticket.kwargs)
+
+    def _job_func(
+        self,
+        job_id: int,
+        dag_run_id: Optional[int] = None,
+        ticket: Optional[TriggerTicket] = None,
+        attempt: int = 1,
+    ):
+        profiler = RunProfiler()
+        profiler.set("attempt", attempt)
+        if ticket is not None and ticket.started_at is not None:
+            queue_wait_ms = (ticket.started_at - ticket.enqueued_at) * 1000
+            profiler.set("queue_wait_ms", round(queue_wait_ms, 3))
+        # 有下游依赖的任务独立触发时，开启一次新的 DAG 运行
+        if dag_run_id is None and self.dag_coordinator.has_downstream(job_id):
+            dag_run_id = self.dag_coordinator.start_run(job_id)
+
+        # 执行计划走缓存；短事务只登记运行（增量任务另读水位），
+        # 远程查询执行期间不持有元数据库连接
+        error: Optional[str] = None
+        plan: Optional[JobPlan] = None
+        try:
+            with profiler.phase("plan"):
+                plan = self.get_plan(job_id)
+        except Exception as e:
+            error = str(e)
+        incremental = plan is not None and (
+            plan.template_type == INCREMENTAL_TEMPLATE_TYPE
+        )
+        if plan is not None:
+            allowed, retry_after = self.breakers.allow(plan.connector.id)
+            if not allowed:
+                self._on_circuit_open(job_id, dag_run_id, plan, attempt, retry_after)
+                return
+            wait = self.connector_limiter.try_acquire(plan.connector.id)
+            if wait is not None:
+                # 不在执行线程里等令牌，否则其它连接器的运行也被堵在队列里；
+                # 按原尝试次数延后入队，不消耗重试次数
+                self.metrics.throttled.inc(connector_id=plan.connector.id)
+                self._schedule_retry(job_id, attempt, wait, dag_run_id)
+                return
+        try:
+            with profiler.phase("claim"), db_connection.get_cursor() as cursor:
+                run_id = SchedulerService(cursor).start_run(job_id, dag_run_id)
+                if incremental:
+                    try:
+                        initial_raw, initial_type = encode_watermark(
+                            plan.config.get("initial_watermark")
+                        )
+                        watermark = SchedulerService(cursor).load_watermark(
+                            job_id, initial_raw, initial_type
+                        )
+                    except Exception as e:
+                        error = str(e)
+        except Exception:
+            # 登记失败也要推进 DAG 状态，避免 DAG 运行悬挂
+            if dag_run_id is not None:
+                self.dag_coordinator.node_finished(dag_run_id, job_id, "failed", 0)
+            raise
+
+        start_time = time.time()
+        rows_affected = 0
+        result_blob: Optional[bytes] = None
+        result: Dict[str, Any] = {}
+        status = "failed"
+        # 只有真正向源库发起了执行的运行才参与重试与熔断判定
+        executed = error is None
+        exc: Optional[Exception] = None
+        if executed:
+            self.metrics.connector_running.inc(connector_id=plan.connector.id)
+            try:
+                cfg, connector = plan.config, plan.connector
+                connector_instance = self._connector_instance(connector)
                 params = cfg.get("params")
-                if not connector_id or not sql:
-                    raise ValueError("配置不完整: 需要 connector_id 和 sql")
-
-                conn_service = ConnectorService(cursor)
-                connector = conn_service.get_connector(connector_id)
-                if not connector:
-                    raise ValueError("连接器不存在")
-
-                connector_instance = get_connector_instance(
-                    db_type=connector.db_type,
-                    host=connector.host,
-                    port=connector.port,
-                    username=connector.username,
-                    password=connector.password,
-                    database=connector.database_name,
-                )
-                data = connector_instance.execute_query(sql, params)
-                rows_affected = len(data) if isinstance(data, list) else 0
-                result_str = json.dumps(
-                    {"preview": data[:10], "total": rows_affected}, ensure_ascii=False
-                )
+                if incremental:
+                    # 注入当前水位，只查询新增数据
+                    params = build_params(
+                        cfg,
+                        decode_watermark(
+                            watermark.watermark_value, watermark.value_type
+                        ),
+                    )
+                if cfg.get("sharding"):
+                    if incremental:
+                        raise ValueError("增量查询任务不支持分片执行")
+                    result = self._execute_sharded(
+                        run_id, connector_instance, cfg, params, profiler
+                    )
+                    rows_affected = result["total"]
+                else:
+                    data, timings = connector_instance.execute_query_profiled(
+                        cfg["sql"], params
+                    )
+                    profiler.update_timings(timings)
+                    rows_affected = len(data) if isinstance(data, list) else 0
+                    profiler.set("rows_fetched", rows_affected)
+                    profiler.set("bytes_fetched", estimate_rows_bytes(data))
+                    result = {
+                        "preview": data[:10],
+                        "total": rows_affected,
+                    }
+                    if incremental:
+                        with profiler.phase("watermark"):
+                            result.update(
+                                self._commit_watermark(job_id, cfg, watermark, data)
+                            )
+                with profiler.phase("serialize"):
+                    result_blob = encode_result(result)
+                profiler.set("result_bytes", len(result_blob))
+                failed_shards = result.get("shards", {}).get("failed")
+                if failed_shards:
+                    # 汇总结果保留，运行整体记为失败
+                    raise RuntimeError(
+                        f"{len(failed_shards)} 个分片执行失败: "
+                        f"{', '.join(failed_shards[:10])}"
+                    )
                 status = "success"
-                error = None
             except Exception as e:
-                status = "failed"
+                exc = e
                 error = str(e)
-            finally:
-                duration_ms = int((time.time() - start_time) * 1000)
-                sched_service.finish_run(
-                    run.id,
-                    status=status,
-                    duration_ms=duration_ms,
-                    rows_affected=rows_affected,
-                    result=result_str,
-                    error=error,
-                )
-
-    def sync_job(self, job_model):
-        job_id = job_model.id
-        # 先移除旧的
+            self.metrics.connector_running.dec(connector_id=plan.connector.id)
+            self._record_connector_health(plan.connector.id, exc)
+
+        # 运行结果交给异步写入器批量落库
+        duration_ms = int((time.time() - start_time) * 1000)
+        metrics = profiler.finish()
+        if ticket is not None and ticket.trigger_lag_ms is not None:
+            # 计划时间到入队 + 队列等待
+            metrics["schedule_lag_ms"] = round(
+                ticket.trigger_lag_ms + metrics.get("queue_wait_ms", 0), 3
+            )
+        self._observe_run(ticket, metrics, status, duration_ms)
+        metrics["bookkeeping_ms"] = round(
+            sum(
+                metrics.get(f"{p}_ms", 0)
+                for p in ("plan", "claim", "watermark", "shard_record")
+            ),
+            3,
+        )
+        retry_delay: Optional[float] = None
+        if status == "failed" and executed:
+            policy = RetryPolicy.from_config(plan.config)
+            if policy.can_retry(attempt):
+                retry_delay = policy.delay_seconds(attempt)
+                metrics["retry_in_ms"] = int(retry_delay * 1000)
+        self.run_recorder.submit(
+            run_id,
+            status=status,
+            finished_at=datetime.now(),
+            duration_ms=duration_ms,
+            rows_affected=rows_affected,
+            result_blob=result_blob,
+            result_size=len(result_blob) if result_blob is not None else None,
+            error=error,
+            metrics=metrics,
+        )
+
+        if retry_delay is not None:
+            # 重试期间 DAG 节点保持运行中，最终结果出来后再推进下游
+            self._schedule_retry(job_id, attempt + 1, retry_delay, dag_run_id)
+        elif dag_run_id is not None:
+            self._finish_dag_node(dag_run_id, job_id, status, duration_ms)
+
+    def _finish_dag_node(
+        self, dag_run_id: int, job_id: int, status: str, duration_ms: int
+    ):
+        ready = self.dag_coordinator.node_finished(
+            dag_run_id, job_id, status, duration_ms
+        )
+        for downstream_id in ready:
+            self._submit_dag_job(downstream_id, dag_run_id)
+
+    def _record_connector_health(self, connector_id: int, exc: Optional[Exception]):
+        # SQL 错误等非连接类失败说明连接器可达，同样视为健康
+        if exc is not None and is_connection_error(exc):
+            self.breakers.record_failure(connector_id, str(exc))
+        else:
+            self.breakers.record_success(connector_id)
+
+    def _on_circuit_open(
+        self,
+        job_id: int,
+        dag_run_id: Optional[int],
+        plan: JobPlan,
+        attempt: int,
+        retry_after: float,
+    ):
+        """连接器熔断中：还有重试次数则延后到熔断到期，否则记录一次跳过的运行"""
+        connector_id = plan.connector.id
+        if RetryPolicy.from_config(plan.config).can_retry(attempt):
+            logger.info(
+                f"job {job_id} deferred {retry_after:.1f}s, connector "
+                f"{connector_id} circuit open"
+            )
+            self._schedule_retry(job_id, attempt + 1, retry_after, dag_run_id)
+            return
+        with db_connection.get_cursor() as cursor:
+            run_id = SchedulerService(cursor).start_run(job_id, dag_run_id)
+        self.run_recorder.submit(
+            run_id,
+            status="skipped",
+            finished_at=datetime.now(),
+            duration_ms=0,
+            error=f"连接器 {connector_id} 熔断中，跳过本次运行",
+            metrics={"attempt": attempt, "circuit_open": True},
+        )
+        self.metrics.runs.inc(status="skipped")
+        if dag_run_id is not None:
+            self._finish_dag_node(dag_run_id, job_id, "skipped", 0)
+
+    def _schedule_retry(
+        self,
+        job_id: int,
+        attempt: int,
+        delay_seconds: float,
+        dag_run_id: Optional[int],
+    ):
+        """延迟到期后重新入队，等待期间不占用执行线程"""
+        self.scheduler.add_job(
+            func=self._enqueue_retry,
+            trigger="date",
+            run_date=datetime.now() + timedelta(seconds=delay_seconds),
+            args=[job_id, attempt, dag_run_id],
+            id=f"retry_{job_id}_{attempt}_{time.time()}",
+            misfire_grace_time=None,
+        )
+
+    def _enqueue_retry(
+        self, job_id: int, attempt: int, dag_run_id: Optional[int]
+    ) -> Optional[TriggerTicket]:
+        in_dag = dag_run_id is not None
+        try:
+            return self._submit(
+                "retry",
+                self.dispatcher,
+                job_id,
+                TriggerPriority.DAG if in_dag else TriggerPriority.SCHEDULED,
+                dedup=not in_dag,
+                attempt=attempt,
+                dag_run_id=dag_run_id,
+            )
+        except DispatchRejected as e:
+            logger.warning(f"retry {attempt} of job {job_id} skipped: {e}")
+            return None
+
+    def _execute_sharded(
+        self,
+        run_id: int,
+        connector_instance,
+        cfg: Dict[str, Any],
+        params: Optional[Dict[str, Any]],
+        profiler: RunProfiler,
+    ) -> Dict[str, Any]:
+        """分片并行执行，分片明细一次性写入 job_run_shards"""
+        with profiler.phase("shard_plan"):
+            shards = plan_shards(connector_instance, cfg, params)
+        with profiler.phase("execute"):
+            outcomes = self.sharded_executor.execute(
+                connector_instance, shards, cfg["sharding"]
+            )
+        profiler.set("shards", len(outcomes))
+        profiler.set("rows_fetched", sum(o.rows for o in outcomes))
+        profiler.set("bytes_fetched", sum(o.bytes for o in outcomes))
+        with profiler.phase("shard_record"), db_connection.get_cursor() as cursor:
+            SchedulerService(cursor).record_run_shards(
+                run_id, [o.as_record() for o in outcomes]
+            )
+        return aggregate(outcomes)
+
+    def _submit(
+        self, source: str, queue: Any, job_id: int, priority: TriggerPriority, **kwargs: Any
+    ) -> TriggerTicket:
+        """提交触发并按来源统计接受与拒绝次数"""
+        try:
+            ticket = queue.submit(job_id, priority, **kwargs)
+        except DispatchRejected as e:
+            outcome = next(
+                (name for cls, name in REJECT_OUTCOMES if isinstance(e, cls)),
+                "rejected",
+            )
+            self.metrics.triggers.inc(source=source, outcome=outcome)
+            raise
+        self.metrics.triggers.inc(source=source, outcome="accepted")
+        return ticket
+
+    def _enqueue_scheduled(self, job_id: int) -> Optional[TriggerTicket]:
+        """APScheduler 定时触发入口：只入队，不执行"""
+        try:
+            return self._submit(
+                "scheduled",
+                self.trigger_queue,
+                job_id,
+                TriggerPriority.SCHEDULED,
+                scheduled_at=self.fire_times.pop(str(job_id)),
+            )
+        except DispatchRejected as e:
+            logger.warning(f"scheduled trigger of job {job_id} skipped: {e}")
+            return None
+
+    def _enqueue_changed(self, job_id: int) -> Optional[TriggerTicket]:
+        """源表变更触发入口，被拒绝时返回 None，由变更监听下一轮重试"""
+        try:
+            return self._submit(
+                "change", self.trigger_queue, job_id, TriggerPriority.SCHEDULED
+            )
+        except DispatchRejected as e:
+            logger.info(f"change trigger of job {job_id} deferred: {e}")
+            return None
+
+    def _on_job_skipped(self, event):
+        """错过触发窗口或上一次入队尚未返回，均说明触发线程跟不上计划"""
+        if event.job_id in SYSTEM_JOB_IDS:
+            return
+        if event.code == EVENT_JOB_MISSED:
+            self.metrics.misfires.inc()
+            logger.warning(
+                f"job {event.job_id} misfired, scheduled at {event.scheduled_run_time}"
+            )
+        else:
+            self.metrics.max_instances.inc()
+
+    def _observe_run(
+        self,
+        ticket: Optional[TriggerTicket],
+        metrics: Dict[str, Any],
+        status: str,
+        duration_ms: int,
+    ):
+        self.metrics.runs.inc(status=status)
+        self.metrics.run_duration.observe(duration_ms / 1000, status=status)
+        if ticket is None:
+            return
+        if "queue_wait_ms" in metrics:
+            self.metrics.queue_wait.observe(
+                metrics["queue_wait_ms"] / 1000, priority=ticket.priority.name.lower()
+            )
+        if "schedule_lag_ms" in metrics:
+            self.metrics.start_lag.observe(metrics["schedule_lag_ms"] / 1000)
+
+    def _submit_dag_job(self, job_id: int, dag_run_id: int):
+        """把就绪的下游任务放入分发队列（优先于手动与定时触发）
+
+        不去重、不限流、不受队列上限约束，原因见 JobDispatcher。
+        """
+        self._submit(
+            "dag",
+            self.dispatcher,
+            job_id,
+            TriggerPriority.DAG,
+            dedup=False,
+            dag_run_id=dag_run_id,
+        )
+
+    def _reload_dependencies(self):
+        self._invalidate("dag")
+
+    def sync_jobs(self, job_models: List[Any]):
+        """批量注册任务：依赖图只重载一次，注册期间暂停调度避免反复唤醒"""
+        self._reload_dependencies()
+        paused = self.started
+        if paused:
+            self.scheduler.pause()
+        try:
+            for job_model in job_models:
+                self.sync_job(job_model, reload_dependencies=False)
+        finally:
+            if paused:
+                self.scheduler.resume()
+
+    def remove_jobs(self, job_ids: List[int]):
+        self._reload_dependencies()
+        for job_id in job_ids:
+            self._unschedule(job_id)
+
+    def _unschedule(self, job_id: int):
+        self._invalidate("job", job_id)
+        if self.change_watcher.unregister(job_id):
+            return True
         try:
             self.scheduler.remove_job(job_id=str(job_id))
         except Exception:
-            pass
-        if not job_model.is_active:
+            return False
+        return True
+
+    def sync_job(self, job_model, reload_dependencies: bool = True):
+        job_id = job_model.id
+        if reload_dependencies:
+            self._reload_dependencies()
+        # 先移除旧的
+        self._unschedule(job_id)
+        # dependent 任务没有自身触发器，仅由上游成功触发
+        if not job_model.is_active or job_model.schedule_type == "dependent":
+            return
+        if job_model.schedule_type == "on_change":
+            # interval_seconds 作为两次变更触发之间的最小间隔
+            self.change_watcher.register(job_id, job_model.interval_seconds)
+            logger.info(f"watching source tables of job {job_id}")
             return
         trigger = self.build_trigger(job_model)
         if not trigger:
             logger.warning(f"job {job_id} has invalid schedule")
             return
         self.scheduler.add_job(
-            func=self._job_func,
+            func=self._enqueue_scheduled,
             trigger=trigger,
             args=[job_id],
             id=str(job_id),
@@ -133,22 +753,102 @@ class SchedulerManager:
         logger.info(f"synced job {job_id}")
 
     def remove_job(self, job_id: int):
-        try:
-            self.scheduler.remove_job(job_id=str(job_id))
+        self._reload_dependencies()
+        if self._unschedule(job_id):
             logger.info(f"removed job {job_id}")
-        except Exception:
-            pass
 
-    def trigger_job(self, job_id: int) -> bool:
-        try:
-            self.scheduler.add_job(
-                func=self._job_func,
-                args=[job_id],
-                id=f"run_once_{job_id}_{time.time()}",
-            )
-            return True
-        except Exception:
-            return False
+    def _executor_stats(self) -> Dict[str, Any]:
+        """执行端状况：本进程执行时为分发器线程占用；
+        redis 后端且本进程只入队时为各 worker 进程的消费状态，线程数与占用率不适用"""
+        if self.executes or self.work_queue is None:
+            workers = self.dispatcher.workers
+            running = self.dispatcher.running()
+            return {
+                "workers": workers,
+                "running": running,
+                "utilization": round(running / workers, 3) if workers else 0,
+            }
+        state = self.work_queue.worker_stats()
+        return {
+            "worker_processes": state["workers"],
+            "running": state["running"],
+            "workers": None,
+            "utilization": None,
+        }
+
+    def _sample_gauges(self) -> Dict[str, Any]:
+        """采样状态类指标：队列深度、执行线程占用、逾期任务等，返回执行端状况"""
+        m = self.metrics
+        m.queue_depth.set(self.trigger_queue.pending())
+        executor = self._executor_stats()
+        m.running.set(executor["running"])
+        if executor["workers"] is not None:
+            m.workers.set(executor["workers"])
+        now = time.time()
+        scheduled = overdue = 0
+        for job in self.scheduler.get_jobs():
+            if not job.id.isdigit():
+                continue
+            scheduled += 1
+            next_run = getattr(job, "next_run_time", None)
+            # 超过 1 秒仍未触发，说明触发线程池跟不上
+            if next_run is not None and next_run.timestamp() < now - 1:
+                overdue += 1
+        m.scheduled_jobs.set(scheduled)
+        m.overdue_jobs.set(overdue)
+        m.plan_cache_hits.set(self.plan_cache.hits)
+        m.plan_cache_misses.set(self.plan_cache.misses)
+        m.recorder_pending.set(self.run_recorder.pending())
+        m.breakers_open.set(
+            sum(1 for b in self.breakers.snapshot() if b["state"] != "closed")
+        )
+        return executor
+
+    def stats(self) -> Dict[str, Any]:
+        """调度器运行状况汇总（延迟单位为毫秒，百分位基于最近的样本）"""
+        executor = self._sample_gauges()
+        m = self.metrics
+        triggers: Dict[str, Dict[str, int]] = {}
+        for (source, outcome), value in m.triggers.items():
+            triggers.setdefault(source, {})[outcome] = int(value)
+        return {
+            "backend": settings.scheduler.execution_backend,
+            "queue": self.trigger_queue.stats(),
+            "executor": executor,
+            "running_by_connector": {
+                int(key[0]): int(value)
+                for key, value in m.connector_running.items()
+                if value
+            },
+            "scheduled_jobs": int(m.scheduled_jobs.value()),
+            "watched_jobs": len(self.change_watcher),
+            "overdue_jobs": int(m.overdue_jobs.value()),
+            "misfires": int(m.misfires.total()),
+            "max_instances_skipped": int(m.max_instances.total()),
+            "start_lag_ms": m.start_lag.summary(scale=1000),
+            "queue_wait_ms": m.queue_wait.summary(scale=1000),
+            "run_duration_ms": m.run_duration.summary(scale=1000),
+            "triggers": triggers,
+            "runs": {key[0]: int(value) for key, value in m.runs.items()},
+            "plan_cache": {
+                "size": len(self.plan_cache),
+                "hits": self.plan_cache.hits,
+                "misses": self.plan_cache.misses,
+            },
+            "recorder_pending": self.run_recorder.pending(),
+            "breakers_open": int(m.breakers_open.value()),
+        }
+
+    def render_metrics(self) -> str:
+        """Prometheus 文本格式的指标"""
+        self._sample_gauges()
+        return self.metrics.render()
+
+    def trigger_job(self, job_id: int) -> TriggerTicket:
+        """手动触发一次运行，被去重、限流或队列已满拒绝时抛出 DispatchRejected"""
+        return self._submit(
+            "manual", self.trigger_queue, job_id, TriggerPriority.MANUAL, rate_limit=True
+        )
 
 
 scheduler_manager = SchedulerManager()
@@ -0,0 +1,251 @@
+import bisect
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# 秒级延迟/耗时的默认分桶
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300,
+)
+# 百分位按最近若干个样本计算，反映当前状态而非进程生命周期
+PERCENTILE_WINDOW = 1024
+
+LabelKey = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        # 无标签指标始终导出一个样本（初始为 0）
+        self._values: Dict[LabelKey, float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels: object):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self) -> List[Tuple[LabelKey, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in self.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: object):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: object):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class _HistogramSeries:
+    def __init__(self, bucket_count: int):
+        self.counts = [0] * bucket_count
+        self.sum = 0.0
+        self.count = 0
+        self.recent: Deque[float] = deque(maxlen=PERCENTILE_WINDOW)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelKey, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: object):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+            series.recent.append(value)
+
+    def summary(
+        self, percentiles: Sequence[int] = (50, 95, 99), scale: float = 1.0, **labels: object
+    ) -> Dict[str, float]:
+        """最近窗口内的百分位与最大值；不传标签时合并所有序列"""
+        with self._lock:
+            if labels:
+                series = [self._series.get(self._key(labels))]
+            else:
+                series = list(self._series.values())
+            values = sorted(v for s in series if s for v in s.recent)
+            count = sum(s.count for s in series if s)
+        if not values:
+            return {"count": count}
+        result: Dict[str, float] = {"count": count}
+        for p in percentiles:
+            index = min(int(math.ceil(p / 100 * len(values))) - 1, len(values) - 1)
+            result[f"p{p}"] = round(values[max(index, 0)] * scale, 3)
+        result["max"] = round(values[-1] * scale, 3)
+        return result
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            snapshot = [
+                (key, list(s.counts), s.sum, s.count)
+                for key, s in sorted(self._series.items())
+            ]
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """进程内指标注册表，按 Prometheus 文本格式导出"""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self.prefix + name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self.prefix + name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Iterable[float]] = None,
+    ) -> Histogram:
+        return self._register(
+            Histogram(self.prefix + name, help, labelnames, buckets or DEFAULT_BUCKETS)
+        )
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class SchedulerMetrics:
+    """调度器指标：触发结果、错过触发、启动延迟、队列等待与各连接器运行数
+
+    队列深度、执行中数量、逾期任务等状态量在导出时由 SchedulerManager 采样写入。
+    redis 执行后端下执行相关指标分布在各 worker 进程中。
+    """
+
+    def __init__(self):
+        self.registry = MetricsRegistry(prefix="chatjob_scheduler_")
+        self.triggers = self.registry.counter(
+            "triggers_total", "触发请求数（按来源与结果）", ("source", "outcome")
+        )
+        self.misfires = self.registry.counter(
+            "misfires_total", "超过 misfire_grace_time 未能触发的计划次数"
+        )
+        self.max_instances = self.registry.counter(
+            "max_instances_skipped_total", "因上一次入队仍未返回而跳过的计划次数"
+        )
+        self.runs = self.registry.counter("runs_total", "运行结束数（按状态）", ("status",))
+        self.throttled = self.registry.counter(
+            "throttled_total", "因连接器限流延后执行的次数", ("connector_id",)
+        )
+        self.start_lag = self.registry.histogram(
+            "start_lag_seconds", "计划触发时间到开始执行的延迟"
+        )
+        self.queue_wait = self.registry.histogram(
+            "queue_wait_seconds", "入队到开始执行的等待时间", ("priority",)
+        )
+        self.run_duration = self.registry.histogram(
+            "run_duration_seconds", "运行耗时", ("status",)
+        )
+        self.connector_running = self.registry.gauge(
+            "connector_running", "各连接器执行中的运行数", ("connector_id",)
+        )
+        self.queue_depth = self.registry.gauge("queue_depth", "排队中的触发数")
+        self.running = self.registry.gauge("running", "执行中的运行数")
+        self.workers = self.registry.gauge("workers", "执行线程数")
+        self.scheduled_jobs = self.registry.gauge("scheduled_jobs", "已注册的定时任务数")
+        self.overdue_jobs = self.registry.gauge(
+            "overdue_jobs", "已到计划时间但尚未触发的任务数"
+        )
+        self.plan_cache_hits = self.registry.gauge("plan_cache_hits", "执行计划缓存命中数")
+        self.plan_cache_misses = self.registry.gauge(
+            "plan_cache_misses", "执行计划缓存未命中数"
+        )
+        self.recorder_pending = self.registry.gauge(
+            "recorder_pending", "等待写回的运行记录更新数"
+        )
+        self.breakers_open = self.registry.gauge("breakers_open", "熔断中的连接器数")
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.database.model.connector import ConnectorModel
+
+
+logger = logging.getLogger("job_plan_cache")
+
+
+@dataclass(frozen=True)
+class JobPlan:
+    """任务执行计划：合并后的配置与连接器，触发时无需再读元数据库"""
+
+    job_id: int
+    template_id: int
+    template_type: str
+    config: Dict[str, Any]
+    connector: ConnectorModel
+
+
+class JobPlanCache:
+    """任务执行计划缓存（线程安全）
+
+    由 sync_job/remove_job、模板与连接器变更显式失效；ttl_seconds 作为
+    兜底，限制失效早于业务事务提交时可能读到旧数据的时间窗口。
+    """
+
+    def __init__(self, ttl_seconds: int = 300):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._plans: Dict[int, Tuple[JobPlan, float]] = {}
+        # 每次失效递增，加载期间发生失效时不写回缓存
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, job_id: int, loader: Callable[[int], JobPlan]) -> JobPlan:
+        with self._lock:
+            cached = self._plans.get(job_id)
+            if cached and (self.ttl <= 0 or time.monotonic() < cached[1]):
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            generation = self._generation
+
+        plan = loader(job_id)
+        with self._lock:
+            if generation == self._generation:
+                self._plans[job_id] = (plan, time.monotonic() + self.ttl)
+        return plan
+
+    def invalidate(self, job_id: Optional[int] = None):
+        """失效单个任务的计划，不传 job_id 时清空"""
+        with self._lock:
+            self._generation += 1
+            if job_id is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(job_id, None)
+
+    def invalidate_template(self, template_id: int):
+        self._invalidate_where(lambda plan: plan.template_id == template_id)
+
+    def invalidate_connector(self, connector_id: int):
+        self._invalidate_where(lambda plan: plan.connector.id == connector_id)
+
+    def _invalidate_where(self, predicate: Callable[[JobPlan], bool]):
+        with self._lock:
+            self._generation += 1
+            stale = [job_id for job_id, (plan, _) in self._plans.items() if predicate(plan)]
+            for job_id in stale:
+                del self._plans[job_id]
+        if stale:
+            logger.info(f"invalidated {len(stale)} cached job plans")
+
+    def __len__(self) -> int:
+        return len(self._plans)
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，不采集 RSS
+    resource = None
+
+
+def peak_rss_kb() -> Optional[int]:
+    """进程峰值 RSS（KB，Linux 下 ru_maxrss 单位即为 KB）"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def estimate_rows_bytes(rows: Iterable[Dict[str, Any]]) -> int:
+    """粗略估算结果集的数据量：字符串/二进制按长度，其它值按 8 字节计"""
+    total = 0
+    for row in rows:
+        for value in row.values():
+            if isinstance(value, (str, bytes, bytearray)):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+class RunProfiler:
+    """单次运行的分阶段计时
+
+    各阶段耗时以 <phase>_ms 记录（同名阶段累加），附加指标通过 set 写入；
+    peak_rss_delta_kb 为运行期间进程峰值 RSS 的增长，进程内并发运行时
+    只能作为参考。
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+        self._rss_start = peak_rss_kb()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, elapsed_ms: float):
+        key = f"{name}_ms"
+        self.metrics[key] = round(self.metrics.get(key, 0) + elapsed_ms, 3)
+
+    def update_timings(self, timings: Dict[str, float]):
+        for key, value in timings.items():
+            self.add(key[:-3] if key.endswith("_ms") else key, value)
+
+    def set(self, name: str, value: Any):
+        self.metrics[name] = value
+
+    def finish(self) -> Dict[str, Any]:
+        rss_end = peak_rss_kb()
+        if self._rss_start is not None and rss_end is not None:
+            self.metrics["peak_rss_delta_kb"] = max(rss_end - self._rss_start, 0)
+        return self.metrics
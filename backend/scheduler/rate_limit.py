@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Dict, Hashable, Optional
+
+
+class TokenBucket:
+    """令牌桶：rate 为每秒补充的令牌数，burst 为桶容量"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def idle(self, now: float) -> bool:
+        """令牌已补满：与新建的桶等价，可以丢弃"""
+        with self._lock:
+            return self._tokens + (now - self._updated) * self.rate >= self.capacity
+
+    def try_acquire(self) -> Optional[float]:
+        """取一个令牌；成功返回 None，否则返回需要等待的秒数"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """阻塞直到取得令牌，超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire()
+            if wait is None:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """按 key（任务ID、连接器ID）分别维护令牌桶，rate<=0 表示不限流
+
+    已补满的桶与新建的桶等价，每隔一个补满周期清理一次，已删除的任务、
+    连接器不会一直占用内存。
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[Hashable, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    @property
+    def _sweep_interval(self) -> float:
+        # 空桶补满所需的时间
+        return max(self.burst, 1) / self.rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _bucket(self, key: Hashable) -> TokenBucket:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sweep >= self._sweep_interval:
+                self._last_sweep = now
+                self._buckets = {
+                    k: b for k, b in self._buckets.items() if not b.idle(now)
+                }
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket
+
+    def try_acquire(self, key: Hashable) -> Optional[float]:
+        if not self.enabled:
+            return None
+        return self._bucket(key).try_acquire()
+
+    def acquire(self, key: Hashable, timeout: Optional[float] = None) -> bool:
+        if not self.enabled:
+            return True
+        return self._bucket(key).acquire(timeout)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
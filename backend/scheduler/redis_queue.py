@@ -0,0 +1,272 @@
+import json
+import logging
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import redis
+
+from backend.config import settings
+from backend.scheduler.dispatcher import (
+    DispatchQueueFull,
+    DuplicateTrigger,
+    TriggerPriority,
+    TriggerRateLimited,
+    TriggerTicket,
+)
+from backend.scheduler.rate_limit import RateLimiter
+
+
+logger = logging.getLogger("redis_trigger_queue")
+
+
+def create_redis_client() -> "redis.Redis":
+    return redis.Redis(**settings.redis.config_dict, decode_responses=True)
+
+
+def default_consumer_name() -> str:
+    return f"{socket.gethostname()}-{threading.get_native_id()}-{int(time.time())}"
+
+
+@dataclass
+class QueuedTrigger:
+    """从 Stream 读出、尚未确认的一次触发"""
+
+    stream: str
+    message_id: str
+    ticket: TriggerTicket
+
+
+class RedisTriggerQueue:
+    """基于 Redis Streams 的分布式触发队列
+
+    每个优先级一个 Stream，worker 以消费组方式读取，执行结束后 XACK 并删除消息，
+    因此 Stream 长度即排队 + 执行中的触发数。去重用带过期时间的任务锁实现，
+    跨进程生效；worker 异常退出后，空闲超过 claim_idle_ms 的消息会被其他 worker 认领。
+    与 JobDispatcher.submit 保持相同的签名与拒绝异常，供 SchedulerManager 按配置替换。
+    """
+
+    def __init__(
+        self,
+        client: "redis.Redis",
+        prefix: str = "chatjob:scheduler",
+        group: str = "job-workers",
+        max_queue: int = 1000,
+        lock_seconds: int = 3600,
+        job_rate_per_minute: float = 6,
+        job_burst: int = 2,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.group = group
+        self.max_queue = max_queue
+        self.lock_seconds = lock_seconds
+        self.job_limiter = RateLimiter(job_rate_per_minute / 60, job_burst)
+        self.streams = {
+            priority: f"{prefix}:stream:{priority.name.lower()}"
+            for priority in sorted(TriggerPriority)
+        }
+        self.channel = f"{prefix}:plan_invalidation"
+        self.rejected: Dict[str, int] = {"duplicate": 0, "rate_limited": 0, "queue_full": 0}
+
+    def _lock_key(self, job_id: int) -> str:
+        return f"{self.prefix}:active:{job_id}"
+
+    # 生产端（API / 调度进程）
+    def submit(
+        self,
+        job_id: int,
+        priority: TriggerPriority,
+        dedup: bool = True,
+        rate_limit: bool = False,
+        scheduled_at: Optional[float] = None,
+        **kwargs: Any,
+    ) -> TriggerTicket:
+        """写入对应优先级的 Stream，被拒绝时抛出 DispatchRejected 子类"""
+        if priority != TriggerPriority.DAG and self.pending() >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise DispatchQueueFull("触发队列已满，请稍后重试")
+        if rate_limit:
+            wait = self.job_limiter.try_acquire(job_id)
+            if wait is not None:
+                self.rejected["rate_limited"] += 1
+                raise TriggerRateLimited(f"任务 {job_id} 触发过于频繁", retry_after=wait)
+        if dedup and not self.client.set(
+            self._lock_key(job_id), "1", nx=True, ex=self.lock_seconds
+        ):
+            self.rejected["duplicate"] += 1
+            raise DuplicateTrigger(f"任务 {job_id} 已在排队或运行中")
+        ticket = TriggerTicket(job_id, priority, dedup, kwargs, scheduled_at)
+        fields = {
+            "job_id": job_id,
+            "dedup": int(dedup),
+            "kwargs": json.dumps(kwargs),
+            "enqueued_at": ticket.enqueued_at,
+        }
+        if ticket.trigger_lag_ms is not None:
+            fields["trigger_lag_ms"] = ticket.trigger_lag_ms
+        try:
+            self.client.xadd(self.streams[priority], fields)
+        except Exception:
+            if dedup:
+                self.client.delete(self._lock_key(job_id))
+            raise
+        return ticket
+
+    def pending(self) -> int:
+        """排队与执行中的触发数（DAG 下游不在此队列中）"""
+        pipe = self.client.pipeline(transaction=False)
+        for priority, stream in self.streams.items():
+            if priority != TriggerPriority.DAG:
+                pipe.xlen(stream)
+        return sum(pipe.execute())
+
+    def publish_invalidation(self, kind: str, key: Optional[int] = None):
+        """通知各 worker 失效本地执行计划缓存或重载依赖图"""
+        self.client.publish(self.channel, json.dumps({"kind": kind, "key": key}))
+
+    def stats(self) -> Dict[str, Any]:
+        pipe = self.client.pipeline(transaction=False)
+        for stream in self.streams.values():
+            pipe.xlen(stream)
+        lengths = pipe.execute()
+        return {
+            "backend": "redis",
+            "streams": {
+                priority.name.lower(): length
+                for priority, length in zip(self.streams, lengths)
+            },
+            "rejected": dict(self.rejected),
+        }
+
+    def worker_stats(self, active_ms: int = 60000) -> Dict[str, int]:
+        """消费组状态：已投递未确认（执行中）的触发数，以及最近 active_ms 内读取过的 worker 数"""
+        running = 0
+        workers = set()
+        for stream in self.streams.values():
+            try:
+                groups = self.client.xinfo_groups(stream)
+            except redis.ResponseError:
+                # Stream 尚未创建，说明还没有 worker 启动过
+                continue
+            for group in groups:
+                if group["name"] != self.group:
+                    continue
+                running += int(group["pending"])
+                if not group["consumers"]:
+                    continue
+                for consumer in self.client.xinfo_consumers(stream, self.group):
+                    # 异常退出的 worker 仍留在消费组中，按空闲时间排除
+                    if int(consumer["idle"]) <= active_ms:
+                        workers.add(consumer["name"])
+        return {"workers": len(workers), "running": running}
+
+    # 消费端（worker 进程）
+    def ensure_groups(self):
+        for stream in self.streams.values():
+            try:
+                self.client.xgroup_create(stream, self.group, id="0", mkstream=True)
+            except redis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    def _parse(self, stream: str, message_id: str, fields: Dict[str, str]) -> QueuedTrigger:
+        priority = next(p for p, s in self.streams.items() if s == stream)
+        ticket = TriggerTicket(
+            int(fields["job_id"]),
+            priority,
+            fields.get("dedup") == "1",
+            json.loads(fields.get("kwargs") or "{}"),
+        )
+        ticket.enqueued_at = float(fields.get("enqueued_at") or ticket.enqueued_at)
+        if fields.get("trigger_lag_ms"):
+            ticket.trigger_lag_ms = float(fields["trigger_lag_ms"])
+        return QueuedTrigger(stream, message_id, ticket)
+
+    def read(self, consumer: str, count: int = 1, block_ms: int = 5000) -> List[QueuedTrigger]:
+        """按优先级读取新消息：先非阻塞逐级读取，都为空时阻塞等待任一 Stream"""
+        for stream in self.streams.values():
+            entries = self.client.xreadgroup(
+                self.group, consumer, {stream: ">"}, count=count
+            )
+            if entries:
+                return [
+                    self._parse(stream, message_id, fields)
+                    for _, messages in entries
+                    for message_id, fields in messages
+                ]
+        entries = self.client.xreadgroup(
+            self.group,
+            consumer,
+            {stream: ">" for stream in self.streams.values()},
+            count=1,
+            block=block_ms,
+        )
+        return [
+            self._parse(stream, message_id, fields)
+            for stream, messages in entries or []
+            for message_id, fields in messages
+        ]
+
+    def claim_stale(
+        self, consumer: str, min_idle_ms: int, count: int = 10
+    ) -> List[QueuedTrigger]:
+        """认领其他 worker 超时未确认的消息（通常是进程异常退出）"""
+        claimed: List[QueuedTrigger] = []
+        for stream in self.streams.values():
+            result = self.client.xautoclaim(
+                stream,
+                self.group,
+                consumer,
+                min_idle_ms,
+                start_id="0-0",
+                count=count - len(claimed),
+            )
+            for message_id, fields in result[1]:
+                # 已被删除的消息只剩 ID，直接确认
+                if not fields:
+                    self.client.xack(stream, self.group, message_id)
+                    continue
+                claimed.append(self._parse(stream, message_id, fields))
+                logger.warning(f"claimed stale trigger {message_id} from {stream}")
+            if len(claimed) >= count:
+                break
+        return claimed
+
+    def touch(self, consumer: str, items: List[QueuedTrigger]):
+        """刷新执行中消息的空闲时间，避免长任务被其他 worker 认领"""
+        for item in items:
+            self.client.xclaim(
+                item.stream, self.group, consumer, 0, [item.message_id], justid=True
+            )
+
+    def ack(self, item: QueuedTrigger):
+        pipe = self.client.pipeline()
+        pipe.xack(item.stream, self.group, item.message_id)
+        pipe.xdel(item.stream, item.message_id)
+        if item.ticket.dedup:
+            pipe.delete(self._lock_key(item.ticket.job_id))
+        pipe.execute()
+
+    def subscribe_invalidations(
+        self, handler: Callable[[str, Optional[int]], None]
+    ) -> threading.Thread:
+        """后台线程订阅计划失效通知"""
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+
+        def _listen():
+            for message in pubsub.listen():
+                try:
+                    payload = json.loads(message["data"])
+                    handler(payload["kind"], payload.get("key"))
+                except Exception as e:
+                    logger.error(f"plan invalidation failed: {e}")
+
+        thread = threading.Thread(
+            target=_listen, name="plan-invalidation", daemon=True
+        )
+        thread.start()
+        return thread
@@ -0,0 +1,92 @@
+import logging
+from typing import Dict
+
+from backend.config import settings
+from backend.database.session import db_connection
+from backend.database.service.scheduler_service import SchedulerService
+
+
+logger = logging.getLogger("run_retention")
+
+
+class RunRetentionPruner:
+    """运行记录保留策略执行器
+
+    按任务的 retention_days（未设置时取全局默认）清理过期的 job_runs，
+    可选先归档到 job_runs_archive（不含 result），每批一个短事务，
+    避免长时间锁表。清理前先把超过 stale_seconds 仍为 running 的遗留记录
+    标记为失败（RunRecorder 在内存中攒批，进程异常退出时未写回的结束状态会丢失）。
+    """
+
+    # 单次清理最多处理的批次数，防止积压过多时长时间占用调度线程
+    MAX_BATCHES = 1000
+
+    def __init__(
+        self,
+        default_days: int = settings.scheduler.run_retention_days,
+        archive: bool = settings.scheduler.run_archive_enabled,
+        archive_days: int = settings.scheduler.run_archive_retention_days,
+        batch_size: int = settings.scheduler.run_prune_batch_size,
+        stale_seconds: int = settings.scheduler.run_stale_seconds,
+    ):
+        self.default_days = default_days
+        self.archive = archive
+        self.archive_days = archive_days
+        self.batch_size = batch_size
+        self.stale_seconds = stale_seconds
+
+    def fail_stale_runs(self) -> int:
+        """遗留的 running 记录标记为失败，返回处理条数"""
+        if self.stale_seconds <= 0:
+            return 0
+        total = 0
+        for _ in range(self.MAX_BATCHES):
+            with db_connection.get_cursor() as cursor:
+                count = SchedulerService(cursor).fail_stale_runs(
+                    self.stale_seconds, self.batch_size
+                )
+            total += count
+            if count < self.batch_size:
+                break
+        if total:
+            logger.warning(f"marked {total} stale running job runs as failed")
+        return total
+
+    def prune(self) -> Dict[str, int]:
+        stats = {
+            "failed_stale": self.fail_stale_runs(),
+            "archived": 0,
+            "deleted": 0,
+            "purged": 0,
+        }
+        with db_connection.get_cursor() as cursor:
+            days_list = SchedulerService(cursor).list_retention_days(
+                self.default_days
+            )
+
+        for days in days_list:
+            # 0 或负数表示永久保留
+            if not days or days <= 0:
+                continue
+            key = "archived" if self.archive else "deleted"
+            for _ in range(self.MAX_BATCHES):
+                with db_connection.get_cursor() as cursor:
+                    count = SchedulerService(cursor).prune_expired_runs(
+                        days, self.default_days, self.batch_size, self.archive
+                    )
+                stats[key] += count
+                if count < self.batch_size:
+                    break
+
+        if self.archive and self.archive_days > 0:
+            for _ in range(self.MAX_BATCHES):
+                with db_connection.get_cursor() as cursor:
+                    count = SchedulerService(cursor).purge_archived_runs(
+                        self.archive_days, self.batch_size
+                    )
+                stats["purged"] += count
+                if count < self.batch_size:
+                    break
+
+        logger.info(f"job run retention finished: {stats}")
+        return stats
@@ -0,0 +1,43 @@
+import random
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from backend.config import settings
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """失败重试策略，来自模板/任务配置中的 retry 字段，未配置时取全局默认"""
+
+    max_attempts: int = 1
+    backoff_ms: int = 1000
+    max_backoff_ms: int = 60000
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "RetryPolicy":
+        retry = cfg.get("retry") or {}
+        return cls(
+            max_attempts=max(
+                int(retry.get("max_attempts", settings.scheduler.retry_max_attempts)),
+                1,
+            ),
+            backoff_ms=max(
+                int(retry.get("backoff_ms", settings.scheduler.retry_backoff_ms)), 0
+            ),
+            max_backoff_ms=max(
+                int(
+                    retry.get(
+                        "max_backoff_ms", settings.scheduler.retry_max_backoff_ms
+                    )
+                ),
+                0,
+            ),
+        )
+
+    def can_retry(self, attempt: int) -> bool:
+        return attempt < self.max_attempts
+
+    def delay_seconds(self, attempt: int) -> float:
+        """第 attempt 次失败后的等待时间：指数退避加最多 10% 抖动"""
+        delay = min(self.backoff_ms * (2 ** (attempt - 1)), self.max_backoff_ms)
+        return delay * (1 + random.uniform(0, 0.1)) / 1000
@@ -0,0 +1,128 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.database.session import db_connection
+from backend.database.service.scheduler_service import SchedulerService
+
+
+logger = logging.getLogger("run_recorder")
+
+
+class RunRecorder:
+    """运行记录异步批量写入器
+
+    执行线程只把运行结果放入内存队列，后台线程按时间窗口或条数攒批，
+    以一条多行语句写回 job_runs，查询执行期间不再占用元数据库事务。
+
+    写回失败的更新会重新入队，同一更新可能写入多次（至少一次）；每次写入的都是
+    最终字段值，重复写入结果不变。进程异常退出时队列中未写回的更新会丢失，
+    对应记录停留在 running，由 RunRetentionPruner.fail_stale_runs 定期标记为失败。
+    """
+
+    # 写库失败时单条更新的最大重试次数
+    MAX_RETRIES = 3
+
+    def __init__(self, flush_interval_ms: int = 200, batch_size: int = 200):
+        self.flush_interval = max(flush_interval_ms, 1) / 1000
+        self.batch_size = max(batch_size, 1)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="run-recorder", daemon=True
+        )
+        self._thread.start()
+        logger.info("run recorder started")
+
+    def stop(self, timeout: float = 5.0):
+        """停止后台线程并写回剩余更新"""
+        if not self.running:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+        logger.info("run recorder stopped")
+
+    def submit(self, run_id: int, **fields: Any):
+        """提交一次运行状态更新，None 字段不会覆盖已有值"""
+        update = {"id": run_id, **fields}
+        if not self.running:
+            # 未启动后台线程时（如单独调用）直接同步写回
+            self._write([update])
+            return
+        self._queue.put(update)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self):
+        """同步写回队列中所有更新"""
+        batch = self._drain(block=False)
+        while batch:
+            self._write(batch)
+            batch = self._drain(block=False)
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._write(batch)
+
+    def _drain(self, block: bool) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if block:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _merge(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """同一运行的多次更新按提交顺序合并为一条"""
+        merged: Dict[int, Dict[str, Any]] = {}
+        for update in batch:
+            target = merged.setdefault(update["id"], {})
+            for key, value in update.items():
+                if value is None:
+                    continue
+                if key == "metrics" and target.get(key):
+                    # 指标可能分多次提交（如调度延迟在执行结束后补充），合并而非覆盖
+                    target[key] = {**target[key], **value}
+                else:
+                    target[key] = value
+        return list(merged.values())
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        updates = self._merge(batch)
+        try:
+            with db_connection.get_cursor() as cursor:
+                SchedulerService(cursor).finish_runs(updates)
+        except Exception as e:
+            logger.error(f"failed to flush {len(updates)} job run updates: {e}")
+            for update in updates:
+                retries = update.pop("_retries", 0) + 1
+                if retries > self.MAX_RETRIES or not self.running:
+                    logger.error(f"dropped job run update {update['id']}")
+                    continue
+                self._queue.put({**update, "_retries": retries})
@@ -0,0 +1,208 @@
+import logging
+import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from backend.database.service.scheduler_service import SHARD_STRATEGIES
+from backend.infra.connectors.base import DatabaseConnector
+from backend.scheduler.profiling import estimate_rows_bytes
+
+
+logger = logging.getLogger("job_sharding")
+
+PREVIEW_ROWS = 10
+# 分片查询分批读取，只保留预览行，避免大表结果整体驻留内存
+FETCH_BATCH_SIZE = 5000
+_IDENTIFIER = re.compile(r"^[A-Za-z0-9_$]+$")
+
+
+@dataclass
+class Shard:
+    index: int
+    key: str
+    sql: str
+    params: Dict[str, Any]
+
+
+@dataclass
+class ShardOutcome:
+    shard: Shard
+    status: str = "failed"
+    attempts: int = 0
+    rows: int = 0
+    bytes: int = 0
+    preview: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_ms: int = 0
+
+    def as_record(self) -> Dict[str, Any]:
+        return {
+            "shard_index": self.shard.index,
+            "shard_key": self.shard.key,
+            "status": self.status,
+            "attempts": self.attempts,
+            "rows_affected": self.rows,
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _quote_identifier(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"非法的标识符: {name}")
+    return f"`{name}`"
+
+
+def _key_range_shards(
+    connector: DatabaseConnector,
+    sql: str,
+    params: Dict[str, Any],
+    sharding: Dict[str, Any],
+) -> List[Shard]:
+    low, high = sharding.get("min"), sharding.get("max")
+    if low is None or high is None:
+        column = _quote_identifier(sharding["column"])
+        table = _quote_identifier(sharding["table"])
+        rows = connector.execute_query(
+            f"SELECT MIN({column}) AS lo, MAX({column}) AS hi FROM {table}"
+        )
+        low = rows[0]["lo"] if rows else None
+        high = rows[0]["hi"] if rows else None
+        if low is None or high is None:
+            return []
+    low, high = int(low), int(high)
+    count = max(int(sharding.get("shards", 4)), 1)
+    step = max(math.ceil((high - low + 1) / count), 1)
+    shards = []
+    for index, start in enumerate(range(low, high + 1, step)):
+        end = min(start + step, high + 1)
+        shards.append(
+            Shard(
+                index=index,
+                key=f"[{start}, {end})",
+                sql=sql,
+                params={**params, "shard_start": start, "shard_end": end},
+            )
+        )
+    return shards
+
+
+def _partition_shards(
+    connector: DatabaseConnector,
+    sql: str,
+    params: Dict[str, Any],
+    sharding: Dict[str, Any],
+) -> List[Shard]:
+    partitions = sharding.get("partitions")
+    if not partitions:
+        table = _quote_identifier(sharding["table"])
+        rows = connector.execute_query(f"SHOW PARTITIONS FROM {table}")
+        partitions = [row["PartitionName"] for row in rows]
+    return [
+        Shard(
+            index=index,
+            key=name,
+            sql=sql.replace("{partition}", f"PARTITION ({_quote_identifier(name)})"),
+            params=dict(params),
+        )
+        for index, name in enumerate(partitions)
+    ]
+
+
+def plan_shards(
+    connector: DatabaseConnector, cfg: Dict[str, Any], params: Optional[Dict[str, Any]]
+) -> List[Shard]:
+    """按模板的 sharding 配置把一次运行切分为多个分片查询"""
+    sharding = cfg["sharding"]
+    strategy = sharding.get("strategy")
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"不支持的分片策略: {strategy}")
+    if strategy == "key_range":
+        return _key_range_shards(connector, cfg["sql"], params or {}, sharding)
+    return _partition_shards(connector, cfg["sql"], params or {}, sharding)
+
+
+class ShardedExecutor:
+    """分片并行执行器
+
+    同一次运行的分片在独立线程池中并行执行，失败的分片按指数退避重试，
+    各分片只保留行数与预览行，汇总后作为父运行的结果。
+    """
+
+    def __init__(self, max_workers: int = 8, retry_backoff_ms: int = 500):
+        self.max_workers = max(max_workers, 1)
+        self.retry_backoff = retry_backoff_ms / 1000
+
+    def execute(
+        self, connector: DatabaseConnector, shards: List[Shard], sharding: Dict[str, Any]
+    ) -> List[ShardOutcome]:
+        if not shards:
+            return []
+        retries = max(int(sharding.get("retries", 2)), 0)
+        workers = min(
+            int(sharding.get("max_workers") or self.max_workers),
+            self.max_workers,
+            len(shards),
+        )
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="job-shard"
+        ) as pool:
+            return list(
+                pool.map(lambda shard: self._run_shard(connector, shard, retries), shards)
+            )
+
+    def _run_shard(
+        self, connector: DatabaseConnector, shard: Shard, retries: int
+    ) -> ShardOutcome:
+        outcome = ShardOutcome(shard=shard, started_at=datetime.now())
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            outcome.attempts = attempt + 1
+            outcome.rows, outcome.bytes, outcome.preview = 0, 0, []
+            try:
+                for batch in connector.execute_query_iterator(
+                    shard.sql, shard.params, FETCH_BATCH_SIZE
+                ):
+                    if len(outcome.preview) < PREVIEW_ROWS:
+                        outcome.preview.extend(batch[: PREVIEW_ROWS - len(outcome.preview)])
+                    outcome.rows += len(batch)
+                    outcome.bytes += estimate_rows_bytes(batch)
+                outcome.status, outcome.error = "success", None
+                break
+            except Exception as e:
+                outcome.error = str(e)
+                logger.warning(
+                    f"shard {shard.key} attempt {attempt + 1}/{retries + 1} failed: {e}"
+                )
+                if attempt < retries:
+                    time.sleep(self.retry_backoff * (2**attempt))
+        outcome.finished_at = datetime.now()
+        outcome.duration_ms = int((time.perf_counter() - start) * 1000)
+        return outcome
+
+
+def aggregate(outcomes: List[ShardOutcome]) -> Dict[str, Any]:
+    """汇总分片结果：总行数、按分片顺序拼接的预览与失败分片"""
+    preview: List[Dict[str, Any]] = []
+    for outcome in outcomes:
+        if len(preview) >= PREVIEW_ROWS:
+            break
+        preview.extend(outcome.preview[: PREVIEW_ROWS - len(preview)])
+    failed = [o.shard.key for o in outcomes if o.status != "success"]
+    return {
+        "preview": preview,
+        "total": sum(o.rows for o in outcomes),
+        "shards": {
+            "count": len(outcomes),
+            "failed": failed,
+            "retries": sum(max(o.attempts - 1, 0) for o in outcomes),
+        },
+    }
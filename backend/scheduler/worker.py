@@ -0,0 +1,184 @@
+"""调度执行 worker
+
+redis 执行后端下，API 进程只把到期运行写入 Redis Streams，本进程消费并执行，
+结果照常写入 job_runs。可按负载启动多个 worker 水平扩展：
+
+    SCHEDULER_EXECUTION_BACKEND=redis python -m backend.scheduler.worker
+"""
+
+import argparse
+import logging
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.config import settings
+from backend.database.session import create_tables
+from backend.scheduler.manager import SchedulerManager, scheduler_manager
+from backend.scheduler.redis_queue import (
+    QueuedTrigger,
+    RedisTriggerQueue,
+    default_consumer_name,
+)
+
+
+logger = logging.getLogger("scheduler_worker")
+
+
+class QueueWorker:
+    """从触发队列读取运行并在线程池中执行，执行结束后确认消息"""
+
+    def __init__(
+        self,
+        manager: SchedulerManager,
+        queue: RedisTriggerQueue,
+        consumer: str,
+        concurrency: int = 8,
+        block_ms: int = 5000,
+        claim_idle_ms: int = 60000,
+    ):
+        self.manager = manager
+        self.queue = queue
+        self.consumer = consumer
+        self.concurrency = max(concurrency, 1)
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._inflight: Dict[str, QueuedTrigger] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._last_touch = 0.0
+        self._last_claim = 0.0
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        self.queue.ensure_groups()
+        self.queue.subscribe_invalidations(self.manager.apply_invalidation)
+        self.manager.start_worker()
+        logger.info(
+            f"worker {self.consumer} started, concurrency={self.concurrency}"
+        )
+        pool = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="job-worker"
+        )
+        try:
+            while not self._stop_event.is_set():
+                # 有空闲执行槽才读取，未执行的消息留在 Stream 中供其他 worker 消费
+                if not self._slots.acquire(timeout=1):
+                    # 没有空闲执行槽时只刷新执行中的消息，不认领新的
+                    self._touch_inflight()
+                    continue
+                try:
+                    items = self._next_items()
+                except Exception as e:
+                    self._slots.release()
+                    logger.error(f"read trigger queue failed: {e}")
+                    self._stop_event.wait(1)
+                    continue
+                if not items:
+                    self._slots.release()
+                    continue
+                for index, item in enumerate(items):
+                    # 第一条占用已获取的执行槽，认领到的多条消息依次等待执行槽
+                    if index > 0:
+                        self._slots.acquire()
+                    with self._lock:
+                        self._inflight[item.message_id] = item
+                    pool.submit(self._execute, item)
+        finally:
+            # 等待执行中的运行结束并确认，再停止写入器等组件
+            pool.shutdown(wait=True)
+            self.manager.shutdown()
+            logger.info(f"worker {self.consumer} stopped")
+
+    def _next_items(self) -> List[QueuedTrigger]:
+        """持有执行槽时调用：先认领其他 worker 遗留的消息，没有再读取新消息
+
+        XAUTOCLAIM 会立即把消息转到本消费者名下，只能在有执行槽时认领，
+        否则认领到的消息不在 _inflight 中，既不执行也不会被刷新或确认。
+        """
+        self._touch_inflight()
+        now = time.monotonic()
+        if now - self._last_claim >= self._maintenance_interval:
+            self._last_claim = now
+            stale = self.queue.claim_stale(self.consumer, self.claim_idle_ms, count=1)
+            if stale:
+                return stale
+        return self.queue.read(self.consumer, 1, self.block_ms)
+
+    @property
+    def _maintenance_interval(self) -> float:
+        # 空闲阈值的三分之一（秒），保证执行中的消息在被判定遗留前刷新
+        return self.claim_idle_ms / 3000
+
+    def _touch_inflight(self):
+        """定期刷新执行中消息的空闲时间，避免长任务被其他 worker 认领"""
+        now = time.monotonic()
+        if now - self._last_touch < self._maintenance_interval:
+            return
+        self._last_touch = now
+        with self._lock:
+            inflight = list(self._inflight.values())
+        if inflight:
+            self.queue.touch(self.consumer, inflight)
+
+    def _execute(self, item: QueuedTrigger):
+        ticket = item.ticket
+        ticket.started_at = time.time()
+        try:
+            self.manager.execute_ticket(ticket)
+        except Exception as e:
+            logger.error(f"job {ticket.job_id} execution failed: {e}")
+        finally:
+            try:
+                self.queue.ack(item)
+            except Exception as e:
+                logger.error(f"ack trigger {item.message_id} failed: {e}")
+            with self._lock:
+                self._inflight.pop(item.message_id, None)
+            self._slots.release()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="调度执行 worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.scheduler.worker_concurrency,
+        help="并发执行的运行数",
+    )
+    parser.add_argument(
+        "--consumer", default=None, help="消费者名称，默认按主机名与进程生成"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    logging.basicConfig(
+        level=getattr(logging, settings.log.level.upper(), logging.INFO),
+        format=settings.log.format,
+        datefmt=settings.log.date_format,
+    )
+    args = parse_args(argv)
+    if scheduler_manager.work_queue is None:
+        raise SystemExit("worker 需要 SCHEDULER_EXECUTION_BACKEND=redis")
+    create_tables()
+    worker = QueueWorker(
+        scheduler_manager,
+        scheduler_manager.work_queue,
+        consumer=args.consumer or default_consumer_name(),
+        concurrency=args.concurrency,
+        block_ms=settings.scheduler.worker_block_ms,
+        claim_idle_ms=settings.scheduler.worker_claim_idle_ms,
+    )
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: worker.stop())
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
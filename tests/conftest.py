@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+
+import pytest
+
+
+class FakeClock:
+    """可手动推进的时钟，替换模块中的 time.time / time.monotonic"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class FakeDBConnection:
+    """替换模块中的 db_connection，不连接数据库，只记录打开的事务数"""
+
+    def __init__(self):
+        self.transactions = 0
+
+    @contextmanager
+    def get_cursor(self):
+        self.transactions += 1
+        yield None
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_db() -> FakeDBConnection:
+    return FakeDBConnection()
@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional
+
+import pytest
+
+from backend.database.model.connector import ConnectorModel
+from backend.scheduler import change_watcher
+from backend.scheduler.change_watcher import ChangeWatcher
+from backend.scheduler.plan_cache import JobPlan
+
+# job_id -> (connector_id, watch_tables)
+WATCHES = {1: (10, ["a"]), 2: (10, ["a", "b"]), 3: (20, ["a"])}
+
+
+class FakeConnector:
+    def __init__(self, versions: Dict[str, Optional[str]], probes: List[int], connector_id: int):
+        self.versions = versions
+        self.probes = probes
+        self.connector_id = connector_id
+
+    def get_table_versions(self, tables, mode):
+        self.probes.append(self.connector_id)
+        return {t: self.versions.get(t) for t in tables}
+
+
+class Harness:
+    def __init__(self):
+        self.versions: Dict[int, Dict[str, Optional[str]]] = {10: {}, 20: {}}
+        self.probes: List[int] = []
+        self.fired: List[int] = []
+        self.reject = set()
+        self.watcher = ChangeWatcher(self.plan, self.connect, self.on_change)
+
+    def plan(self, job_id: int) -> JobPlan:
+        connector_id, tables = WATCHES[job_id]
+        return JobPlan(
+            job_id=job_id,
+            template_id=1,
+            template_type="db_query",
+            config={"watch_tables": tables},
+            connector=ConnectorModel(id=connector_id),
+        )
+
+    def connect(self, connector: ConnectorModel) -> FakeConnector:
+        return FakeConnector(self.versions[connector.id], self.probes, connector.id)
+
+    def on_change(self, job_id: int):
+        if job_id in self.reject:
+            return None
+        self.fired.append(job_id)
+        return object()
+
+    def poll(self) -> Dict[str, int]:
+        self.fired = []
+        return self.watcher.poll()
+
+
+@pytest.fixture
+def harness(monkeypatch, clock) -> Harness:
+    monkeypatch.setattr(change_watcher.time, "monotonic", clock)
+    harness = Harness()
+    for job_id in WATCHES:
+        harness.watcher.register(job_id)
+    return harness
+
+
+def test_probes_once_per_connector_and_baseline_does_not_fire(harness):
+    harness.versions[10].update(a="1", b="1")
+    harness.versions[20].update(a="1")
+    assert harness.poll() == {"connectors": 2, "tables": 3, "triggered": 0}
+    assert sorted(harness.probes) == [10, 20]
+
+
+def test_change_fires_only_jobs_watching_the_table(harness):
+    harness.versions[10].update(a="1", b="1")
+    harness.poll()
+    harness.versions[10]["b"] = "2"
+    assert harness.poll()["triggered"] == 1
+    assert harness.fired == [2]
+    # 版本不再变化时不重复触发
+    assert harness.poll()["triggered"] == 0
+
+
+def test_missing_version_is_not_a_change(harness):
+    harness.versions[10].update(a="1")
+    harness.poll()
+    harness.versions[10]["a"] = None
+    harness.poll()
+    harness.versions[10]["a"] = "1"
+    assert harness.poll()["triggered"] == 0
+
+
+def test_rejected_trigger_retried_next_poll(harness):
+    harness.versions[20].update(a="1")
+    harness.poll()
+    harness.versions[20]["a"] = "2"
+    harness.reject.add(3)
+    assert harness.poll()["triggered"] == 0
+
+    harness.reject.clear()
+    assert harness.poll()["triggered"] == 1
+    assert harness.fired == [3]
+
+
+def test_min_interval_defers_trigger(harness, clock):
+    harness.watcher.register(3, min_interval_seconds=60)
+    harness.versions[20].update(a="1")
+    harness.poll()
+    harness.versions[20]["a"] = "2"
+    assert harness.fired == [] and harness.poll()["triggered"] == 1
+
+    harness.versions[20]["a"] = "3"
+    clock.advance(30)
+    assert harness.poll()["triggered"] == 0
+    clock.advance(30)
+    assert harness.poll()["triggered"] == 1
+
+
+def test_unregistered_job_not_probed(harness):
+    for job_id in WATCHES:
+        assert harness.watcher.unregister(job_id)
+    assert not harness.watcher.unregister(1)
+    assert harness.poll() == {"connectors": 0, "tables": 0, "triggered": 0}
+    assert harness.probes == []
@@ -0,0 +1,151 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import pytest
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from backend.chat import context
+from backend.chat.context import (
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_tokens,
+    fit_window,
+    message_tokens,
+    summarize_if_needed,
+    truncate_text,
+)
+from backend.config import settings
+from backend.database.dao.chat_dao import ChatDAO
+
+
+class FakeCursor:
+    """按 update_summary 的条件更新内存中的会话摘要"""
+
+    def __init__(self, summary_upto: Optional[int] = None):
+        self.conversation: Dict[str, Any] = {"summary": None, "summary_upto": summary_upto}
+        self.rowcount = 0
+
+    def execute(self, sql: str, params):
+        summary, summary_upto, _, expected = params
+        if (self.conversation["summary_upto"] or 0) == expected:
+            self.conversation.update(summary=summary, summary_upto=summary_upto)
+            self.rowcount = 1
+        else:
+            self.rowcount = 0
+
+
+class FakeLLM:
+    def __init__(self, reply: Any = "summary"):
+        self.reply = reply
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return AIMessage(content=self.reply)
+
+
+def human(tokens: int) -> HumanMessage:
+    return HumanMessage(content="a" * 4 * tokens)
+
+
+def ai(tokens: int) -> AIMessage:
+    return AIMessage(content="a" * 4 * tokens)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("查询订单") == 4
+    assert message_tokens(human(3)) == 3 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_truncate_text_keeps_head_and_tail():
+    assert truncate_text("short", 10) == "short"
+    text = truncate_text("a" * 20 + "b" * 10, 15)
+    assert text.startswith("a" * 10) and text.endswith("b" * 5)
+    assert "省略 15 字符" in text
+
+
+def test_fit_window_drops_oldest_messages():
+    size = 6 + MESSAGE_OVERHEAD_TOKENS
+    messages = [human(6), ai(6), human(6), ai(6)]
+    assert fit_window(messages, size * 4) == messages
+    assert fit_window(messages, size * 3) == messages[2:]
+    assert fit_window(messages, size * 2) == messages[2:]
+
+
+def test_fit_window_does_not_start_with_reply_or_tool_result():
+    size = 6 + MESSAGE_OVERHEAD_TOKENS
+    messages = [human(6), ai(6), SystemMessage(content="a" * 24), human(6), ai(6)]
+    assert fit_window(messages, size * 3) == messages[3:]
+
+
+def test_fit_window_keeps_last_message_over_budget():
+    messages = [human(6), ai(100)]
+    assert fit_window(messages, 10) == messages[-1:]
+    assert fit_window([], 10) == []
+
+
+def test_update_summary_compare_and_swap():
+    cursor = FakeCursor()
+    dao = ChatDAO(cursor)
+    assert dao.update_summary(1, "s1", 10, None)
+    # 摘要已推进到 10，按旧进度写入的请求放弃
+    assert not dao.update_summary(1, "stale", 12, None)
+    assert dao.update_summary(1, "s2", 20, 10)
+    assert cursor.conversation == {"summary": "s2", "summary_upto": 20}
+
+
+@pytest.fixture
+def summary_store(monkeypatch, fake_db):
+    cursor = FakeCursor(summary_upto=5)
+    pending = {
+        "summary": "old",
+        "summary_upto": 5,
+        "rows": [
+            {"id": 6, "role": "user", "content": "q", "name": None},
+            {"id": 7, "role": "assistant", "content": "a", "name": None},
+        ],
+    }
+    monkeypatch.setattr(context, "db_connection", fake_db)
+    monkeypatch.setattr(context, "ChatDAO", lambda _: ChatDAO(cursor))
+    monkeypatch.setattr(context, "_pending_rows", lambda conversation_id: pending)
+    return cursor
+
+
+def test_summarize_merges_pending_rows(summary_store):
+    llm = FakeLLM("new summary")
+    assert asyncio.run(summarize_if_needed(llm, 1))
+    assert summary_store.conversation == {"summary": "new summary", "summary_upto": 7}
+    prompt = llm.prompts[0][-1].content
+    assert "old" in prompt and "user: q" in prompt and "assistant: a" in prompt
+
+
+def test_concurrent_summaries_only_first_is_saved(summary_store):
+    async def both():
+        return await asyncio.gather(
+            summarize_if_needed(FakeLLM("first"), 1),
+            summarize_if_needed(FakeLLM("second"), 1),
+        )
+
+    assert sorted(asyncio.run(both())) == [False, True]
+    assert summary_store.conversation["summary_upto"] == 7
+
+
+def test_summary_is_truncated(monkeypatch, summary_store):
+    monkeypatch.setattr(settings.chat, "summary_max_tokens", 5)
+    assert asyncio.run(summarize_if_needed(FakeLLM("x" * 50), 1))
+    assert "省略" in summary_store.conversation["summary"]
+
+
+def test_summarize_failures_are_swallowed(monkeypatch, summary_store):
+    assert not asyncio.run(summarize_if_needed(FakeLLM(RuntimeError("boom")), 1))
+    assert not asyncio.run(summarize_if_needed(FakeLLM("  "), 1))
+    assert summary_store.conversation["summary_upto"] == 5
+
+    monkeypatch.setattr(context, "_pending_rows", lambda conversation_id: None)
+    llm = FakeLLM()
+    assert not asyncio.run(summarize_if_needed(llm, 1))
+    assert llm.prompts == []
@@ -0,0 +1,142 @@
+import pytest
+
+from backend.chat import tools
+from backend.chat.tools import ToolRegistry, Tool, read_only_sql, run_sql
+from backend.config import settings
+from backend.infra.connectors.mysql import MySQLConnector
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT 1",
+        "  select * from t;  ",
+        "WITH x AS (SELECT 1) SELECT * FROM x",
+        "SHOW TABLES",
+        "DESC t",
+        "EXPLAIN SELECT * FROM t",
+        "SELECT update_time, created_for FROM t",
+    ],
+)
+def test_read_only_sql_accepts(sql):
+    assert read_only_sql(sql) == sql.strip().rstrip(";").strip()
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "",
+        "UPDATE t SET a=1",
+        "SELECT 1; DROP TABLE t",
+        "EXPLAIN ANALYZE DELETE FROM t",
+        "SELECT * FROM t INTO OUTFILE '/tmp/t.csv'",
+        "SELECT * FROM t INTO DUMPFILE '/tmp/t'",
+        "SELECT a INTO @v FROM t",
+        "SELECT * FROM t FOR UPDATE",
+        "SELECT * FROM t FOR SHARE",
+        "SELECT * FROM t LOCK IN SHARE MODE",
+        "WITH x AS (SELECT 1) DELETE FROM t",
+    ],
+)
+def test_read_only_sql_rejects(sql):
+    with pytest.raises(ValueError):
+        read_only_sql(sql)
+
+
+@pytest.fixture
+def mysql() -> MySQLConnector:
+    return MySQLConnector("localhost", 3306, "u", "p", "db")
+
+
+def test_limit_query_keeps_join_columns(mysql):
+    sql = mysql.limit_query("SELECT a.id, b.id FROM a JOIN b ON a.x=b.x", 11)
+    assert sql == "SELECT a.id, b.id FROM a JOIN b ON a.x=b.x\nLIMIT 11"
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT * FROM t LIMIT 5", "SELECT * FROM t LIMIT 5"),
+        ("SELECT * FROM t limit 500", "SELECT * FROM t limit 11"),
+        ("SELECT * FROM t LIMIT 20, 500", "SELECT * FROM t LIMIT 20, 11"),
+        ("SELECT * FROM t LIMIT 500 OFFSET 20", "SELECT * FROM t LIMIT 11 OFFSET 20"),
+        ("SELECT * FROM t -- all", "SELECT * FROM t -- all\nLIMIT 11"),
+    ],
+)
+def test_limit_query_existing_limit(mysql, sql, expected):
+    assert mysql.limit_query(sql, 11) == expected
+
+
+def test_limit_query_timeout_hint_only_after_select(mysql):
+    assert mysql.limit_query("select * from t", 11, 2) == (
+        "SELECT /*+ MAX_EXECUTION_TIME(2000) */ * from t\nLIMIT 11"
+    )
+    assert mysql.limit_query("WITH x AS (SELECT 1) SELECT * FROM x", 11, 2) == (
+        "WITH x AS (SELECT 1) SELECT * FROM x\nLIMIT 11"
+    )
+
+
+class FakeConnector(MySQLConnector):
+    def __init__(self, rows, batch_size=3):
+        super().__init__("localhost", 3306, "u", "p", "db")
+        self.rows = rows
+        self.batch_size = batch_size
+        self.calls = []
+        self.closed = False
+
+    def execute_query_iterator(self, sql, params=None, batch_size=1000, read_only=False):
+        self.calls.append((sql, read_only))
+        try:
+            for i in range(0, len(self.rows), self.batch_size):
+                yield self.rows[i : i + self.batch_size]
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def chat_settings(monkeypatch):
+    cfg = settings.chat
+    monkeypatch.setattr(cfg, "tool_sql_max_rows", 5)
+    monkeypatch.setattr(cfg, "tool_sql_max_bytes", 10 ** 6)
+    monkeypatch.setattr(cfg, "tool_sql_sample_rows", 2)
+    monkeypatch.setattr(cfg, "tool_sql_timeout_seconds", 10)
+    return cfg
+
+
+def use_connector(monkeypatch, connector):
+    monkeypatch.setattr(tools, "_connector", lambda name: connector)
+
+
+def test_run_sql_caps_rows_and_samples(monkeypatch, chat_settings):
+    connector = FakeConnector([{"id": i, "name": f"n{i}"} for i in range(20)])
+    use_connector(monkeypatch, connector)
+    result = run_sql({"connector": "c", "sql": "SELECT id, name FROM t"})
+
+    assert result["row_count"] == 5
+    assert result["truncated"] == "rows"
+    assert result["columns"] == {"id": [0, 1], "name": ["n0", "n1"]}
+    [(sql, read_only)] = connector.calls
+    assert read_only
+    assert sql.endswith("\nLIMIT 6")
+    assert connector.closed
+
+
+def test_run_sql_byte_budget(monkeypatch, chat_settings):
+    monkeypatch.setattr(chat_settings, "tool_sql_max_bytes", 25)
+    use_connector(monkeypatch, FakeConnector([{"v": "x" * 10}] * 4))
+    result = run_sql({"connector": "c", "sql": "SELECT v FROM t"})
+    assert (result["row_count"], result["truncated"]) == (2, "bytes")
+
+
+def test_run_sql_complete_result(monkeypatch, chat_settings):
+    use_connector(monkeypatch, FakeConnector([{"n": 1}]))
+    result = run_sql({"connector": "c", "sql": "SHOW TABLES"})
+    assert (result["row_count"], result["truncated"]) == (1, None)
+
+
+def test_registry_returns_errors_to_model(monkeypatch, chat_settings):
+    registry = ToolRegistry()
+    registry.register(Tool("run_sql", "", {}, run_sql))
+    use_connector(monkeypatch, FakeConnector([]))
+    assert "error" in registry.run("run_sql", {"connector": "c", "sql": "DELETE FROM t"})
+    assert registry.run("missing", {}) == {"error": "未知工具: missing"}
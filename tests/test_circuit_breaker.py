@@ -0,0 +1,125 @@
+import socket
+
+import pytest
+from pymysql import err as pymysql_err
+
+from backend.scheduler import circuit_breaker
+from backend.scheduler.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    PROBE_TIMEOUT,
+    CircuitBreakerRegistry,
+    is_connection_error,
+)
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(circuit_breaker.time, "time", clock)
+
+
+def state_of(registry: CircuitBreakerRegistry, connector_id: int) -> str:
+    for item in registry.snapshot():
+        if item["connector_id"] == connector_id:
+            return item["state"]
+    return CLOSED
+
+
+def trip(registry: CircuitBreakerRegistry, connector_id: int = 1):
+    for _ in range(registry.failure_threshold):
+        registry.record_failure(connector_id, "connection refused")
+
+
+def test_opens_after_threshold():
+    registry = CircuitBreakerRegistry(failure_threshold=3, open_seconds=30)
+    registry.record_failure(1, "e")
+    registry.record_failure(1, "e")
+    assert registry.allow(1) == (True, 0.0)
+
+    registry.record_failure(1, "e")
+    assert state_of(registry, 1) == OPEN
+    allowed, wait = registry.allow(1)
+    assert not allowed and wait == pytest.approx(30)
+    # 其他连接器不受影响
+    assert registry.allow(2) == (True, 0.0)
+
+
+def test_success_resets_failure_count():
+    registry = CircuitBreakerRegistry(failure_threshold=2, open_seconds=30)
+    registry.record_failure(1, "e")
+    registry.record_success(1)
+    registry.record_failure(1, "e")
+    assert registry.allow(1) == (True, 0.0)
+
+
+def test_half_open_allows_single_probe(clock):
+    registry = CircuitBreakerRegistry(failure_threshold=1, open_seconds=30)
+    trip(registry)
+    clock.advance(30)
+
+    assert registry.allow(1) == (True, 0.0)
+    assert state_of(registry, 1) == HALF_OPEN
+    # 探测进行中，其他运行按一个熔断周期延后，而不是 0 秒
+    allowed, wait = registry.allow(1)
+    assert not allowed and wait == pytest.approx(30)
+
+    registry.record_success(1)
+    assert state_of(registry, 1) == CLOSED
+    assert registry.allow(1) == (True, 0.0)
+
+
+def test_probing_delay_bounded_by_probe_timeout(clock):
+    registry = CircuitBreakerRegistry(failure_threshold=1, open_seconds=30)
+    trip(registry)
+    clock.advance(30)
+    registry.allow(1)
+
+    clock.advance(PROBE_TIMEOUT - 10)
+    assert registry.allow(1) == (False, pytest.approx(10))
+    clock.advance(9.5)
+    assert registry.allow(1) == (False, 1.0)
+    # 探测超时未回报，重新放行一次探测
+    clock.advance(1)
+    assert registry.allow(1) == (True, 0.0)
+
+
+def test_failed_probe_doubles_open_time(clock):
+    registry = CircuitBreakerRegistry(
+        failure_threshold=1, open_seconds=30, max_open_seconds=100
+    )
+    trip(registry)
+    expected = [60, 100, 100]
+    for seconds in expected:
+        clock.advance(registry.snapshot()[0]["open_seconds"])
+        assert registry.allow(1) == (True, 0.0)
+        registry.record_failure(1, "probe failed")
+        assert state_of(registry, 1) == OPEN
+        assert registry.allow(1) == (False, pytest.approx(seconds))
+
+
+def test_reset_and_disabled():
+    registry = CircuitBreakerRegistry(failure_threshold=1, open_seconds=30)
+    trip(registry)
+    assert registry.reset(1)
+    assert not registry.reset(1)
+    assert registry.allow(1) == (True, 0.0)
+
+    disabled = CircuitBreakerRegistry(failure_threshold=1, open_seconds=0)
+    trip(disabled)
+    assert disabled.allow(1) == (True, 0.0)
+    assert disabled.snapshot() == []
+
+
+def test_is_connection_error_follows_cause_chain():
+    try:
+        try:
+            raise pymysql_err.OperationalError(2003, "Can't connect")
+        except Exception as e:
+            raise Exception("查询失败") from e
+    except Exception as wrapped:
+        assert is_connection_error(wrapped)
+
+    assert is_connection_error(socket.timeout())
+    assert not is_connection_error(pymysql_err.OperationalError(1064, "syntax"))
+    assert not is_connection_error(ValueError("bad"))
@@ -0,0 +1,82 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+from backend.scheduler import dag
+from backend.scheduler.dag import DagCoordinator
+
+# (job_id, upstream_id)：1 -> 2, 1 -> 3, 2 -> 4, 3 -> 4，另有与 1 无关的 5 -> 6
+EDGES = [(2, 1), (3, 1), (4, 2), (4, 3), (6, 5)]
+
+
+class FakeSchedulerService:
+    finished: List[Tuple[int, Dict[str, Any]]] = []
+    next_dag_run_id = 100
+
+    def __init__(self, cursor):
+        pass
+
+    def list_dependencies(self, active_only: bool = False):
+        return EDGES
+
+    def start_dag_run(self, root_job_id: int) -> int:
+        cls = type(self)
+        cls.next_dag_run_id += 1
+        return cls.next_dag_run_id
+
+    def finish_dag_run(self, dag_run_id: int, **data: Any) -> bool:
+        type(self).finished.append((dag_run_id, data))
+        return True
+
+
+@pytest.fixture
+def coordinator(monkeypatch, fake_db) -> DagCoordinator:
+    FakeSchedulerService.finished = []
+    monkeypatch.setattr(dag, "db_connection", fake_db)
+    monkeypatch.setattr(dag, "SchedulerService", FakeSchedulerService)
+    coordinator = DagCoordinator()
+    coordinator.reload()
+    return coordinator
+
+
+def test_fan_out_and_fan_in(coordinator):
+    assert coordinator.has_downstream(1)
+    assert not coordinator.has_downstream(4)
+
+    run_id = coordinator.start_run(1)
+    assert coordinator.node_finished(run_id, 1, "success", 10) == [2, 3]
+    # 4 还在等待 3
+    assert coordinator.node_finished(run_id, 2, "success", 50) == []
+    assert coordinator.node_finished(run_id, 3, "success", 20) == [4]
+    assert FakeSchedulerService.finished == []
+
+    assert coordinator.node_finished(run_id, 4, "success", 5) == []
+    [(finished_id, data)] = FakeSchedulerService.finished
+    assert finished_id == run_id
+    assert data["status"] == "success"
+    assert data["critical_path"] == [1, 2, 4]
+    assert data["critical_path_ms"] == 65
+
+
+def test_failed_upstream_stops_downstream(coordinator):
+    run_id = coordinator.start_run(1)
+    coordinator.node_finished(run_id, 1, "success", 10)
+    assert coordinator.node_finished(run_id, 2, "failed", 10) == []
+    assert coordinator.node_finished(run_id, 3, "success", 10) == []
+
+    [(_, data)] = FakeSchedulerService.finished
+    assert data["status"] == "failed"
+
+
+def test_run_only_covers_reachable_nodes(coordinator):
+    run_id = coordinator.start_run(2)
+    assert coordinator._runs[run_id].nodes == {2, 4}
+    # 4 的另一上游 3 不在本次运行范围内，不阻塞 4
+    assert coordinator.node_finished(run_id, 2, "success", 10) == [4]
+    coordinator.node_finished(run_id, 4, "success", 10)
+    [(_, data)] = FakeSchedulerService.finished
+    assert data["status"] == "success"
+
+
+def test_unknown_dag_run(coordinator):
+    assert coordinator.node_finished(999, 1, "success", 10) == []
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from backend.scheduler.dispatcher import (
+    DispatchQueueFull,
+    DuplicateTrigger,
+    JobDispatcher,
+    TriggerPriority,
+    TriggerRateLimited,
+    TriggerTicket,
+)
+
+
+def make_dispatcher(handler=lambda ticket: None, **kwargs) -> JobDispatcher:
+    kwargs.setdefault("workers", 1)
+    return JobDispatcher(handler, **kwargs)
+
+
+def test_duplicate_trigger_rejected_until_finished():
+    done = threading.Event()
+    release = threading.Event()
+
+    def handler(ticket):
+        release.wait(2)
+        done.set()
+
+    dispatcher = make_dispatcher(handler)
+    dispatcher.submit(1, TriggerPriority.SCHEDULED)
+    with pytest.raises(DuplicateTrigger):
+        dispatcher.submit(1, TriggerPriority.MANUAL)
+    # 不去重的提交不受影响
+    dispatcher.submit(1, TriggerPriority.MANUAL, dedup=False)
+
+    dispatcher.start()
+    try:
+        release.set()
+        assert done.wait(2)
+    finally:
+        dispatcher.stop()
+    dispatcher.submit(1, TriggerPriority.SCHEDULED)
+    assert dispatcher.rejected["duplicate"] == 1
+
+
+def test_queue_full_does_not_apply_to_dag():
+    dispatcher = make_dispatcher(max_queue=2)
+    dispatcher.submit(1, TriggerPriority.SCHEDULED)
+    dispatcher.submit(2, TriggerPriority.SCHEDULED)
+    with pytest.raises(DispatchQueueFull):
+        dispatcher.submit(3, TriggerPriority.MANUAL)
+    dispatcher.submit(4, TriggerPriority.DAG, dedup=False)
+    assert dispatcher.pending() == 3
+    assert dispatcher.rejected["queue_full"] == 1
+
+
+def test_manual_trigger_rate_limited():
+    dispatcher = make_dispatcher(job_rate_per_minute=60, job_burst=1)
+    dispatcher.submit(1, TriggerPriority.MANUAL, dedup=False, rate_limit=True)
+    with pytest.raises(TriggerRateLimited) as exc:
+        dispatcher.submit(1, TriggerPriority.MANUAL, dedup=False, rate_limit=True)
+    assert 0 < exc.value.retry_after <= 1
+    # 其他任务与不限流的提交不受影响
+    dispatcher.submit(2, TriggerPriority.MANUAL, dedup=False, rate_limit=True)
+    dispatcher.submit(1, TriggerPriority.SCHEDULED, dedup=False)
+
+
+def test_rejected_trigger_does_not_hold_dedup_slot():
+    dispatcher = make_dispatcher(job_rate_per_minute=60, job_burst=1)
+    dispatcher.submit(2, TriggerPriority.MANUAL, dedup=False, rate_limit=True)
+    with pytest.raises(TriggerRateLimited):
+        dispatcher.submit(2, TriggerPriority.MANUAL, rate_limit=True)
+    dispatcher.submit(2, TriggerPriority.SCHEDULED)
+
+
+def test_executes_by_priority_then_fifo():
+    order = []
+    finished = threading.Event()
+
+    def handler(ticket):
+        order.append((ticket.priority, ticket.job_id))
+        if len(order) == 5:
+            finished.set()
+
+    dispatcher = make_dispatcher(handler)
+    dispatcher.submit(1, TriggerPriority.SCHEDULED)
+    dispatcher.submit(2, TriggerPriority.MANUAL)
+    dispatcher.submit(3, TriggerPriority.DAG, dedup=False)
+    dispatcher.submit(4, TriggerPriority.SCHEDULED)
+    dispatcher.submit(5, TriggerPriority.DAG, dedup=False)
+    dispatcher.start()
+    try:
+        assert finished.wait(2)
+    finally:
+        dispatcher.stop()
+    assert [job_id for _, job_id in order] == [3, 5, 2, 1, 4]
+
+
+def test_handler_error_releases_job():
+    failed = threading.Event()
+
+    def handler(ticket):
+        failed.set()
+        raise RuntimeError("boom")
+
+    dispatcher = make_dispatcher(handler)
+    dispatcher.start()
+    try:
+        dispatcher.submit(1, TriggerPriority.SCHEDULED)
+        assert failed.wait(2)
+    finally:
+        dispatcher.stop()
+    assert dispatcher.running() == 0
+    dispatcher.submit(1, TriggerPriority.SCHEDULED)
+
+
+def test_ticket_trigger_lag():
+    ticket = TriggerTicket(1, TriggerPriority.SCHEDULED, True, {})
+    assert ticket.trigger_lag_ms is None
+
+    ticket = TriggerTicket(1, TriggerPriority.SCHEDULED, True, {}, scheduled_at=0)
+    assert ticket.trigger_lag_ms == pytest.approx(ticket.enqueued_at * 1000)
+    # 时钟偏差导致计划时间晚于入队时间时不为负
+    ticket = TriggerTicket(
+        1, TriggerPriority.SCHEDULED, True, {}, scheduled_at=2 ** 40
+    )
+    assert ticket.trigger_lag_ms == 0
@@ -0,0 +1,37 @@
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from backend.scheduler.manager import FireTimeTracker
+
+
+def submitted(job_id: str, *run_times: datetime) -> SimpleNamespace:
+    return SimpleNamespace(job_id=job_id, scheduled_run_times=list(run_times))
+
+
+def at(second: int) -> datetime:
+    return datetime(2026, 1, 1, 0, 0, second, tzinfo=timezone.utc)
+
+
+def test_pop_returns_last_coalesced_fire_time_once():
+    tracker = FireTimeTracker(wait_seconds=0)
+    tracker.on_submitted(submitted("7", at(1), at(2)))
+
+    assert tracker.pop("7") == at(2).timestamp()
+    assert tracker.pop("7") is None
+
+
+def test_system_and_one_off_jobs_are_ignored():
+    tracker = FireTimeTracker(wait_seconds=0)
+    tracker.on_submitted(submitted("__run_retention__", at(1)))
+    tracker.on_submitted(submitted("retry_7_1_1767225600.0", at(1)))
+    assert tracker._fire_times == {}
+
+
+def test_pop_waits_for_late_listener():
+    tracker = FireTimeTracker(wait_seconds=5)
+    # 任务函数先于提交事件执行
+    timer = threading.Timer(0.05, tracker.on_submitted, [submitted("7", at(3))])
+    timer.start()
+    assert tracker.pop("7") == at(3).timestamp()
+    timer.join()
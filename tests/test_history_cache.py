@@ -0,0 +1,192 @@
+from typing import Any, Dict, List, Optional
+
+from backend.chat.history_cache import HistoryCache
+
+
+class FakeChatDAO:
+    """内存中的 ChatDAO，只实现 HistoryCache 用到的查询并记录调用"""
+
+    def __init__(self, count: int = 0):
+        self.rows: List[Dict[str, Any]] = []
+        self.calls: List[str] = []
+        for _ in range(count):
+            self.add()
+
+    def add(self) -> Dict[str, Any]:
+        message_id = len(self.rows) + 1
+        row = {"id": message_id, "role": "user", "content": f"m{message_id}", "name": None}
+        self.rows.append(row)
+        return row
+
+    @property
+    def version(self) -> int:
+        return len(self.rows)
+
+    def list_recent_messages(self, conversation_id: int, limit: int):
+        self.calls.append("recent")
+        return [dict(r) for r in self.rows[-limit:]]
+
+    def get_message_history(
+        self, conversation_id: int, after_id: Optional[int] = None, limit: Optional[int] = None
+    ):
+        self.calls.append("history")
+        rows = [dict(r) for r in self.rows if not after_id or r["id"] > after_id]
+        return rows[-limit:] if limit else rows
+
+    def list_messages_page(
+        self,
+        conversation_id: int,
+        since_id: Optional[int] = None,
+        before_id: Optional[int] = None,
+        limit: int = 100,
+    ):
+        self.calls.append("page")
+        rows = [
+            dict(r)
+            for r in self.rows
+            if (since_id is None or r["id"] > since_id)
+            and (before_id is None or r["id"] < before_id)
+        ]
+        return rows[:limit] if since_id is not None else rows[-limit:]
+
+
+def ids(rows: List[Dict[str, Any]]) -> List[int]:
+    return [r["id"] for r in rows]
+
+
+def test_history_served_from_cache_until_version_changes():
+    cache = HistoryCache(max_messages=10)
+    dao = FakeChatDAO(3)
+
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3]
+    assert ids(cache.history(dao, 1, dao.version, after_id=1)) == [2, 3]
+    assert dao.calls == ["recent"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # 其他副本写入后版本号变化，重新加载
+    dao.add()
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3, 4]
+    assert dao.calls == ["recent", "recent"]
+
+
+def test_history_falls_back_when_cache_does_not_cover_range():
+    cache = HistoryCache(max_messages=3)
+    dao = FakeChatDAO(6)
+
+    # 只缓存了最近 3 条（4..6），不完整
+    assert ids(cache.history(dao, 1, dao.version, limit=2)) == [5, 6]
+    assert ids(cache.history(dao, 1, dao.version, after_id=4)) == [5, 6]
+    assert dao.calls == ["recent"]
+
+    # after_id 早于缓存的第一条，且 limit 超出缓存条数，需回源
+    assert ids(cache.history(dao, 1, dao.version, after_id=1, limit=5)) == [2, 3, 4, 5, 6]
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3, 4, 5, 6]
+    assert dao.calls == ["recent", "history", "history"]
+
+
+def test_page_since_and_before():
+    cache = HistoryCache(max_messages=3)
+    dao = FakeChatDAO(6)
+
+    assert ids(cache.page(dao, 1, dao.version, limit=2)) == [5, 6]
+    assert ids(cache.page(dao, 1, dao.version, since_id=4, limit=10)) == [5, 6]
+    assert ids(cache.page(dao, 1, dao.version, before_id=6, limit=2)) == [4, 5]
+    assert dao.calls == ["recent"]
+
+    assert ids(cache.page(dao, 1, dao.version, since_id=2, limit=2)) == [3, 4]
+    assert ids(cache.page(dao, 1, dao.version, before_id=5, limit=3)) == [2, 3, 4]
+    assert dao.calls == ["recent", "page", "page"]
+
+
+def test_append_with_consecutive_version():
+    cache = HistoryCache(max_messages=10)
+    dao = FakeChatDAO(2)
+    cache.history(dao, 1, dao.version)
+
+    row = dao.add()
+    cache.append(1, row, dao.version)
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3]
+    assert dao.calls == ["recent"]
+
+
+def test_append_after_load_in_same_transaction_is_ignored():
+    cache = HistoryCache(max_messages=10)
+    dao = FakeChatDAO(2)
+    row = dao.add()
+    # 同一事务内先写入再加载，缓存已包含该消息
+    cache.history(dao, 1, dao.version)
+    cache.append(1, row, dao.version)
+
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3]
+    assert dao.calls == ["recent"]
+
+
+def test_append_with_version_gap_drops_entry():
+    cache = HistoryCache(max_messages=10)
+    dao = FakeChatDAO(2)
+    cache.history(dao, 1, dao.version)
+
+    # 其他副本写入了一条，本进程随后写入的版本不连续
+    dao.add()
+    row = dao.add()
+    cache.append(1, row, dao.version)
+    assert len(cache) == 0
+
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3, 4]
+    assert dao.calls == ["recent", "recent"]
+
+
+def test_append_to_uncached_conversation_is_noop():
+    cache = HistoryCache()
+    cache.append(1, {"id": 1, "role": "user", "content": "hi"}, 1)
+    assert len(cache) == 0
+
+
+def test_append_trims_to_max_messages():
+    cache = HistoryCache(max_messages=3)
+    dao = FakeChatDAO()
+    cache.prime(1, dao.version)
+    for _ in range(5):
+        row = dao.add()
+        cache.append(1, row, dao.version)
+
+    assert ids(cache.history(dao, 1, dao.version, limit=3)) == [3, 4, 5]
+    assert dao.calls == []
+
+    # 裁剪后缓存不再完整，读取全部历史需回源
+    assert ids(cache.history(dao, 1, dao.version)) == [1, 2, 3, 4, 5]
+    assert dao.calls == ["history"]
+
+
+def test_primed_conversation_needs_no_load():
+    cache = HistoryCache()
+    dao = FakeChatDAO()
+    cache.prime(1)
+    assert cache.history(dao, 1, 0) == []
+    assert cache.page(dao, 1, 0) == []
+    assert dao.calls == []
+
+
+def test_lru_eviction():
+    cache = HistoryCache(max_conversations=2)
+    for conversation_id in (1, 2):
+        cache.prime(conversation_id)
+    cache.history(FakeChatDAO(), 1, 0)
+    cache.prime(3)
+
+    assert len(cache) == 2
+    dao = FakeChatDAO()
+    cache.history(dao, 1, 0)
+    cache.history(dao, 3, 0)
+    assert dao.calls == []
+    cache.history(dao, 2, 0)
+    assert dao.calls == ["recent"]
+
+
+def test_disabled_cache_always_loads():
+    cache = HistoryCache(max_conversations=0)
+    dao = FakeChatDAO(2)
+    cache.history(dao, 1, dao.version)
+    cache.history(dao, 1, dao.version)
+    assert dao.calls == ["recent", "recent"]
+    assert len(cache) == 0
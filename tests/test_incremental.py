@@ -0,0 +1,63 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.scheduler.incremental import (
+    advance_watermark,
+    build_params,
+    decode_watermark,
+    encode_watermark,
+)
+
+
+def test_advance_to_max_of_column():
+    rows = [{"id": 3}, {"id": 7}, {"id": 5}]
+    assert advance_watermark(rows, "id", 2) == 7
+
+
+def test_advance_keeps_current_without_new_rows():
+    assert advance_watermark([], "id", 10) == 10
+    assert advance_watermark([{"id": None}, {"other": 1}], "id", 10) == 10
+
+
+def test_advance_never_moves_backwards():
+    assert advance_watermark([{"id": 3}], "id", 10) == 10
+
+
+def test_advance_from_none():
+    rows = [{"ts": datetime(2024, 1, 1)}, {"ts": datetime(2024, 3, 1)}]
+    assert advance_watermark(rows, "ts", None) == datetime(2024, 3, 1)
+
+
+def test_advance_with_mismatched_initial_type_uses_result():
+    rows = [{"ts": datetime(2024, 3, 1)}]
+    assert advance_watermark(rows, "ts", "2024-01-01") == datetime(2024, 3, 1)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        None,
+        42,
+        Decimal("1.50"),
+        1.25,
+        datetime(2024, 1, 2, 3, 4, 5, 6),
+        date(2024, 1, 2),
+        "abc",
+    ],
+)
+def test_watermark_round_trip(value):
+    raw, value_type = encode_watermark(value)
+    assert decode_watermark(raw, value_type) == value
+
+
+def test_bool_watermark_stored_as_int():
+    assert encode_watermark(True) == ("1", "int")
+
+
+def test_build_params_injects_watermark():
+    cfg = {"params": {"limit": 10}}
+    assert build_params(cfg, 5) == {"limit": 10, "watermark": 5}
+    assert build_params({"watermark_param": "since"}, 5) == {"since": 5}
+    assert cfg["params"] == {"limit": 10}
@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from backend.database.model.connector import ConnectorModel
+from backend.scheduler import plan_cache
+from backend.scheduler.plan_cache import JobPlan, JobPlanCache
+
+
+@pytest.fixture(autouse=True)
+def fake_monotonic(monkeypatch, clock):
+    monkeypatch.setattr(plan_cache.time, "monotonic", clock)
+
+
+class Loader:
+    """按 job_id 生成计划：模板 = job_id // 10，连接器 = job_id % 2"""
+
+    def __init__(self):
+        self.loaded = []
+
+    def __call__(self, job_id: int) -> JobPlan:
+        self.loaded.append(job_id)
+        return JobPlan(
+            job_id=job_id,
+            template_id=job_id // 10,
+            template_type="db_query",
+            config={"sql": "SELECT 1"},
+            connector=ConnectorModel(id=job_id % 2, name="c"),
+        )
+
+
+def test_hit_after_first_load():
+    cache, loader = JobPlanCache(), Loader()
+    first = cache.get(1, loader)
+    assert cache.get(1, loader) is first
+    assert loader.loaded == [1]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_expiry(clock):
+    cache, loader = JobPlanCache(ttl_seconds=10), Loader()
+    cache.get(1, loader)
+    clock.advance(9)
+    cache.get(1, loader)
+    clock.advance(2)
+    cache.get(1, loader)
+    assert loader.loaded == [1, 1]
+
+
+def test_zero_ttl_never_expires(clock):
+    cache, loader = JobPlanCache(ttl_seconds=0), Loader()
+    cache.get(1, loader)
+    clock.advance(10 ** 6)
+    cache.get(1, loader)
+    assert loader.loaded == [1]
+
+
+def test_invalidate_by_job_template_and_connector():
+    cache, loader = JobPlanCache(), Loader()
+    for job_id in (10, 11, 20, 21):
+        cache.get(job_id, loader)
+
+    cache.invalidate(10)
+    assert len(cache) == 3
+    cache.invalidate_template(2)
+    assert sorted(cache._plans) == [11]
+    cache.invalidate_connector(1)
+    assert len(cache) == 0
+
+    cache.get(10, loader)
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_invalidation_during_load_is_not_cached():
+    cache = JobPlanCache()
+    loader = Loader()
+    loading = threading.Event()
+    proceed = threading.Event()
+
+    def slow_loader(job_id):
+        loading.set()
+        proceed.wait(2)
+        return loader(job_id)
+
+    thread = threading.Thread(target=cache.get, args=(1, slow_loader))
+    thread.start()
+    assert loading.wait(2)
+    # 加载期间配置变更并失效，加载结果可能是旧数据，不应写回缓存
+    cache.invalidate(1)
+    proceed.set()
+    thread.join(2)
+    assert len(cache) == 0
+
+    cache.get(1, loader)
+    assert len(cache) == 1
@@ -0,0 +1,74 @@
+import pytest
+
+from backend.scheduler import rate_limit
+from backend.scheduler.rate_limit import RateLimiter, TokenBucket
+
+
+@pytest.fixture(autouse=True)
+def fake_monotonic(monkeypatch, clock):
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.advance)
+
+
+def test_bucket_allows_burst_then_reports_wait(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [None, None, None]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.advance(0.5)
+    assert bucket.try_acquire() is None
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.try_acquire()
+    bucket.try_acquire()
+    clock.advance(100)
+    assert [bucket.try_acquire() for _ in range(3)] == [None, None, pytest.approx(1.0)]
+
+
+def test_bucket_burst_is_at_least_one():
+    bucket = TokenBucket(rate=1, burst=0)
+    assert bucket.try_acquire() is None
+    assert bucket.try_acquire() is not None
+
+
+def test_bucket_acquire_waits_and_times_out(clock):
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire()
+    start = clock.now
+    assert bucket.acquire()
+    assert clock.now - start == pytest.approx(1.0)
+
+    assert not bucket.acquire(timeout=0.5)
+    assert bucket.acquire(timeout=1)
+
+
+def test_limiter_keeps_a_bucket_per_key():
+    limiter = RateLimiter(rate=1, burst=1)
+    assert limiter.try_acquire("a") is None
+    assert limiter.try_acquire("a") is not None
+    assert limiter.try_acquire("b") is None
+
+
+def test_limiter_disabled_when_rate_not_positive():
+    limiter = RateLimiter(rate=0, burst=0)
+    assert not limiter.enabled
+    assert all(limiter.try_acquire(1) is None for _ in range(100))
+    assert limiter.acquire(1, timeout=0)
+
+
+def test_limiter_evicts_refilled_buckets(clock):
+    limiter = RateLimiter(rate=1, burst=2)
+    for key in range(5):
+        limiter.try_acquire(key)
+    assert len(limiter) == 5
+
+    # 一个补满周期后，已补满的桶被清理，仍在使用中的保留
+    clock.advance(1.5)
+    limiter.try_acquire(0)
+    limiter.try_acquire(0)
+    clock.advance(0.5)
+    limiter.try_acquire(9)
+    assert sorted(limiter._buckets) == [0, 9]
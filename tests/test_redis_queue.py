@@ -0,0 +1,157 @@
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from backend.scheduler.dispatcher import (  # noqa: E402
+    DispatchQueueFull,
+    DuplicateTrigger,
+    TriggerPriority,
+    TriggerRateLimited,
+)
+from backend.scheduler.redis_queue import RedisTriggerQueue  # noqa: E402
+
+
+@pytest.fixture
+def queue() -> RedisTriggerQueue:
+    queue = RedisTriggerQueue(
+        fakeredis.FakeRedis(decode_responses=True),
+        prefix="test",
+        max_queue=3,
+        job_rate_per_minute=60,
+        job_burst=1,
+    )
+    queue.ensure_groups()
+    return queue
+
+
+def test_submit_read_ack_round_trip(queue):
+    queue.submit(1, TriggerPriority.SCHEDULED, scheduled_at=0, attempt=2)
+    [item] = queue.read("w1", block_ms=10)
+    assert item.ticket.job_id == 1
+    assert item.ticket.priority == TriggerPriority.SCHEDULED
+    assert item.ticket.dedup
+    assert item.ticket.kwargs == {"attempt": 2}
+    assert item.ticket.trigger_lag_ms > 0
+
+    # 执行中仍持有去重锁
+    with pytest.raises(DuplicateTrigger):
+        queue.submit(1, TriggerPriority.MANUAL)
+    queue.ack(item)
+    assert queue.pending() == 0
+    queue.submit(1, TriggerPriority.MANUAL)
+
+
+def test_read_by_priority(queue):
+    queue.submit(1, TriggerPriority.SCHEDULED)
+    queue.submit(2, TriggerPriority.MANUAL)
+    queue.submit(3, TriggerPriority.DAG, dedup=False)
+    order = [queue.read("w1", block_ms=10)[0].ticket.job_id for _ in range(3)]
+    assert order == [3, 2, 1]
+    assert queue.read("w1", block_ms=10) == []
+
+
+def test_queue_full_and_rate_limit(queue):
+    for job_id in range(3):
+        queue.submit(job_id, TriggerPriority.SCHEDULED)
+    with pytest.raises(DispatchQueueFull):
+        queue.submit(9, TriggerPriority.MANUAL)
+    # DAG 下游不计入队列上限
+    queue.submit(9, TriggerPriority.DAG, dedup=False)
+
+    queue.streams = {p: s + ":other" for p, s in queue.streams.items()}
+    queue.ensure_groups()
+    queue.submit(5, TriggerPriority.MANUAL, dedup=False, rate_limit=True)
+    with pytest.raises(TriggerRateLimited):
+        queue.submit(5, TriggerPriority.MANUAL, dedup=False, rate_limit=True)
+    assert queue.stats()["rejected"] == {
+        "duplicate": 0,
+        "rate_limited": 1,
+        "queue_full": 1,
+    }
+
+
+def test_claim_stale_from_dead_consumer(queue):
+    queue.submit(1, TriggerPriority.SCHEDULED)
+    queue.submit(2, TriggerPriority.MANUAL)
+    assert len(queue.read("dead", block_ms=10)) == 1
+    assert len(queue.read("dead", block_ms=10)) == 1
+
+    # 空闲时间未超过阈值时不认领
+    assert queue.claim_stale("w2", min_idle_ms=60000) == []
+    # 按优先级认领，且不超过 count
+    [item] = queue.claim_stale("w2", min_idle_ms=0, count=1)
+    assert item.ticket.job_id == 2
+    queue.ack(item)
+    [item] = queue.claim_stale("w2", min_idle_ms=0)
+    assert item.ticket.job_id == 1
+    queue.ack(item)
+    assert queue.pending() == 0
+
+
+def test_touch_keeps_message_from_being_claimed(queue):
+    queue.submit(1, TriggerPriority.SCHEDULED)
+    [item] = queue.read("w1", block_ms=10)
+    queue.touch("w1", [item])
+    assert queue.claim_stale("w2", min_idle_ms=60000) == []
+
+
+def test_invalidation_payload(queue):
+    pubsub = queue.client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(queue.channel)
+    queue.publish_invalidation("job", 7)
+    message = None
+    for _ in range(10):
+        message = pubsub.get_message(timeout=0.1)
+        if message:
+            break
+    assert message["data"] == '{"kind": "job", "key": 7}'
+
+
+class FakeManager:
+    def __init__(self):
+        self.executed = []
+
+    def execute_ticket(self, ticket):
+        self.executed.append(ticket.job_id)
+        raise RuntimeError("job failed")
+
+
+def test_worker_claims_stale_before_reading_and_acks_after_execute(queue):
+    from backend.scheduler.worker import QueueWorker
+
+    queue.submit(1, TriggerPriority.SCHEDULED)
+    queue.read("dead", block_ms=10)
+    queue.submit(2, TriggerPriority.MANUAL)
+
+    manager = FakeManager()
+    worker = QueueWorker(manager, queue, "w1", concurrency=1, block_ms=10, claim_idle_ms=0)
+    [item] = worker._next_items()
+    assert item.ticket.job_id == 1
+
+    worker._slots.acquire()
+    worker._inflight[item.message_id] = item
+    worker._execute(item)
+    # 执行失败也会确认消息、释放执行槽
+    assert manager.executed == [1]
+    assert worker._inflight == {}
+    assert worker._slots.acquire(blocking=False)
+    assert queue.pending() == 1
+
+
+def test_worker_stats(queue):
+    assert queue.worker_stats() == {"workers": 0, "running": 0}
+    queue.submit(1, TriggerPriority.SCHEDULED)
+    queue.submit(2, TriggerPriority.MANUAL)
+    [first] = queue.read("w1", block_ms=10)
+    queue.read("w2", block_ms=10)
+    assert queue.worker_stats() == {"workers": 2, "running": 2}
+
+    queue.ack(first)
+    assert queue.worker_stats()["running"] == 1
+    # 长时间未读取的 worker 视为已退出
+    assert queue.worker_stats(active_ms=-1)["workers"] == 0
+
+
+def test_worker_stats_before_groups_exist():
+    queue = RedisTriggerQueue(fakeredis.FakeRedis(decode_responses=True), prefix="empty")
+    assert queue.worker_stats() == {"workers": 0, "running": 0}
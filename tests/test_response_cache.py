@@ -0,0 +1,217 @@
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+import pytest
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages.tool import tool_call_chunk
+
+from backend.infra.llm import response_cache
+from backend.infra.llm.response_cache import (
+    ResponseCache,
+    _VectorIndex,
+    cache_keys,
+    create_response_cache,
+    normalize_text,
+)
+
+
+@pytest.fixture(autouse=True)
+def fake_time(monkeypatch, clock):
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def ask(question: str, system: str = "sys") -> List:
+    return [SystemMessage(content=system), HumanMessage(content=question)]
+
+
+class FakeLLM:
+    """按顺序返回预设回复，记录调用次数"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def ainvoke(self, messages, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+    async def astream(self, messages, **kwargs):
+        self.calls += 1
+        for chunk in self.responses.pop(0):
+            yield chunk
+
+
+def fake_embed(vectors: Dict[str, List[float]]):
+    async def embed(text: str):
+        return vectors[text]
+
+    return embed
+
+
+def test_normalize_text_and_keys():
+    assert normalize_text("  Ｈｅｌｌｏ   World？ ") == "hello world"
+    exact, context, question = cache_keys(ask("Hello World?"))
+    assert question == "hello world"
+    assert exact == cache_keys(ask("hello   world"))[0]
+    # 上下文键只覆盖末条用户消息之前的部分
+    assert context == cache_keys(ask("other"))[1]
+    assert context != cache_keys(ask("hello world", system="other"))[1]
+
+
+def test_exact_hit_ttl_and_lru(clock):
+    cache = ResponseCache(ttl_seconds=10, max_entries=2)
+    llm = cache.wrap(FakeLLM(AIMessage(content="a1"), AIMessage(content="a2"),
+                             AIMessage(content="a3"), AIMessage(content="a1'")))
+
+    assert run(llm.ainvoke(ask("q1"))).content == "a1"
+    assert run(llm.ainvoke(ask("Q1?"))).content == "a1"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    run(llm.ainvoke(ask("q2")))
+    run(llm.ainvoke(ask("q1")))
+    run(llm.ainvoke(ask("q3")))
+    # q2 最久未使用，被淘汰
+    assert cache.stats()["entries"] == 2
+    assert run(cache.lookup(ask("q2")))[0] is None
+
+    clock.advance(10)
+    assert run(llm.ainvoke(ask("q1"))).content == "a1'"
+    assert llm.llm.calls == 4
+
+
+def test_tool_call_step_is_cached_with_fresh_ids():
+    cache = ResponseCache()
+    step = AIMessage(
+        content="", tool_calls=[{"name": "run_sql", "args": {"sql": "select 1"}, "id": "c1"}]
+    )
+    llm = cache.wrap(FakeLLM(step))
+
+    run(llm.ainvoke(ask("rows?")))
+    cached = run(llm.ainvoke(ask("rows?")))
+    assert llm.llm.calls == 1
+    assert [(c["name"], c["args"]) for c in cached.tool_calls] == [
+        ("run_sql", {"sql": "select 1"})
+    ]
+    # 调用 id 不复用，由调用方重新分配
+    assert cached.tool_calls[0]["id"] is None
+
+
+def test_astream_caches_text_and_tool_calls():
+    cache = ResponseCache()
+    chunks = [
+        AIMessageChunk(content="let me ", tool_call_chunks=[]),
+        AIMessageChunk(
+            content="check",
+            tool_call_chunks=[tool_call_chunk(name="run_sql", args='{"sql": ', id="c1", index=0)],
+        ),
+        AIMessageChunk(
+            content="",
+            tool_call_chunks=[tool_call_chunk(name=None, args='"select 1"}', id=None, index=0)],
+        ),
+    ]
+    llm = cache.wrap(FakeLLM(chunks))
+
+    async def collect():
+        return [chunk async for chunk in llm.astream(ask("rows?"))]
+
+    assert len(run(collect())) == 3
+    (cached,) = run(collect())
+    assert llm.llm.calls == 1
+    assert cached.content == "let me check"
+    assert [(c["name"], c["args"]) for c in cached.tool_calls] == [
+        ("run_sql", {"sql": "select 1"})
+    ]
+
+
+def test_incomplete_stream_is_not_cached():
+    cache = ResponseCache()
+    llm = cache.wrap(FakeLLM([AIMessageChunk(content="a"), AIMessageChunk(content="b")]))
+
+    async def first_chunk():
+        stream = llm.astream(ask("q"))
+        chunk = await stream.__anext__()
+        await stream.aclose()
+        return chunk
+
+    assert run(first_chunk()).content == "a"
+    assert cache.stats()["entries"] == 0
+
+
+def test_empty_or_non_text_output_is_not_cached():
+    cache = ResponseCache()
+    state = run(cache.lookup(ask("q")))[1]
+    cache.store(state, AIMessage(content=""))
+    cache.store(state, AIMessage(content=[{"type": "text", "text": "a"}]))
+    assert cache.stats()["entries"] == 0
+
+
+def test_semantic_hit_within_same_context_only():
+    embed = fake_embed({"q1": [1.0, 0.0], "q1 again": [0.99, 0.1], "other": [0.0, 1.0]})
+    cache = ResponseCache(embed=embed, similarity=0.95)
+    llm = cache.wrap(FakeLLM(AIMessage(content="a1"), AIMessage(content="b"),
+                             AIMessage(content="c")))
+
+    run(llm.ainvoke(ask("q1")))
+    assert run(llm.ainvoke(ask("q1 again"))).content == "a1"
+    assert cache.semantic_hits == 1
+
+    assert run(llm.ainvoke(ask("other"))).content == "b"
+    # 上下文不同的相似问题不命中
+    assert run(llm.ainvoke(ask("q1 again", system="other"))).content == "c"
+    assert llm.llm.calls == 3
+
+
+def test_semantic_falls_back_when_embed_fails():
+    async def broken(text: str):
+        raise RuntimeError("boom")
+
+    cache = ResponseCache(embed=broken)
+    llm = cache.wrap(FakeLLM(AIMessage(content="a"), AIMessage(content="b")))
+    run(llm.ainvoke(ask("q")))
+    assert run(llm.ainvoke(ask("q"))).content == "a"
+    assert run(llm.ainvoke(ask("q2"))).content == "b"
+
+
+def test_vector_index_grows_and_removes_in_place():
+    index = _VectorIndex(capacity=2)
+    vectors = {f"k{i}": np.eye(4, dtype=np.float32)[i] for i in range(4)}
+    for key, vector in vectors.items():
+        index.add(key, vector)
+    assert index.matrix.shape == (4, 4)
+
+    index.remove("k0")
+    index.remove("missing")
+    assert sorted(index.keys) == ["k1", "k2", "k3"]
+    for key, vector in vectors.items():
+        found, score = index.search(vector)
+        if key == "k0":
+            assert score == 0.0
+        else:
+            assert (found, score) == (key, 1.0)
+
+    for key in ("k1", "k2", "k3"):
+        index.remove(key)
+    assert index.search(vectors["k1"]) == (None, 0.0)
+
+
+def test_create_response_cache_without_embedding_model():
+    cfg = SimpleNamespace(
+        response_cache_enabled=True,
+        response_cache_ttl_seconds=60,
+        response_cache_max_entries=10,
+        response_cache_semantic=True,
+        response_cache_similarity=0.9,
+        embedding_model="",
+    )
+    cache = create_response_cache(cfg)
+    assert cache.enabled and not cache.semantic
+
+    cfg.response_cache_enabled = False
+    assert not create_response_cache(cfg).enabled
@@ -0,0 +1,68 @@
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+from backend.database.result_codec import (
+    PLAIN,
+    ZLIB,
+    decode_result,
+    encode_result,
+)
+
+
+def test_small_result_stored_plain():
+    data = {"columns": ["id"], "rows": [{"id": 1}], "row_count": 1}
+    blob = encode_result(data)
+    assert blob.startswith(PLAIN)
+    assert decode_result(blob) == data
+
+
+def test_large_result_compressed():
+    data = {"rows": [{"id": i, "name": "同一个名字"} for i in range(200)]}
+    blob = encode_result(data)
+    assert blob.startswith(ZLIB)
+    assert decode_result(blob) == data
+
+
+def test_driver_types_are_serialized():
+    key = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    row = {
+        "amount": Decimal("12345678901234567890.12"),
+        "created_at": datetime(2024, 1, 2, 3, 4, 5),
+        "day": date(2024, 1, 2),
+        "at": time(3, 4, 5),
+        "elapsed": timedelta(minutes=1, seconds=30),
+        "text": "中文".encode("utf-8"),
+        "binary": b"\xff\x00",
+        "tags": {"a"},
+        "key": key,
+    }
+    assert decode_result(encode_result(row)) == {
+        "amount": "12345678901234567890.12",
+        "created_at": "2024-01-02T03:04:05",
+        "day": "2024-01-02",
+        "at": "03:04:05",
+        "elapsed": 90.0,
+        "text": "中文",
+        "binary": "/wA=",
+        "tags": ["a"],
+        "key": str(key),
+    }
+
+
+def test_decode_empty_and_memoryview():
+    assert decode_result(None) is None
+    assert decode_result(b"") is None
+    assert decode_result(memoryview(encode_result([1, 2]))) == [1, 2]
+
+
+def test_decode_unknown_marker():
+    with pytest.raises(ValueError):
+        decode_result(b"x{}")
+
+
+def test_unsupported_type_raises():
+    with pytest.raises(TypeError):
+        encode_result({"value": object()})
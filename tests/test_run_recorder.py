@@ -0,0 +1,134 @@
+import threading
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.scheduler import retention, run_recorder
+from backend.scheduler.retention import RunRetentionPruner
+from backend.scheduler.run_recorder import RunRecorder
+
+
+class FakeSchedulerService:
+    """记录 finish_runs 收到的批次，fail 非零时前几次写入抛异常"""
+
+    batches: List[List[Dict[str, Any]]] = []
+    fail = 0
+    written = threading.Event()
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def finish_runs(self, updates: List[Dict[str, Any]]) -> int:
+        cls = type(self)
+        if cls.fail:
+            cls.fail -= 1
+            raise RuntimeError("db down")
+        cls.batches.append(updates)
+        cls.written.set()
+        return len(updates)
+
+
+@pytest.fixture(autouse=True)
+def fake_service(monkeypatch, fake_db):
+    FakeSchedulerService.batches = []
+    FakeSchedulerService.fail = 0
+    FakeSchedulerService.written = threading.Event()
+    monkeypatch.setattr(run_recorder, "db_connection", fake_db)
+    monkeypatch.setattr(run_recorder, "SchedulerService", FakeSchedulerService)
+    return FakeSchedulerService
+
+
+def test_merge_keeps_last_value_and_merges_metrics():
+    merged = RunRecorder._merge(
+        [
+            {"id": 1, "status": "running", "metrics": {"queue_ms": 5}},
+            {"id": 2, "status": "success"},
+            {"id": 1, "status": "success", "error": None, "metrics": {"exec_ms": 9}},
+        ]
+    )
+    assert merged == [
+        {"id": 1, "status": "success", "metrics": {"queue_ms": 5, "exec_ms": 9}},
+        {"id": 2, "status": "success"},
+    ]
+
+
+def test_submit_writes_synchronously_when_not_started(fake_service, fake_db):
+    recorder = RunRecorder()
+    recorder.submit(1, status="success")
+    assert fake_service.batches == [[{"id": 1, "status": "success"}]]
+    assert fake_db.transactions == 1
+
+
+def test_background_thread_batches_updates(fake_service, fake_db):
+    recorder = RunRecorder(flush_interval_ms=50, batch_size=100)
+    recorder.start()
+    try:
+        for run_id in range(10):
+            recorder.submit(run_id, status="success")
+        assert fake_service.written.wait(2)
+    finally:
+        recorder.stop()
+    assert sorted(u["id"] for b in fake_service.batches for u in b) == list(range(10))
+    # 10 条更新在一个时间窗口内提交，远少于 10 次事务
+    assert fake_db.transactions < 10
+
+
+def test_flush_splits_by_batch_size(fake_service):
+    recorder = RunRecorder(batch_size=3)
+    for run_id in range(7):
+        recorder._queue.put({"id": run_id, "status": "success"})
+    recorder.flush()
+    assert [len(b) for b in fake_service.batches] == [3, 3, 1]
+    assert recorder.pending() == 0
+
+
+def test_failed_write_is_requeued_while_running(fake_service, monkeypatch):
+    recorder = RunRecorder()
+    monkeypatch.setattr(RunRecorder, "running", property(lambda self: True))
+    fake_service.fail = 1
+    recorder._write([{"id": 1, "status": "failed"}])
+    assert recorder.pending() == 1
+
+    recorder.flush()
+    [[update]] = fake_service.batches
+    assert (update["id"], update["status"]) == (1, "failed")
+
+
+def test_failed_write_dropped_after_max_retries(fake_service, monkeypatch):
+    recorder = RunRecorder()
+    monkeypatch.setattr(RunRecorder, "running", property(lambda self: True))
+    fake_service.fail = RunRecorder.MAX_RETRIES + 1
+    recorder._write([{"id": 1, "status": "failed"}])
+    for _ in range(RunRecorder.MAX_RETRIES):
+        recorder.flush()
+    assert recorder.pending() == 0
+    assert fake_service.batches == []
+
+
+class FakeStaleService:
+    remaining = 0
+    calls: List[int] = []
+
+    def __init__(self, cursor):
+        pass
+
+    def fail_stale_runs(self, stale_seconds: int, limit: int) -> int:
+        type(self).calls.append(stale_seconds)
+        count = min(type(self).remaining, limit)
+        type(self).remaining -= count
+        return count
+
+
+def test_fail_stale_runs_in_batches(monkeypatch, fake_db):
+    monkeypatch.setattr(retention, "db_connection", fake_db)
+    monkeypatch.setattr(retention, "SchedulerService", FakeStaleService)
+    FakeStaleService.remaining = 25
+    FakeStaleService.calls = []
+
+    pruner = RunRetentionPruner(batch_size=10, stale_seconds=3600)
+    assert pruner.fail_stale_runs() == 25
+    assert FakeStaleService.calls == [3600, 3600, 3600]
+
+    FakeStaleService.calls = []
+    assert RunRetentionPruner(stale_seconds=0).fail_stale_runs() == 0
+    assert FakeStaleService.calls == []
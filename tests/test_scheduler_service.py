@@ -0,0 +1,182 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.database.dao.scheduler_dao import SchedulerDAO
+from backend.database.model.scheduler import JobTemplateModel, ScheduledJobModel
+from backend.database.service.scheduler_service import SchedulerService
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed: List[tuple] = []
+        self.rowcount = 0
+
+    def execute(self, sql: str, params=None):
+        self.executed.append((sql, params))
+        self.rowcount = 1
+
+
+class FakeSchedulerDAO:
+    """内存中的 SchedulerDAO，只实现任务增改用到的方法"""
+
+    def __init__(self, templates: List[JobTemplateModel]):
+        self.templates = {t.id: t for t in templates}
+        self.jobs: Dict[int, ScheduledJobModel] = {}
+        self.bulk_updates: List[List[Dict[str, Any]]] = []
+
+    def get_template_by_id(self, template_id):
+        return self.templates.get(template_id)
+
+    def get_templates_by_ids(self, template_ids):
+        return [self.templates[i] for i in template_ids if i in self.templates]
+
+    def create_jobs(self, items):
+        job_ids = []
+        for item in items:
+            job_id = len(self.jobs) + 1
+            self.jobs[job_id] = ScheduledJobModel(id=job_id, **item)
+            job_ids.append(job_id)
+        return job_ids
+
+    def get_jobs_by_ids(self, job_ids):
+        return [self.jobs[i] for i in job_ids if i in self.jobs]
+
+    def list_existing_job_ids(self, job_ids):
+        return [i for i in job_ids if i in self.jobs]
+
+    def update_jobs_fields(self, updates):
+        self.bulk_updates.append([dict(u) for u in updates])
+        return len(updates)
+
+    def list_dependencies(self, active_only=False):
+        return []
+
+    def replace_upstream_ids(self, upstreams):
+        pass
+
+    def get_upstream_ids(self, job_ids):
+        return {}
+
+
+TEMPLATES = [
+    JobTemplateModel(id=1, template_type="db_query", default_config={"sql": "SELECT 1"}),
+    JobTemplateModel(
+        id=2,
+        template_type="incremental_query",
+        default_config={
+            "sql": "SELECT * FROM t WHERE id > %(watermark)s",
+            "watermark_column": "id",
+            "initial_watermark": 0,
+        },
+    ),
+]
+
+
+@pytest.fixture
+def service() -> SchedulerService:
+    service = SchedulerService(None)
+    service.dao = FakeSchedulerDAO(TEMPLATES)
+    return service
+
+
+def test_update_jobs_fields_single_statement():
+    cursor = RecordingCursor()
+    SchedulerDAO(cursor).update_jobs_fields(
+        [
+            {"id": 1, "name": "a", "is_active": False},
+            {"id": 2, "cron_expression": None, "override_config": {"x": 1}},
+        ]
+    )
+    [(sql, params)] = cursor.executed
+    assert sql.count("UNION ALL") == 1
+    assert "j.cron_expression=IF(u.set_cron_expression, u.cron_expression, j.cron_expression)" in sql
+    assert "CAST(u.override_config AS JSON)" in sql
+    assert "retention_days" not in sql
+    # 每行：id + (值, 是否提供) × 4 个出现过的字段
+    assert params[:9] == [1, "a", 1, None, 0, False, 1, "null", 0]
+    assert params[9:] == [2, None, 0, None, 1, None, 0, '{"x": 1}', 1]
+
+
+def test_update_jobs_fields_without_fields_is_noop():
+    cursor = RecordingCursor()
+    assert SchedulerDAO(cursor).update_jobs_fields([{"id": 1}]) == 0
+    assert cursor.executed == []
+
+
+def test_create_jobs_validates_every_item_against_its_template(service):
+    items = [
+        {"name": "a", "template_id": 1},
+        {"name": "b", "template_id": 2, "override_config": {"watermark_column": ""}},
+    ]
+    with pytest.raises(ValueError, match="watermark_column"):
+        service.create_jobs(items)
+    assert service.dao.jobs == {}
+
+
+def test_create_jobs_rejects_missing_templates(service):
+    with pytest.raises(ValueError, match=r"\[9\]"):
+        service.create_jobs([{"name": "a", "template_id": 9}])
+
+
+def test_create_jobs(service):
+    jobs = service.create_jobs(
+        [{"name": "a", "template_id": 1}, {"name": "b", "template_id": 2}]
+    )
+    assert [job.id for job in jobs] == [1, 2]
+
+
+def test_update_jobs_issues_one_bulk_update(service):
+    service.create_jobs([{"name": "a", "template_id": 1}, {"name": "b", "template_id": 1}])
+    service.update_jobs([{"id": 1, "name": "a2"}, {"id": 2, "is_active": False}])
+    assert service.dao.bulk_updates == [
+        [{"id": 1, "name": "a2"}, {"id": 2, "is_active": False}]
+    ]
+
+
+def test_update_jobs_rejects_duplicates_and_missing(service):
+    service.create_jobs([{"name": "a", "template_id": 1}])
+    with pytest.raises(ValueError, match="重复"):
+        service.update_jobs([{"id": 1}, {"id": 1}])
+    with pytest.raises(ValueError, match="不存在"):
+        service.update_jobs([{"id": 5, "name": "x"}])
+    assert service.dao.bulk_updates == []
+
+
+def test_on_change_job_requires_watch_tables(service):
+    with pytest.raises(ValueError, match="watch_tables"):
+        service.create_jobs([{"name": "a", "template_id": 1, "schedule_type": "on_change"}])
+
+    with pytest.raises(ValueError, match="变更探测方式"):
+        service.create_jobs(
+            [
+                {
+                    "name": "a",
+                    "template_id": 1,
+                    "schedule_type": "on_change",
+                    "override_config": {"watch_tables": ["t"], "watch_mode": "binlog"},
+                }
+            ]
+        )
+
+    [job] = service.create_jobs(
+        [
+            {
+                "name": "a",
+                "template_id": 1,
+                "schedule_type": "on_change",
+                "override_config": {"watch_tables": ["t"]},
+            }
+        ]
+    )
+    assert job.schedule_type == "on_change"
+
+
+def test_switching_to_on_change_validates_merged_config(service):
+    service.create_jobs([{"name": "a", "template_id": 1}])
+    with pytest.raises(ValueError, match="watch_tables"):
+        service.update_jobs([{"id": 1, "schedule_type": "on_change"}])
+    service.update_jobs(
+        [{"id": 1, "schedule_type": "on_change", "override_config": {"watch_tables": ["t"]}}]
+    )
+    assert len(service.dao.bulk_updates) == 1
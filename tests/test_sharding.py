@@ -0,0 +1,112 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from backend.scheduler import sharding
+from backend.scheduler.sharding import ShardedExecutor, aggregate, plan_shards
+
+
+class FakeConnector:
+    """按分片参数生成行；failures 中的分片前若干次执行抛异常"""
+
+    def __init__(self, lo=1, hi=100, partitions=("p1", "p2"), failures=None):
+        self.lo, self.hi = lo, hi
+        self.partitions = partitions
+        self.failures: Dict[str, int] = dict(failures or {})
+        self.queries: List[str] = []
+
+    def execute_query(self, sql: str, params=None) -> List[Dict[str, Any]]:
+        self.queries.append(sql)
+        if sql.startswith("SHOW PARTITIONS"):
+            return [{"PartitionName": name} for name in self.partitions]
+        return [{"lo": self.lo, "hi": self.hi}]
+
+    def execute_query_iterator(self, sql, params=None, batch_size=1000, read_only=False):
+        key = f"{params.get('shard_start')}" if "shard_start" in params else sql
+        if self.failures.get(key):
+            self.failures[key] -= 1
+            raise ConnectionError("lost connection")
+        start, end = params.get("shard_start", 0), params.get("shard_end", 3)
+        rows = [{"id": i} for i in range(start, end)]
+        for i in range(0, len(rows), 7):
+            yield rows[i : i + 7]
+
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep(monkeypatch):
+    monkeypatch.setattr(sharding.time, "sleep", lambda seconds: None)
+
+
+def key_range_cfg(**options) -> Dict[str, Any]:
+    return {
+        "sql": "SELECT * FROM t WHERE id >= %(shard_start)s AND id < %(shard_end)s",
+        "sharding": {"strategy": "key_range", "column": "id", "table": "t", **options},
+    }
+
+
+def test_key_range_shards_cover_range_without_overlap():
+    connector = FakeConnector(lo=1, hi=10)
+    shards = plan_shards(connector, key_range_cfg(shards=3), {"x": 1})
+    assert [s.key for s in shards] == ["[1, 5)", "[5, 9)", "[9, 11)"]
+    assert shards[0].params == {"x": 1, "shard_start": 1, "shard_end": 5}
+    assert connector.queries == ["SELECT MIN(`id`) AS lo, MAX(`id`) AS hi FROM `t`"]
+
+
+def test_key_range_with_explicit_bounds_skips_probe():
+    connector = FakeConnector()
+    shards = plan_shards(connector, key_range_cfg(min=0, max=1, shards=8), None)
+    assert [s.key for s in shards] == ["[0, 1)", "[1, 2)"]
+    assert connector.queries == []
+
+
+def test_key_range_empty_table():
+    connector = FakeConnector(lo=None, hi=None)
+    assert plan_shards(connector, key_range_cfg(), None) == []
+
+
+def test_partition_shards():
+    cfg = {
+        "sql": "SELECT * FROM t {partition}",
+        "sharding": {"strategy": "doris_partition", "table": "t"},
+    }
+    shards = plan_shards(FakeConnector(partitions=("p1", "p2")), cfg, None)
+    assert [s.sql for s in shards] == [
+        "SELECT * FROM t PARTITION (`p1`)",
+        "SELECT * FROM t PARTITION (`p2`)",
+    ]
+
+
+def test_rejects_bad_strategy_and_identifiers():
+    with pytest.raises(ValueError):
+        plan_shards(FakeConnector(), {"sql": "", "sharding": {"strategy": "hash"}}, None)
+    cfg = key_range_cfg(table="t; DROP TABLE t")
+    with pytest.raises(ValueError):
+        plan_shards(FakeConnector(), cfg, None)
+
+
+def test_execute_retries_failed_shard_and_aggregates():
+    connector = FakeConnector(lo=0, hi=39, failures={"10": 1})
+    shards = plan_shards(connector, key_range_cfg(shards=4), None)
+    outcomes = ShardedExecutor(max_workers=4).execute(connector, shards, {"retries": 2})
+
+    assert [o.status for o in outcomes] == ["success"] * 4
+    assert [o.attempts for o in outcomes] == [1, 2, 1, 1]
+    result = aggregate(outcomes)
+    assert result["total"] == 40
+    assert [row["id"] for row in result["preview"]] == list(range(10))
+    assert result["shards"] == {"count": 4, "failed": [], "retries": 1}
+
+
+def test_shard_failing_all_attempts_is_reported():
+    connector = FakeConnector(lo=0, hi=19, failures={"10": 5})
+    shards = plan_shards(connector, key_range_cfg(shards=2), None)
+    outcomes = ShardedExecutor().execute(connector, shards, {"retries": 1})
+
+    assert outcomes[1].status == "failed"
+    assert outcomes[1].attempts == 2
+    assert outcomes[1].rows == 0
+    assert "lost connection" in outcomes[1].error
+    assert outcomes[1].as_record()["status"] == "failed"
+    result = aggregate(outcomes)
+    assert result["total"] == 10
+    assert result["shards"]["failed"] == ["[10, 20)"]